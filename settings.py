@@ -15,7 +15,6 @@ import os
 import sys
 
 import environ
-from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -152,23 +151,16 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-CELERY_BROKER_URL = "redis://127.0.0.1:6379/0"
-CELERY_RESULT_BACKEND = "redis://127.0.0.1:6379/1"
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://127.0.0.1:6379/0")
+CELERY_RESULT_BACKEND = os.environ.get(
+    "CELERY_RESULT_BACKEND", "redis://127.0.0.1:6379/1"
+)
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
 
-CELERY_BEAT_SCHEDULE = {
-    "nightly_all_portfolios": {
-        "task": "trade_smart.tasks.nightly_all_portfolios",
-        "schedule": crontab(minute="*/15"),
-    },
-    "fetch_news_for_all_positions": {
-        "task": "trade_smart.tasks.fetch_news_for_all_positions",
-        "schedule": crontab(minute=0, hour="*/6"),  # Every 6 hours
-    },
-}
+# periodic jobs are registered in trade_smart.tasks.setup_periodic_tasks
 ALPHAVANTAGE_KEY = os.environ.get("ALPHAVANTAGE_KEY" "")
 FMP_KEY = os.environ.get("FMP_KEY" "")
 
@@ -177,3 +169,14 @@ FROM_EMAIL = os.environ.get("FROM_EMAIL", "")
 SMTP_PORT = os.environ.get("SMTP_PORT", "")
 SMTP_SERVER_HOST = os.environ.get("SMTP_SERVER_HOST", "")
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
+# news vector index: a Chroma server shared by all worker processes (the
+# compose service; outside compose use CHROMA_HOST=localhost CHROMA_PORT=8001)
+CHROMA_HOST = os.environ.get("CHROMA_HOST", "chroma")
+CHROMA_PORT = int(os.environ.get("CHROMA_PORT", "8000"))
+# networks (CIDR, comma separated) besides loopback allowed to scrape /metrics
+# without staff auth, e.g. the Prometheus host's address
+METRICS_ALLOWED_NETS = [
+    net.strip()
+    for net in os.environ.get("METRICS_ALLOWED_NETS", "").split(",")
+    if net.strip()
+]
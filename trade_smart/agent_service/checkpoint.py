@@ -0,0 +1,214 @@
+"""
+checkpoint – persist completed advice-graph node outputs per run
+
+Every node is wrapped with ``checkpointed``.  When the graph state carries a
+``run_id``, the node's output is stored under (run_id, portfolio, ticker,
+node) once it completes, and a rerun with the same run id returns the stored
+output instead of executing the node again.  The runner loads a portfolio's
+checkpoints with one query (``load_run``, passed in as ``resumed``) and
+collects new outputs in a ``Batch`` (``checkpoint_batch``) that it writes
+with one upsert at each join, so graph steps make no checkpoint round
+trips of their own.  Degraded outputs (computed from a timed-out or failed
+branch, or a parse-failure HOLD) are not stored, so a resumed run retries
+them.  ``notified`` / ``mark_notified`` record that
+a run's advice email went out, so a rerun of the same run does not resend
+it.  ``purge`` removes checkpoints older than ``GRAPH_CHECKPOINT_TTL_DAYS``.
+Coroutine nodes are supported; outside a runner batch their checkpoint
+reads and writes run off the event loop.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import inspect
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from trade_smart.agent_service.nodes.synth_llm import FALLBACK_RATIONALE
+from trade_smart.models import GraphCheckpoint
+from trade_smart.utils.aio import db_thread
+
+logger = logging.getLogger(__name__)
+
+TTL_DAYS: int = getattr(settings, "GRAPH_CHECKPOINT_TTL_DAYS", 3)
+NOTIFY_NODE = "notify"  # portfolio-level marker, stored with ticker ""
+
+
+def _portfolio_id(state: Dict[str, Any]) -> int | None:
+    pf = state.get("portfolio")
+    return pf.id if pf is not None else None
+
+
+def load(
+    run_id: str, portfolio_id: int | None, node: str, tickers: Iterable[str]
+) -> Dict[str, Any]:
+    """Stored outputs of *node* for *tickers* in this run, keyed by ticker."""
+    return dict(
+        GraphCheckpoint.objects.filter(
+            run_id=run_id, portfolio_id=portfolio_id, node=node, ticker__in=tickers
+        ).values_list("ticker", "output")
+    )
+
+
+def load_run(
+    run_id: str, portfolio_id: int | None, tickers: Iterable[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Every stored output of this run for *tickers*: {ticker: {node: output}}."""
+    done: Dict[str, Dict[str, Any]] = {}
+    for ticker, node, output in GraphCheckpoint.objects.filter(
+        run_id=run_id, portfolio_id=portfolio_id, ticker__in=list(tickers)
+    ).values_list("ticker", "node", "output"):
+        done.setdefault(ticker, {})[node] = output
+    return done
+
+
+def _jsonable(output: Any) -> Any:
+    return json.loads(json.dumps(output, default=str))
+
+
+def save(
+    run_id: str, portfolio_id: int | None, ticker: str, node: str, output: Any
+) -> None:
+    GraphCheckpoint.objects.update_or_create(
+        run_id=run_id,
+        portfolio_id=portfolio_id,
+        ticker=ticker,
+        node=node,
+        defaults={"output": _jsonable(output)},
+    )
+
+
+class Batch:
+    """Node outputs of one (run, portfolio), written together by ``flush``."""
+
+    def __init__(self, run_id: str, portfolio_id: int | None):
+        self.run_id = run_id
+        self.portfolio_id = portfolio_id
+        self._rows: Dict[tuple[str, str], Any] = {}
+        self._lock = threading.Lock()  # graph branches add from pool threads
+
+    def add(self, ticker: str, node: str, output: Any) -> None:
+        with self._lock:
+            self._rows[(ticker, node)] = _jsonable(output)
+
+    def flush(self) -> int:
+        """Upsert the collected outputs; a failed write only costs resumability."""
+        with self._lock:
+            rows, self._rows = self._rows, {}
+        if not rows:
+            return 0
+        try:
+            GraphCheckpoint.objects.bulk_create(
+                [
+                    GraphCheckpoint(
+                        run_id=self.run_id,
+                        portfolio_id=self.portfolio_id,
+                        ticker=ticker,
+                        node=node,
+                        output=output,
+                    )
+                    for (ticker, node), output in rows.items()
+                ],
+                update_conflicts=True,
+                update_fields=["output", "modified"],
+                unique_fields=["run_id", "portfolio_id", "ticker", "node"],
+            )
+        except DatabaseError as exc:
+            logger.warning(
+                "Checkpoints of %s/%s not written: %s",
+                self.run_id,
+                self.portfolio_id,
+                exc,
+            )
+            return 0
+        return len(rows)
+
+
+def reusable(state: Dict[str, Any], update: Dict[str, Any]) -> bool:
+    """False for outputs a resumed run should recompute rather than reuse."""
+    if state.get("degraded") or update.get("degraded"):
+        return False
+    advice = update.get("advice") or {}
+    return advice.get("rationale") != FALLBACK_RATIONALE
+
+
+def notified(run_id: str, portfolio_id: int) -> bool:
+    return bool(load(run_id, portfolio_id, NOTIFY_NODE, [""]))
+
+
+def mark_notified(run_id: str, portfolio_id: int) -> None:
+    save(run_id, portfolio_id, "", NOTIFY_NODE, {"sent": True})
+
+
+def _stored(state: Dict[str, Any], node: str) -> Any | None:
+    """*node*'s output for this ticker from the runner's preloaded checkpoints."""
+    resumed = state.get("resumed")
+    if resumed is not None:
+        return resumed.get(node)
+    done = load(state["run_id"], _portfolio_id(state), node, [state["ticker"]])
+    return done.get(state["ticker"])
+
+
+def _record(state: Dict[str, Any], node: str, update: Dict[str, Any]) -> None:
+    if not reusable(state, update):
+        return
+    if (batch := state.get("checkpoint_batch")) is not None:
+        batch.add(state["ticker"], node, update)
+    else:
+        save(state["run_id"], _portfolio_id(state), state["ticker"], node, update)
+
+
+def checkpointed(node: str, fn: Callable) -> Callable:
+    """Skip *node* when this run already completed it for the ticker."""
+    if inspect.iscoroutinefunction(fn):
+
+        async def awrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+            if not state.get("run_id"):
+                return await fn(state)
+
+            # without the runner's preload / batch these touch the DB
+            direct = state.get("checkpoint_batch") is None
+            if direct:
+                done = await db_thread(_stored)(state, node)
+            else:
+                done = _stored(state, node)
+            if done is not None:
+                logger.debug("Resuming %s: %s already done", state["ticker"], node)
+                return done
+
+            update = await fn(state)
+            if direct:
+                await db_thread(_record)(state, node, update)
+            else:
+                _record(state, node, update)
+            return update
+
+        awrapper.__name__ = f"{node}_checkpointed"
+        return awrapper
+
+    def wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+        if not state.get("run_id"):
+            return fn(state)
+
+        if (done := _stored(state, node)) is not None:
+            logger.debug("Resuming %s: %s already done", state["ticker"], node)
+            return done
+
+        update = fn(state)
+        _record(state, node, update)
+        return update
+
+    wrapper.__name__ = f"{node}_checkpointed"
+    return wrapper
+
+
+def purge(ttl_days: int = TTL_DAYS) -> int:
+    cutoff = timezone.now() - dt.timedelta(days=ttl_days)
+    deleted, _ = GraphCheckpoint.objects.filter(created__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,185 @@
+"""
+article_bodies – background extraction of news article bodies
+
+News articles are stored as soon as their headlines arrive; the publisher
+pages are fetched later by the ``backfill_article_bodies`` task, never on
+the advice graph's critical path.
+
+Pages are downloaded concurrently over one pooled ``httpx.AsyncClient``,
+with at most ``ARTICLE_FETCH_PER_DOMAIN`` requests in flight per publisher
+and ``ARTICLE_FETCH_DELAY_S`` between two requests to the same one.  Goose
+parses the downloaded HTML in worker threads.  Every result (including
+failures, for a shorter time) is cached by URL hash, so a URL is extracted
+at most once across tickers and days.
+
+Public functions:
+    url_hash(url)             -> str
+    cached_body(url)          -> str | None   ("" = known unextractable)
+    extract_bodies(urls)      -> {url: body}  (coroutine)
+    backfill_bodies(urls=None, limit=...) -> int rows updated
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from trade_smart.models.news_article import NewsArticle
+from trade_smart.utils.tools import _cache_get, _cache_set
+
+logger = logging.getLogger(__name__)
+
+TOTAL_CONCURRENCY: int = getattr(settings, "ARTICLE_FETCH_CONCURRENCY", 16)
+PER_DOMAIN: int = getattr(settings, "ARTICLE_FETCH_PER_DOMAIN", 2)
+POLITENESS_DELAY: float = getattr(settings, "ARTICLE_FETCH_DELAY_S", 1.0)
+FETCH_TIMEOUT: float = getattr(settings, "ARTICLE_FETCH_TIMEOUT_S", 10)
+BODY_TTL: int = getattr(settings, "ARTICLE_BODY_TTL", 30 * 24 * 3600)
+FAILURE_TTL: int = getattr(settings, "ARTICLE_BODY_FAILURE_TTL", 24 * 3600)
+BACKFILL_LIMIT: int = getattr(settings, "ARTICLE_BACKFILL_LIMIT", 200)
+
+_HEADERS = {"User-Agent": "WiseTrade/0.1 (+https://github.com/yourrepo)"}
+_FAILED = "-"  # cache marker: an empty value would read back as a miss
+
+
+# --------------------------------------------------------------------------- #
+#   URL-hash cache
+# --------------------------------------------------------------------------- #
+def url_hash(url: str) -> str:
+    return NewsArticle.hash_url(url)
+
+
+def _key(url: str) -> str:
+    return f"article_body:{url_hash(url)}"
+
+
+def cached_body(url: str) -> str | None:
+    body = _cache_get(_key(url))
+    return "" if body == _FAILED else body
+
+
+def _remember(url: str, body: str) -> None:
+    if body:
+        _cache_set(_key(url), body, BODY_TTL)
+    else:
+        _cache_set(_key(url), _FAILED, FAILURE_TTL)
+
+
+# --------------------------------------------------------------------------- #
+#   Concurrent extraction
+# --------------------------------------------------------------------------- #
+def _parse(html: str) -> str:
+    from goose3 import Goose
+
+    with Goose() as g:
+        return g.extract(raw_html=html).cleaned_text or ""
+
+
+class _DomainGate:
+    """Per-domain concurrency cap plus a minimum gap between requests."""
+
+    def __init__(self, per_domain: int, delay: float):
+        self.delay = delay
+        self._slots = defaultdict(lambda: asyncio.Semaphore(per_domain))
+        self._locks = defaultdict(asyncio.Lock)
+        self._last: Dict[str, float] = {}
+
+    def slot(self, domain: str) -> asyncio.Semaphore:
+        return self._slots[domain]
+
+    async def wait_turn(self, domain: str) -> None:
+        async with self._locks[domain]:
+            wait = self._last.get(domain, 0.0) + self.delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last[domain] = time.monotonic()
+
+
+async def _extract_one(client, gate: _DomainGate, limit, url: str) -> str:
+    domain = urlsplit(url).netloc.lower()
+    async with limit, gate.slot(domain):
+        await gate.wait_turn(domain)
+        try:
+            resp = await client.get(url)
+            resp.raise_for_status()
+            html = resp.text
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("Could not fetch %s: %s", url, exc)
+            return ""
+    try:
+        return await asyncio.to_thread(_parse, html)
+    except Exception as exc:  # noqa: BLE001
+        logger.debug("Could not extract article body from %s: %s", url, exc)
+        return ""
+
+
+async def extract_bodies(
+    urls: Iterable[str],
+    *,
+    concurrency: int = TOTAL_CONCURRENCY,
+    per_domain: int = PER_DOMAIN,
+    delay: float = POLITENESS_DELAY,
+) -> Dict[str, str]:
+    """Fetch and extract *urls* (cache first); failures map to ""."""
+    import httpx
+
+    bodies: Dict[str, str] = {}
+    todo: List[str] = []
+    for url in dict.fromkeys(urls):
+        if (body := cached_body(url)) is not None:
+            bodies[url] = body
+        else:
+            todo.append(url)
+    if not todo:
+        return bodies
+
+    gate = _DomainGate(per_domain, delay)
+    limit = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(
+        headers=_HEADERS,
+        timeout=FETCH_TIMEOUT,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as client:
+        results = await asyncio.gather(
+            *(_extract_one(client, gate, limit, url) for url in todo)
+        )
+    for url, body in zip(todo, results):
+        _remember(url, body)
+        bodies[url] = body
+    logger.info(
+        "Extracted %d/%d article bodies", sum(1 for b in results if b), len(todo)
+    )
+    return bodies
+
+
+# --------------------------------------------------------------------------- #
+#   Back-fill
+# --------------------------------------------------------------------------- #
+def backfill_bodies(urls: Iterable[str] | None = None, limit: int = BACKFILL_LIMIT):
+    """
+    Fill ``body`` for stored articles not attempted yet (optionally only
+    *urls*), newest first.  Articles sharing a URL share one extraction;
+    unextractable ones get an empty body so they are not picked up again.
+    """
+    qs = NewsArticle.objects.filter(body__isnull=True)
+    if urls is not None:
+        qs = qs.filter(url__in=list(urls))
+    pending = list(qs.order_by("-published_at").values_list("url", flat=True)[:limit])
+    if not pending:
+        return 0
+
+    bodies = asyncio.run(extract_bodies(pending))
+    updated = 0
+    for url, body in bodies.items():
+        # re-embed with the body (see news_index)
+        rows = NewsArticle.objects.filter(url=url, body__isnull=True).update(
+            body=body, **({"indexed_at": None} if body else {})
+        )
+        updated += rows if body else 0
+    return updated
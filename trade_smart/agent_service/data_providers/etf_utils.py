@@ -1,25 +1,39 @@
 # trade_smart/agent_service/etf_utils.py
 from __future__ import annotations
-import logging, datetime as dt
-from typing import List, Tuple
+import json, logging, datetime as dt
+from typing import Iterable, List, Tuple
 
-import yfinance as yf  # >=0.2.65
-import pandas as pd  # yfinance dep
 import requests  # only for the FMP fall-back
+from django.conf import settings
+from django.utils import timezone
+
+from trade_smart.models.etf_constituents import EtfConstituents
+from trade_smart.services import deadline
+from trade_smart.utils.tools import _cache_get, _cache_set, rds
 
 log = logging.getLogger(__name__)
 
-CACHE_TTL = dt.timedelta(hours=12)
-_cache: dict[str, tuple[dt.datetime, list[Tuple[str, float]]]] = {}
+# holdings older than this are served stale and refreshed in the background
+CACHE_TTL = dt.timedelta(seconds=getattr(settings, "ETF_CONSTITUENTS_TTL_S", 12 * 3600))
+# "not an ETF" answers are re-checked far less often
+NEGATIVE_TTL = dt.timedelta(
+    seconds=getattr(settings, "ETF_NEGATIVE_TTL_S", 7 * 24 * 3600)
+)
+# a symbol whose first lookup failed (network, rate limit) is retried after this
+FAILURE_TTL: int = getattr(settings, "ETF_FAILURE_TTL_S", 15 * 60)
+MAX_HOLDINGS = 10  # fetched and cached once; callers take a slice
+_REDIS_TTL = 30 * 24 * 3600  # the table is the durable copy
+_REFRESH_LOCK_TTL = 300
 
 FMP_KEY = ""  # set in env if you want the fallback
 
 # ------------------------------------------------------------------ helpers
 
 
-def _yfinance(sym: str, top_n: int = 10) -> list[tuple[str, float]]:
+def _yfinance(sym: str, top_n: int = 10) -> list[tuple[str, float]] | None:
     """
-    Return list[(ticker, weight 0-1)] using yfinance 0.2.65.
+    Return list[(ticker, weight 0-1)] using yfinance 0.2.65, or None when
+    the request itself failed (nothing is known about *sym*).
 
     Handles two observed table shapes:
 
@@ -44,7 +58,7 @@ def _yfinance(sym: str, top_n: int = 10) -> list[tuple[str, float]]:
         df: pd.DataFrame = funds.top_holdings
     except Exception as exc:
         log.debug("yfinance holdings failed for %s: %s", sym, exc)
-        return []
+        return None
 
     if df.empty:
         return []
@@ -104,33 +118,170 @@ def _yfinance(sym: str, top_n: int = 10) -> list[tuple[str, float]]:
     return [(t, w / total) for t, w in rows]
 
 
-def _fmp(sym: str, top_n: int = 10) -> list[Tuple[str, float]]:
+def _fmp(sym: str, top_n: int = 10) -> list[Tuple[str, float]] | None:
+    """Holdings from FMP; None without a key or when the request failed."""
     if not FMP_KEY:
-        return []
+        return None
     url = (
         f"https://financialmodelingprep.com/api/v3/etf-holdings/{sym}"
         f"?apikey={FMP_KEY}"
     )
     try:
-        js = requests.get(url, timeout=8).json()
+        js = requests.get(url, timeout=deadline.timeout(8)).json()
         rows = [(r["asset"], float(r["weight"]) / 100.0) for r in js[:top_n]]
         tot = sum(w for _, w in rows) or 1.0
         return [(t, w / tot) for t, w in rows]
     except Exception as exc:
         log.debug("FMP holdings err: %s", exc)
-        return []
+        return None
+
+
+# ------------------------------------------------------------------ cache
+def _key(sym: str) -> str:
+    return f"etf_constituents:{sym}"
+
+
+def _normalise(rows: List[Tuple[str, float]]) -> list[tuple[str, float]]:
+    total = sum(w for _, w in rows) or 1.0
+    return [(t, w / total) for t, w in rows]
+
+
+def _load(sym: str) -> tuple[dt.datetime, list[tuple[str, float]]] | None:
+    """(fetched_at, holdings) from Redis, else from the table (re-warming Redis)."""
+    if raw := _cache_get(_key(sym)):
+        js = json.loads(raw)
+        fetched_at = dt.datetime.fromtimestamp(js["t"], dt.timezone.utc)
+        return fetched_at, [tuple(h) for h in js["h"]]
+    row = (
+        EtfConstituents.objects.filter(symbol=sym)
+        .values_list("fetched_at", "holdings")
+        .first()
+    )
+    if row is None:
+        return None
+    fetched_at, holdings = row
+    _cache_set(
+        _key(sym),
+        json.dumps({"t": fetched_at.timestamp(), "h": holdings}),
+        _REDIS_TTL,
+    )
+    return fetched_at, [tuple(h) for h in holdings]
+
+
+def _store(sym: str, holdings: list[tuple[str, float]]) -> None:
+    now = timezone.now()
+    EtfConstituents.objects.update_or_create(
+        symbol=sym,
+        defaults={
+            "holdings": [list(h) for h in holdings],
+            "is_etf": bool(holdings),
+            "fetched_at": now,
+        },
+    )
+    _cache_set(
+        _key(sym),
+        json.dumps({"t": now.timestamp(), "h": [list(h) for h in holdings]}),
+        _REDIS_TTL,
+    )
+
+
+def _is_stale(fetched_at: dt.datetime, etf: bool) -> bool:
+    return timezone.now() - fetched_at > (CACHE_TTL if etf else NEGATIVE_TTL)
+
+
+def _schedule_refresh(sym: str) -> None:
+    # one background refresh per symbol at a time, whoever sees it stale first
+    if rds is not None:
+        try:
+            if not rds.set(f"{_key(sym)}:refreshing", 1, nx=True, ex=_REFRESH_LOCK_TTL):
+                return
+        except Exception:  # noqa: BLE001
+            pass
+    try:
+        from trade_smart.tasks import refresh_etf_constituents
+
+        refresh_etf_constituents.delay([sym])
+    except Exception as exc:  # noqa: BLE001 – stale data is still served
+        log.warning("Could not schedule holdings refresh for %s: %s", sym, exc)
+
+
+def _fetch(sym: str) -> list[tuple[str, float]] | None:
+    """
+    Holdings from the first source that has them; [] when a source answered
+    without any (not an ETF), None when every source failed.
+    """
+    answered = False
+    for source in (_yfinance, _fmp):
+        holdings = source(sym, MAX_HOLDINGS)
+        if holdings:
+            return holdings
+        answered |= holdings is not None
+    return [] if answered else None
+
+
+def refresh(symbols: Iterable[str]) -> int:
+    """
+    Re-fetch and store *symbols*; returns how many are ETFs.  A failed fetch
+    leaves the stored row as it was.
+    """
+    etfs = 0
+    for symbol in dict.fromkeys(s.upper() for s in symbols):
+        holdings = _fetch(symbol)
+        if holdings is None:
+            log.warning("Holdings fetch failed for %s, keeping stored entry", symbol)
+            continue
+        _store(symbol, holdings)
+        etfs += bool(holdings)
+    return etfs
+
+
+def due_for_refresh(tracked: Iterable[str]) -> list[str]:
+    """*tracked* symbols never looked up, plus stored ones past their TTL."""
+    due = {
+        sym
+        for sym, etf, fetched_at in EtfConstituents.objects.values_list(
+            "symbol", "is_etf", "fetched_at"
+        )
+        if _is_stale(fetched_at, etf)
+    }
+    tracked = {s.upper() for s in tracked}
+    known = set(
+        EtfConstituents.objects.filter(symbol__in=tracked).values_list(
+            "symbol", flat=True
+        )
+    )
+    return sorted(due | (tracked - known))
 
 
 # ------------------------------------------------------------------ public
 def get_etf_constituents(symbol: str, top_n: int = 10) -> list[tuple[str, float]]:
     """
+    Top *top_n* holdings (weights re-normalised to 1.0), [] for non-ETFs.
+
+    Served from Redis / the EtfConstituents table; a stale entry is still
+    returned while a background task refreshes it.  Only a symbol never
+    seen before is fetched inline:
     1) yfinance (free, no key, new endpoint)
     2) Financial-Modeling-Prep (free tier but needs API key)
     3) return []  -> treat as 'probably not an ETF'
+    When both fetches fail nothing is stored: [] is returned and the symbol
+    is not fetched inline again for ``FAILURE_TTL`` seconds.
     """
-    res = _yfinance(symbol, top_n) or _fmp(symbol, top_n) or []
-    _cache[symbol] = (dt.datetime.now(dt.timezone.utc), res)
-    return res
+    sym = symbol.upper()
+    cached = _load(sym)
+    if cached is None:
+        if _cache_get(f"{_key(sym)}:failed"):
+            return []
+        holdings = _fetch(sym)
+        if holdings is None:
+            _cache_set(f"{_key(sym)}:failed", "1", FAILURE_TTL)
+            return []
+        _store(sym, holdings)
+    else:
+        fetched_at, holdings = cached
+        if _is_stale(fetched_at, bool(holdings)):
+            _schedule_refresh(sym)
+    return _normalise(holdings[:top_n])
 
 
 def is_etf(symbol: str) -> bool:
@@ -0,0 +1,102 @@
+"""
+headline_cache – per-headline sentiment scores shared across tickers and days
+
+The same story is carried by several tickers (ETF holdings, sector news)
+and shows up again in the next days' searches.  Each headline is scored by
+the LLM once and stored under the hash of its normalised text
+(``HeadlineSentiment.hash_text``); a ticker's sentiment is aggregated from
+the scores of its headlines.  Scores expire after
+``HEADLINE_SENTIMENT_TTL_DAYS``; ``purge`` deletes expired rows and caps
+the table at ``HEADLINE_SENTIMENT_MAX_ROWS``, least recently scored first.
+
+Public functions:
+    lookup(hashes)          -> {hash: {summary, score}}  (unexpired only)
+    store(texts, results)   -> None
+    aggregate(results, counts) -> {summary, score}
+    purge()                 -> int rows deleted
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from django.conf import settings
+from django.utils import timezone
+
+from trade_smart.models.headline_sentiment import HeadlineSentiment
+
+logger = logging.getLogger(__name__)
+
+TTL_DAYS: int = getattr(settings, "HEADLINE_SENTIMENT_TTL_DAYS", 7)
+MAX_ROWS: int = getattr(settings, "HEADLINE_SENTIMENT_MAX_ROWS", 200_000)
+# weight of the n-th newest headline in a ticker's score is DECAY ** n
+RECENCY_DECAY: float = getattr(settings, "HEADLINE_RECENCY_DECAY", 0.85)
+SUMMARY_HEADLINES = 3
+
+
+def lookup(hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    hashes = list(dict.fromkeys(hashes))
+    if not hashes:
+        return {}
+    rows = HeadlineSentiment.objects.filter(
+        text_hash__in=hashes,
+        modified__gte=timezone.now() - dt.timedelta(days=TTL_DAYS),
+    ).values_list("text_hash", "summary", "score")
+    return {
+        h: {"summary": summary, "score": float(score)} for h, summary, score in rows
+    }
+
+
+def store(texts: Dict[str, str], results: Dict[str, Dict[str, Any]]) -> None:
+    """Upsert *results* ({hash: {summary, score}}) with their headline *texts*."""
+    if not results:
+        return
+    HeadlineSentiment.objects.bulk_create(
+        [
+            HeadlineSentiment(
+                text_hash=h,
+                headline=texts[h],
+                score=Decimal(str(result["score"])),
+                summary=result["summary"][:200],
+            )
+            for h, result in results.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["text_hash"],
+        update_fields=["headline", "score", "summary", "modified"],
+    )
+
+
+def aggregate(
+    results: List[Dict[str, Any]], counts: List[int] | None = None
+) -> Dict[str, Any]:
+    """
+    Weighted score of *results* (newest first) and a short summary.  Each
+    headline weighs ``RECENCY_DECAY ** rank`` times its *counts* entry, the
+    number of near-duplicate headlines it stands for.
+    """
+    counts = counts or [1] * len(results)
+    weights = [RECENCY_DECAY**i * n for i, n in enumerate(counts)]
+    score = sum(w * r["score"] for w, r in zip(weights, results)) / sum(weights)
+    strongest = sorted(
+        zip(weights, results), key=lambda p: p[0] * abs(p[1]["score"]), reverse=True
+    )
+    summary = "; ".join(
+        r["summary"] for _, r in strongest[:SUMMARY_HEADLINES] if r["summary"]
+    )
+    return {"summary": summary, "score": round(score, 3)}
+
+
+def purge(ttl_days: int = TTL_DAYS, max_rows: int = MAX_ROWS) -> int:
+    cutoff = timezone.now() - dt.timedelta(days=ttl_days)
+    deleted, _ = HeadlineSentiment.objects.filter(modified__lt=cutoff).delete()
+    overflow = HeadlineSentiment.objects.count() - max_rows
+    if overflow > 0:
+        oldest = HeadlineSentiment.objects.order_by("modified").values_list(
+            "id", flat=True
+        )[:overflow]
+        deleted += HeadlineSentiment.objects.filter(id__in=list(oldest)).delete()[0]
+    return deleted
@@ -0,0 +1,164 @@
+"""
+news_index – incremental Chroma index of stored news articles
+
+``index_pending`` embeds NewsArticle rows not indexed yet (headline plus
+the start of the body, on CPU via ``services.embeddings``) in batches and
+upserts them into a Chroma collection with ticker / date metadata, then
+stamps ``indexed_at``.  The collection lives in a Chroma server
+(``CHROMA_HOST`` / ``CHROMA_PORT``): every prefork worker process talks to
+it over HTTP, none opens the on-disk store itself.  Rows whose body is back-filled later
+are reset to unindexed and picked up again.
+
+``search`` is a filtered approximate-nearest-neighbour query (HNSW, cosine)
+restricted to one ticker and a recent window, so its cost does not grow
+with the table.  ``recent_headlines`` is what the news node uses instead of
+re-fetching every source on each run.
+
+Public functions:
+    index_pending(batch=..., limit=...) -> int articles indexed
+    search(ticker, query, k=..., days=...) -> [headline dict]
+    recent_headlines(ticker) -> [headline dict] | None (None = fetch)
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import threading
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from trade_smart.models.news_article import NewsArticle
+from trade_smart.services import embeddings
+
+logger = logging.getLogger(__name__)
+
+CHROMA_HOST: str = getattr(settings, "CHROMA_HOST", "chroma")
+CHROMA_PORT: int = getattr(settings, "CHROMA_PORT", 8000)
+COLLECTION = "news_articles"
+INDEX_BATCH: int = getattr(settings, "NEWS_INDEX_BATCH", 256)
+INDEX_LIMIT: int = getattr(settings, "NEWS_INDEX_LIMIT", 5000)
+BODY_CHARS = 1000  # the model truncates long inputs anyway
+TOP_K: int = getattr(settings, "NEWS_RETRIEVAL_K", 10)
+RECENT_DAYS: int = getattr(settings, "NEWS_RETRIEVAL_DAYS", 14)
+# stored news younger than this is used instead of querying the sources
+REFRESH_HOURS: float = getattr(settings, "NEWS_REFRESH_HOURS", 6)
+MIN_HITS: int = getattr(settings, "NEWS_RETRIEVAL_MIN_HITS", 3)
+QUERY = "{ticker} stock news: earnings, guidance, analyst ratings, outlook"
+
+_collection = None
+_lock = threading.Lock()
+
+
+def _get_collection():
+    global _collection
+    with _lock:
+        if _collection is None:
+            import chromadb
+
+            client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+            _collection = client.get_or_create_collection(
+                COLLECTION, metadata={"hnsw:space": "cosine"}
+            )
+    return _collection
+
+
+def _document(article: NewsArticle) -> str:
+    body = (article.body or "")[:BODY_CHARS]
+    return f"{article.headline}\n\n{body}".strip()
+
+
+# --------------------------------------------------------------------------- #
+#   Indexing
+# --------------------------------------------------------------------------- #
+def index_pending(batch: int = INDEX_BATCH, limit: int = INDEX_LIMIT) -> int:
+    """Embed and upsert up to *limit* unindexed articles, oldest first."""
+    collection = _get_collection()
+    indexed = 0
+    while indexed < limit:
+        articles = list(
+            NewsArticle.objects.filter(indexed_at__isnull=True)
+            .order_by("id")
+            .only("id", "ticker", "headline", "body", "source", "url", "published_at")[
+                : min(batch, limit - indexed)
+            ]
+        )
+        if not articles:
+            break
+        vectors = embeddings.encode([_document(a) for a in articles], cache=False)
+        if vectors is None:
+            logger.warning("No embedding model, news index not updated")
+            break
+        collection.upsert(
+            ids=[str(a.id) for a in articles],
+            embeddings=vectors.tolist(),
+            documents=[a.headline for a in articles],
+            metadatas=[
+                {
+                    "ticker": a.ticker,
+                    "published_ts": int(a.published_at.timestamp()),
+                    "source": a.source,
+                    "url": a.url,
+                }
+                for a in articles
+            ],
+        )
+        NewsArticle.objects.filter(id__in=[a.id for a in articles]).update(
+            indexed_at=timezone.now()
+        )
+        indexed += len(articles)
+    return indexed
+
+
+# --------------------------------------------------------------------------- #
+#   Retrieval
+# --------------------------------------------------------------------------- #
+def search(
+    ticker: str, query: str, *, k: int = TOP_K, days: int = RECENT_DAYS
+) -> List[Dict[str, Any]]:
+    """The *k* stored articles of *ticker* closest to *query*, newest first."""
+    vectors = embeddings.encode([query])
+    if vectors is None:
+        return []
+    since = int((timezone.now() - dt.timedelta(days=days)).timestamp())
+    res = _get_collection().query(
+        query_embeddings=vectors.tolist(),
+        n_results=k,
+        where={"$and": [{"ticker": ticker}, {"published_ts": {"$gte": since}}]},
+        include=["documents", "metadatas", "distances"],
+    )
+    hits = [
+        {
+            "headline": doc,
+            "body": None,
+            "url": meta.get("url", ""),
+            "source": meta.get("source", ""),
+            "published_ts": meta.get("published_ts", 0),
+            "relevance": round(1.0 - dist, 3),
+        }
+        for doc, meta, dist in zip(
+            res["documents"][0], res["metadatas"][0], res["distances"][0]
+        )
+    ]
+    return sorted(hits, key=lambda h: h["published_ts"], reverse=True)
+
+
+def recent_headlines(ticker: str) -> List[Dict[str, Any]] | None:
+    """
+    Retrieved headlines when *ticker*'s news was stored within
+    ``NEWS_REFRESH_HOURS``; None when the sources should be queried again.
+    """
+    newest = NewsArticle.objects.filter(
+        ticker=ticker, indexed_at__isnull=False
+    ).aggregate(newest=Max("created"))["newest"]
+    if newest is None or timezone.now() - newest > dt.timedelta(hours=REFRESH_HOURS):
+        return None
+    try:
+        hits = search(ticker, QUERY.format(ticker=ticker))
+    except Exception as exc:  # noqa: BLE001 – fall back to the sources
+        logger.warning("News retrieval failed for %s: %s", ticker, exc)
+        return None
+    return hits if len(hits) >= MIN_HITS else None
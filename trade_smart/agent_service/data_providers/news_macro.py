@@ -3,30 +3,52 @@ from __future__ import annotations
 import re
 import json
 import logging
+import contextvars
 import datetime as dt
-from typing import List, Dict, Any
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures import as_completed
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable, List, Dict, Any, Set, Tuple
 from decimal import Decimal
 
 import requests
-from ddgs import DDGS
-from goose3 import Goose
+from django.db import DatabaseError, connections, transaction
 
 import settings
+from trade_smart.agent_service.data_providers import (
+    headline_cache,
+    seen_urls,
+    symbols,
+)
+from trade_smart.agent_service.data_providers.article_bodies import cached_body
 from trade_smart.agent_service.data_providers.etf_utils import (
     get_etf_constituents,
     is_etf,
 )
+from trade_smart.models.headline_sentiment import HeadlineSentiment
 from trade_smart.models.news_article import NewsArticle
 from trade_smart.models.llm_sentiment import LLMSentiment
+from trade_smart.services import deadline, embeddings, prompt_encoder
 from trade_smart.services.llm import get_llm
 
-try:
-    import feedparser
-except ImportError:
-    feedparser = None
-
 logger = logging.getLogger(__name__)
 ALPHAV_KEY = settings.ALPHAVANTAGE_KEY
+# below this much remaining run budget, optional work is skipped
+SOURCE_MIN_BUDGET: float = getattr(settings, "NEWS_SOURCE_MIN_BUDGET_S", 10)
+SENTIMENT_MIN_BUDGET: float = getattr(settings, "SENTIMENT_MIN_BUDGET_S", 10)
+# prompt-token budget for one batched sentiment request
+SENTIMENT_TOKEN_BUDGET: int = getattr(settings, "SENTIMENT_BATCH_TOKEN_BUDGET", 4000)
+# per ticker: lower-ranked headlines beyond this many tokens are not scored
+HEADLINES_TOKEN_BUDGET: int = getattr(settings, "SENTIMENT_HEADLINES_TOKEN_BUDGET", 800)
+# headlines at least this similar (cosine) count as one story
+DEDUPE_COSINE: float = getattr(settings, "NEWS_DEDUPE_COSINE", 0.88)
+# ETF sentiment: top holdings used, threads per ETF, "weight" or "equal"
+ETF_HOLDINGS: int = getattr(settings, "ETF_SENTIMENT_HOLDINGS", 5)
+HOLDING_WORKERS: int = getattr(settings, "ETF_HOLDING_WORKERS", 5)
+ETF_WEIGHTING: str = getattr(settings, "ETF_SENTIMENT_WEIGHTING", "weight")
 _llm = None  # lazy-load to avoid circular import
 
 
@@ -45,8 +67,43 @@ def _get_llm():
     return _llm
 
 
+def _resolve_holding(identifier: str) -> str:
+    """Ticker for a holding reported by name (e.g. 'Nvidia Corp')."""
+    # Heuristic: if it contains a space, it's likely a name
+    if " " not in identifier:
+        return identifier
+    try:
+        return symbols.resolve(identifier, translate_holding_to_ticker)
+    except Exception as e:
+        logger.warning(
+            f"Could not translate '{identifier}' to ticker, using original: {e}"
+        )
+        return identifier
+
+
+def _resolve_holdings(
+    holdings: List[Tuple[str, float]],
+) -> List[Tuple[str, float]]:
+    return [(_resolve_holding(h), weight) for h, weight in holdings]
+
+
+def _holding_news(identifier: str) -> Tuple[str, List[Dict[str, str]], List[Dict]]:
+    try:
+        ticker = _resolve_holding(identifier)
+        headlines, raw_news = gather_recent_headlines(ticker)
+        return ticker, headlines, raw_news
+    finally:
+        connections.close_all()  # pool threads are short-lived
+
+
 def _etf_sentiment(ticker: str) -> Dict[str, Any]:
-    holdings = get_etf_constituents(ticker, top_n=5)
+    """
+    Sentiment of an ETF as the holding-weighted (``ETF_SENTIMENT_WEIGHTING``)
+    sentiment of its top holdings.  Name resolution and headline gathering
+    run per holding on a bounded pool; the holdings are classified in one
+    batch and their articles stored with one bulk write.
+    """
+    holdings = get_etf_constituents(ticker, top_n=ETF_HOLDINGS)
     if not holdings:
         headlines, raw_news = gather_recent_headlines(ticker)
         sentiment_results = classify_sentiment([(ticker, headlines)])
@@ -58,69 +115,52 @@ def _etf_sentiment(ticker: str) -> Dict[str, Any]:
         _save_news_articles(ticker, raw_news, sentiment_result["score"])
         return sentiment_result
 
-    total_score = Decimal(0)
-    num_scores = 0
-    all_summaries = []
-
-    translated_holdings = []
-    for holding_identifier, weight in holdings:
-        # Heuristic: if it contains a space, it's likely a name
-        if " " in holding_identifier:
+    gathered: Dict[str, Tuple[float, List[Dict[str, str]], List[Dict]]] = {}
+    with ThreadPoolExecutor(
+        max_workers=min(HOLDING_WORKERS, len(holdings)),
+        thread_name_prefix="etf-holding",
+    ) as pool:
+        futures = {
+            # each holding thread sees the caller's deadline / tracing span
+            pool.submit(contextvars.copy_context().run, _holding_news, name): weight
+            for name, weight in holdings
+        }
+        for future in as_completed(futures):
             try:
-                ticker_from_name = translate_holding_to_ticker(holding_identifier)
-                translated_holdings.append((ticker_from_name, weight))
-                logger.info(
-                    f"Translated '{holding_identifier}' to '{ticker_from_name}'"
-                )
-            except Exception as e:
-                logger.warning(
-                    f"Could not translate '{holding_identifier}' to ticker, using original: {e}"
-                )
-                translated_holdings.append((holding_identifier, weight))
-        else:
-            translated_holdings.append((holding_identifier, weight))
-    holdings = translated_holdings
-
-    news_items_for_batch = []
-    raw_news_data_map = {}
-
-    for holding_ticker, _ in holdings:
-        try:
-            headlines, raw_news = gather_recent_headlines(holding_ticker)
-            news_items_for_batch.append((holding_ticker, headlines))
-            raw_news_data_map[holding_ticker] = raw_news
-        except Exception as exc:
-            logger.warning(f"Error gathering headlines for {holding_ticker}: {exc}")
-
-    batched_sentiment_results = classify_sentiment(news_items_for_batch)
-
-    for sentiment_result in batched_sentiment_results:
-        holding_ticker = sentiment_result["ticker"]
-        score = Decimal(str(sentiment_result.get("score", 0.0)))
-        summary = sentiment_result.get("summary", "")
-
-        total_score += score
-        num_scores += 1
-        if summary:
-            all_summaries.append(f"{holding_ticker}: {summary}")
+                holding_ticker, headlines, raw_news = future.result()
+            except Exception as exc:
+                logger.warning(f"Error gathering headlines for {ticker} holding: {exc}")
+                continue
+            # two names can resolve to one ticker (share classes)
+            weight = futures[future] + gathered.get(holding_ticker, (0.0,))[0]
+            gathered[holding_ticker] = (weight, headlines, raw_news)
 
-        _save_news_articles(
-            holding_ticker, raw_news_data_map.get(holding_ticker, []), score
-        )
-
-    if num_scores > 0:
-        avg_score = total_score / num_scores
-        overall_summary = (
-            f"Aggregated sentiment for {ticker} constituents: "
-            + "; ".join(all_summaries)
-        )
-        return {"summary": overall_summary, "score": float(avg_score)}
-    else:
+    results = classify_sentiment([(t, g[1]) for t, g in gathered.items()])
+    _save_news_batch(
+        [(r["ticker"], gathered[r["ticker"]][2], r["score"]) for r in results]
+    )
+    if not results:
         return {
             "summary": f"Could not determine sentiment for {ticker} constituents.",
             "score": 0.0,
         }
 
+    if ETF_WEIGHTING == "equal":
+        weights = [1.0] * len(results)
+    else:
+        weights = [gathered[r["ticker"]][0] for r in results]
+    total = sum(weights) or 1.0
+    score = sum(w * float(r["score"]) for w, r in zip(weights, results)) / total
+    summaries = [
+        f"{r['ticker']} ({w / total:.0%}): {r['summary']}"
+        for w, r in sorted(zip(weights, results), key=lambda p: -p[0])
+        if r.get("summary")
+    ]
+    overall_summary = f"Aggregated sentiment for {ticker} constituents: " + "; ".join(
+        summaries
+    )
+    return {"summary": overall_summary, "score": score}
+
 
 # --------------------------------------------------------------------------- #
 #   NEWS FETCHERS  (AV → Yahoo → DDG)
@@ -139,21 +179,25 @@ def _alpha_vantage_news(
         f"&time_from={time_from}&limit={limit}&apikey={ALPHAV_KEY}"
     )
     try:
-        return requests.get(url, timeout=8).json().get("feed", [])
+        return requests.get(url, timeout=deadline.timeout(8)).json().get("feed", [])
     except Exception as exc:
         logger.debug("AV news error: %s", exc)
         return []
 
 
 def _yahoo_rss_news(ticker: str, limit: int = 25) -> List[Dict]:
-    if feedparser is None:  # pragma: no cover
+    try:
+        import feedparser
+    except ImportError:  # pragma: no cover
         raise RuntimeError("pip install feedparser")
     url = (
         "https://feeds.finance.yahoo.com/rss/2.0/headline"
         f"?s={ticker}&region=US&lang=en-US"
     )
     try:
-        feed = feedparser.parse(url)
+        # fetched here so the run deadline bounds it (feedparser has no timeout)
+        resp = requests.get(url, timeout=deadline.timeout(8))
+        feed = feedparser.parse(resp.content)
         return [{"title": e.title, "link": e.link} for e in feed.entries[:limit]]
     except Exception as exc:
         logger.debug("Yahoo RSS error: %s", exc)
@@ -163,7 +207,9 @@ def _yahoo_rss_news(ticker: str, limit: int = 25) -> List[Dict]:
 def _duckduckgo_news(ticker: str, lookback_h: int = 24, k: int = 15) -> List[Dict]:
     q = f"{ticker} stock news business after:{lookback_h}h"
     try:
-        with DDGS() as ddgs:
+        from ddgs import DDGS
+
+        with DDGS(timeout=deadline.timeout(5)) as ddgs:
             return list(ddgs.news(q, max_results=k))
     except Exception as exc:
         logger.debug("DDG news error: %s", exc)
@@ -185,12 +231,58 @@ def _yfinance_news(ticker: str, limit: int = 25) -> List[Dict]:
         return []
 
 
+def _item_url(item: Dict) -> str:
+    return (
+        item.get("url")
+        or item.get("content", {}).get("canonicalUrl", {}).get("url")
+        or item.get("link", "")
+    )
+
+
 def _save_news_articles(
     ticker: str,
     raw_news_data: List[Dict],
     sentiment_score: Decimal | str | float,
 ):
-    g = Goose()
+    _save_news_batch([(ticker, raw_news_data, sentiment_score)])
+
+
+def _save_news_batch(
+    batch: List[Tuple[str, List[Dict], Decimal | str | float | None]],
+) -> None:
+    """
+    Store (ticker, raw items, fallback sentiment) as NewsArticle rows right
+    away, with one seen-URL lookup, one duplicate query and one bulk insert
+    for the whole batch.  Bodies come from the item or the extraction
+    cache; missing ones are back-filled by the ``backfill_article_bodies``
+    task off the advice path.
+    """
+    # already stored → dropped before any parsing, cache lookup or fetch
+    known = seen_urls.seen(
+        NewsArticle.hash_url(url)
+        for _, raw_news_data, _ in batch
+        for url in map(_item_url, raw_news_data)
+        if url
+    )
+    articles_to_create = []
+    for ticker, raw_news_data, sentiment_score in batch:
+        articles_to_create.extend(
+            _news_articles(ticker, raw_news_data, sentiment_score, known)
+        )
+    _store_articles(articles_to_create)
+
+
+_URL_MAX = NewsArticle._meta.get_field("url").max_length
+_SOURCE_MAX = NewsArticle._meta.get_field("source").max_length
+
+
+def _news_articles(
+    ticker: str,
+    raw_news_data: List[Dict],
+    sentiment_score: Decimal | str | float | None,
+    known: Set[str],
+) -> List[NewsArticle]:
+    """Unsaved NewsArticle objects for the items whose URL is not in *known*."""
     articles_to_create = []
     for item in raw_news_data:
         # Adapt to different news formats
@@ -199,22 +291,21 @@ def _save_news_articles(
             or item.get("content", {}).get("title")
             or item.get("title_text", "")
         )
-        url = (
-            item.get("url")
-            or item.get("content", {}).get("canonicalUrl", {}).get("url")
-            or item.get("link", "")
-        )
+        url = _item_url(item)
         source = item.get("source") or item.get("content", {}).get("provider", {}).get(
             "displayName", ""
         )
+        if len(url) > _URL_MAX:
+            logger.debug(f"Skipping news item with over-long URL: {url[:80]}…")
+            continue
+        source = str(source)[:_SOURCE_MAX]
+        url_hash = NewsArticle.hash_url(url) if url else ""
+        if url_hash in known:
+            continue
         body = item.get("body") or item.get("content", {}).get("summary")
 
         if not body and url:
-            try:
-                article = g.extract(url=url)
-                body = article.cleaned_text
-            except Exception as e:
-                logger.warning(f"Could not extract article body from {url}: {e}")
+            body = cached_body(url)  # None until the back-fill has run
 
         published_at = None
         if "pubDate" in item.get("content", {}):
@@ -247,65 +338,481 @@ def _save_news_articles(
                     headline=title,
                     source=source,
                     url=url,
+                    url_hash=url_hash,
                     body=body,
                     published_at=published_at,
                     sentiment=sentiment,
                 )
             )
+    return articles_to_create
+
+
+def _store_articles(articles_to_create: List[NewsArticle]) -> None:
     if articles_to_create:
-        # Filter out duplicates based on URL and published_at before bulk_create
-        existing_articles = NewsArticle.objects.filter(
-            url__in=[a.url for a in articles_to_create],
-            published_at__in=[a.published_at for a in articles_to_create],
-        ).values_list("url", "published_at")
-        existing_articles_set = set(existing_articles)
+        # exact check on the (url_hash, published_at) index, also covering
+        # URLs the seen set missed (evicted / not rebuilt yet)
+        existing_articles_set = set(
+            NewsArticle.objects.filter(
+                url_hash__in={a.url_hash for a in articles_to_create}
+            ).values_list("url_hash", "published_at")
+        )
 
         unique_articles = []
         for article in articles_to_create:
-            if (article.url, article.published_at) not in existing_articles_set:
+            key = (article.url_hash, article.published_at)
+            if key not in existing_articles_set:
                 unique_articles.append(article)
-                existing_articles_set.add(
-                    (article.url, article.published_at)
-                )  # Add to set to handle duplicates within the current batch
+                existing_articles_set.add(key)  # duplicates within the batch
 
+        failed: Set[str] = set()
         if unique_articles:
-            NewsArticle.objects.bulk_create(unique_articles, ignore_conflicts=True)
-            logger.info(f"Saved {len(unique_articles)} news articles for {ticker}")
+            stored = _insert_articles(unique_articles)
+            failed = {a.url_hash for a in unique_articles} - {
+                a.url_hash for a in stored
+            }
+            if stored:
+                tickers = ", ".join(sorted({a.ticker for a in stored}))
+                logger.info(f"Saved {len(stored)} news articles for {tickers}")
+                _schedule_backfill([a.url for a in stored if a.body is None])
+        seen_urls.mark(
+            a.url_hash for a in articles_to_create if a.url_hash not in failed
+        )
+
+
+def _insert_articles(articles: List[NewsArticle]) -> List[NewsArticle]:
+    """
+    Bulk insert *articles*; if the batch is rejected (e.g. a value the
+    column does not take), retry ticker by ticker so a bad row only costs
+    its own ticker's batch.  Returns the articles stored.
+    """
+    try:
+        with transaction.atomic():
+            NewsArticle.objects.bulk_create(articles, ignore_conflicts=True)
+        return articles
+    except DatabaseError as exc:
+        logger.warning(f"Bulk news insert failed, retrying per ticker: {exc}")
+
+    by_ticker: Dict[str, List[NewsArticle]] = defaultdict(list)
+    for article in articles:
+        by_ticker[article.ticker].append(article)
+    stored = []
+    for ticker, chunk in by_ticker.items():
+        try:
+            with transaction.atomic():
+                NewsArticle.objects.bulk_create(chunk, ignore_conflicts=True)
+            stored.extend(chunk)
+        except DatabaseError as exc:
+            logger.error(f"Could not store news for {ticker}: {exc}")
+    return stored
+
+
+def _schedule_backfill(urls: List[str]) -> None:
+    if not urls:
+        return
+    from trade_smart.tasks import backfill_article_bodies
+
+    try:
+        backfill_article_bodies.delay(urls=urls)
+    except Exception as exc:  # noqa: BLE001 – the periodic sweep catches up
+        logger.warning("Could not schedule body back-fill: %s", exc)
 
 
 # --------------------------------------------------------------------------- #
-def gather_recent_headlines(ticker: str) -> tuple[List[Dict[str, str]], List[Dict]]:
+NEWS_SOURCES: Dict[str, Callable[[str], List[Dict]]] = {
+    "yfinance": _yfinance_news,
+    "alpha_vantage": _alpha_vantage_news,
+    "yahoo_rss": _yahoo_rss_news,
+    "duckduckgo": _duckduckgo_news,
+}
+ENABLED_SOURCES: List[str] = list(getattr(settings, "NEWS_SOURCES", NEWS_SOURCES))
+# "sequential" (old fallback chain), "first" (fastest non-empty source) or
+# "merge" (de-duplicated union of every source answering in time)
+GATHER_MODE: str = getattr(settings, "NEWS_GATHER_MODE", "sequential")
+GATHER_TIMEOUT: float = getattr(settings, "NEWS_GATHER_TIMEOUT_S", 12)
+
+
+@dataclass
+class SourceStats:
+    calls: int = 0
+    hits: int = 0
+    latency: float = 1.0  # EWMA, seconds
+
+    def record(self, elapsed: float, hit: bool) -> None:
+        self.calls += 1
+        self.hits += hit
+        self.latency += 0.2 * (elapsed - self.latency)
+
+    @property
+    def score(self) -> float:
+        # smoothed hit rate per second of latency
+        return (self.hits + 1) / (self.calls + 2) / max(self.latency, 0.05)
+
+
+_stats: Dict[str, SourceStats] = defaultdict(SourceStats)
+_stats_lock = threading.Lock()
+
+
+def source_stats() -> Dict[str, Dict[str, float]]:
+    with _stats_lock:
+        return {name: {**asdict(s), "score": s.score} for name, s in _stats.items()}
+
+
+def _ordered_sources() -> List[str]:
+    """Enabled sources, best hit-rate / latency first (ties keep config order)."""
+    enabled = [name for name in ENABLED_SOURCES if name in NEWS_SOURCES]
+    with _stats_lock:
+        return sorted(enabled, key=lambda name: -_stats[name].score)
+
+
+class _RateLimiter:
+    """Spaces calls to one provider at most *per_minute* per minute."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, max_wait: float) -> bool:
+        """Block until the next slot; False (no slot taken) if too far off."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            if start - now > max_wait:
+                return False
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+        return True
+
+
+_limiters: Dict[str, _RateLimiter] = {
+    name: _RateLimiter(per_minute)
+    for name, per_minute in getattr(
+        settings, "NEWS_SOURCE_RATE_PER_MIN", {"alpha_vantage": 5}
+    ).items()
+}
+RATE_MAX_WAIT: float = getattr(settings, "NEWS_RATE_MAX_WAIT_S", 60)
+
+
+def _rate_limited(name: str, *, wait: bool = True) -> bool:
     """
-    (1) yfinance  → (2) Alpha-Vantage  → (3) Yahoo-RSS  → (4) DuckDuckGo
-    Stop at first source that returns anything ≥1 headline.
+    Wait for a call slot of *name*; True when none is free in time.  With
+    ``wait=False`` only a slot free right now is taken.
     """
-    raw = (
-        _yfinance_news(ticker)
-        or _alpha_vantage_news(ticker)
-        or _yahoo_rss_news(ticker)
-        or _duckduckgo_news(ticker)
+    limiter = _limiters.get(name)
+    if limiter is None:
+        return False
+    if not wait:
+        return not limiter.wait(0.0)
+    left = deadline.remaining()
+    return not limiter.wait(
+        RATE_MAX_WAIT if left is None else min(max(left, 0.0), RATE_MAX_WAIT)
+    )
+
+
+def _query_source(name: str, ticker: str, *, wait: bool = True) -> List[Dict]:
+    if _rate_limited(name, wait=wait):
+        logger.info("%s rate limit reached, skipped for %s", name, ticker)
+        return []
+    t0 = time.perf_counter()
+    items: List[Dict] = []
+    try:
+        items = NEWS_SOURCES[name](ticker) or []
+    finally:
+        with _stats_lock:
+            _stats[name].record(time.perf_counter() - t0, bool(items))
+    return items
+
+
+def _headline(item: Dict) -> Dict[str, str] | None:
+    """One headline dict {headline, body, url} from any source's item format."""
+    content = item.get("content") or {}
+    headline = content.get("title") or item.get("title") or item.get("title_text") or ""
+    if not headline:
+        return None
+    body = content.get("summary") or item.get("summary") or item.get("body")
+    url = (
+        (content.get("canonicalUrl") or {}).get("url")
+        or item.get("url")
+        or item.get("link")
+        or ""
     )
+    return {"headline": headline, "body": body, "url": url}
+
+
+def _dedupe_key(headline: Dict[str, str]) -> str:
+    return (headline["url"] or headline["headline"]).strip().lower()
 
-    headlines = []
-    for r in raw:
-        headline = r.get("content", {}).get("title") or r.get("title_text", "")
-        body = r.get("content", {}).get("summary")
-        url = r.get("content", {}).get("canonicalUrl", {}).get("url") or r.get(
-            "url", ""
+
+def _gather_sequential(ticker: str, names: List[str]) -> List[Dict]:
+    for name in names:
+        if deadline.low(SOURCE_MIN_BUDGET):
+            logger.info("Budget low, no more news sources for %s", ticker)
+            break
+        if raw := _query_source(name, ticker):
+            return raw
+    return []
+
+
+def _source_until(until: float, name: str, ticker: str) -> List[Dict]:
+    # the gather's deadline is active inside the source thread, so its HTTP
+    # timeouts end with the gather instead of outliving it
+    with deadline.use(until):
+        if deadline.remaining() <= 0:
+            return []
+        # no sleeping for a slot: the gather would have given up by then,
+        # and the slot would still count against the provider's quota
+        return _query_source(name, ticker, wait=False)
+
+
+def _gather_concurrent(ticker: str, names: List[str], merge: bool) -> List[Dict]:
+    if not names:
+        return []
+    limit = deadline.timeout(GATHER_TIMEOUT)
+    until = deadline.start(limit)
+    # a pool per gather: a source still running after the gather gave up
+    # holds only its own thread, never a slot another gather waits for
+    pool = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="news-source")
+    futures = {
+        # each source thread sees the caller's deadline / tracing span
+        pool.submit(contextvars.copy_context().run, _source_until, until, n, ticker): n
+        for n in names
+    }
+    answered: Dict[str, List[Dict]] = {}
+    try:
+        for future in as_completed(futures, timeout=limit):
+            name = futures[future]
+            try:
+                raw = future.result()
+            except Exception as exc:  # noqa: BLE001 – other sources may answer
+                logger.warning("News source %s failed for %s: %s", name, ticker, exc)
+                continue
+            if raw:
+                if not merge:
+                    return raw
+                answered[name] = raw
+    except FutureTimeout:
+        pending = [n for f, n in futures.items() if not f.done()]
+        logger.info("News sources timed out for %s: %s", ticker, pending)
+    finally:
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+    merged, seen = [], set()
+    for name in names:  # preference order
+        for item in answered.get(name, []):
+            headline = _headline(item)
+            key = _dedupe_key(headline) if headline else None
+            if key in seen:
+                continue
+            if key:
+                seen.add(key)
+            merged.append(item)
+    return merged
+
+
+def gather_recent_headlines(
+    ticker: str, *, mode: str | None = None
+) -> tuple[List[Dict[str, str]], List[Dict]]:
+    """
+    Query the enabled sources (yfinance, Alpha-Vantage, Yahoo-RSS,
+    DuckDuckGo), ordered by their observed hit rate and latency.
+    *mode* (default ``NEWS_GATHER_MODE``):
+      sequential – one after the other, stop at the first with ≥1 headline
+      first      – all at once, keep the first non-empty answer
+      merge      – all at once, de-duplicated union of the answers
+    Concurrent modes share one deadline (``NEWS_GATHER_TIMEOUT_S``, capped
+    by the run budget) that also bounds each source's own calls, and run on
+    a pool of their own.  Returns (headlines, raw items).
+    """
+    mode = mode or GATHER_MODE
+    names = _ordered_sources()
+    if mode == "sequential":
+        raw = _gather_sequential(ticker, names)
+    else:
+        raw = _gather_concurrent(ticker, names, merge=mode == "merge")
+
+    return _headlines(raw), raw
+
+
+def _headlines(raw: List[Dict]) -> List[Dict[str, str]]:
+    headlines, seen = [], set()
+    for item in raw:
+        headline = _headline(item)
+        if headline and _dedupe_key(headline) not in seen:
+            seen.add(_dedupe_key(headline))
+            headlines.append(headline)
+    return headlines
+
+
+# --------------------------------------------------------------------------- #
+#   BATCHED INGESTION
+# --------------------------------------------------------------------------- #
+INGEST_WORKERS: int = getattr(settings, "NEWS_INGEST_WORKERS", 8)
+AV_MARKET_LIMIT = 1000  # NEWS_SENTIMENT maximum
+# symbols per yahooquery news request
+YAHOOQUERY_BATCH: int = getattr(settings, "NEWS_YAHOOQUERY_BATCH", 25)
+
+
+def _alpha_vantage_market_news(
+    tickers: Set[str], lookback_h: int = 24, limit: int = AV_MARKET_LIMIT
+) -> Dict[str, List[Dict]]:
+    """
+    One NEWS_SENTIMENT request for the whole market, split back per ticker
+    through each article's ``ticker_sentiment`` list.  (A comma-separated
+    ``tickers`` filter would only return articles mentioning *all* of them.)
+    """
+    if not ALPHAV_KEY or _rate_limited("alpha_vantage"):
+        return {}
+    time_from = (_utc_now() - dt.timedelta(hours=lookback_h)).strftime("%Y%m%dT%H%M")
+    url = (
+        "https://www.alphavantage.co/query"
+        f"?function=NEWS_SENTIMENT&sort=LATEST&time_from={time_from}"
+        f"&limit={limit}&apikey={ALPHAV_KEY}"
+    )
+    try:
+        feed = requests.get(url, timeout=deadline.timeout(30)).json().get("feed", [])
+    except Exception as exc:
+        logger.warning("AV market news error: %s", exc)
+        return {}
+
+    by_ticker: Dict[str, List[Dict]] = defaultdict(list)
+    for item in feed:
+        for mention in item.get("ticker_sentiment") or []:
+            ticker = str(mention.get("ticker", "")).upper()
+            if ticker in tickers:
+                # the ticker's own score rather than the article's overall one
+                score = mention.get(
+                    "ticker_sentiment_score", item.get("overall_sentiment_score")
+                )
+                by_ticker[ticker].append({**item, "overall_sentiment_score": score})
+    return by_ticker
+
+
+def _tagged_symbols(item: Dict) -> Set[str]:
+    """Upper-case symbols a Yahoo news item is tagged with (either format)."""
+    content = item.get("content") or {}
+    stock_tickers = (content.get("finance") or {}).get("stockTickers") or []
+    tags = [
+        *(item.get("relatedTickers") or []),
+        *(s.get("symbol") for s in stock_tickers),
+    ]
+    return {str(t).upper() for t in tags if t}
+
+
+def _yahooquery_news(tickers: List[str], count: int = 25) -> Dict[str, List[Dict]]:
+    """
+    News for a group of symbols in one yahooquery request, split back per
+    ticker through each item's related-symbol tags (untagged items are
+    dropped, so their tickers fall through to the per-ticker sources).
+    """
+    try:
+        from yahooquery import Ticker
+    except ImportError:  # pragma: no cover
+        return {}
+    if _rate_limited("yahooquery"):
+        return {}
+    try:
+        items = Ticker(tickers, timeout=deadline.timeout(15)).news(count * len(tickers))
+    except Exception as exc:
+        logger.warning("yahooquery news error for %d tickers: %s", len(tickers), exc)
+        return {}
+
+    wanted = set(tickers)
+    by_ticker: Dict[str, List[Dict]] = defaultdict(list)
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict):
+            for ticker in _tagged_symbols(item) & wanted:
+                by_ticker[ticker].append(item)
+    return by_ticker
+
+
+def _ingest_universe(tickers: Iterable[str]) -> List[str]:
+    """*tickers* with every ETF replaced by its (resolved) top holdings."""
+    universe: Dict[str, None] = {}
+    for ticker in tickers:
+        holdings = get_etf_constituents(ticker, top_n=ETF_HOLDINGS)
+        for t, _ in _resolve_holdings(holdings) if holdings else [(ticker, 1.0)]:
+            universe[t.upper()] = None
+    return list(universe)
+
+
+def ingest_news(
+    tickers: Iterable[str], *, workers: int = INGEST_WORKERS
+) -> Dict[str, int]:
+    """
+    Fetch, score and store recent news for many tickers at once:
+
+      1. the market-wide Alpha-Vantage feed, one request split per ticker
+         (its comma-separated ``tickers`` filter matches articles that
+         mention *all* of them, so it cannot batch a ticker list);
+      2. yahooquery for the tickers still without news, in groups of
+         ``NEWS_YAHOOQUERY_BATCH`` symbols per request;
+      3. the per-ticker sources for whatever is left.
+
+    Steps 2 and 3 run on *workers* threads, each source within its
+    ``NEWS_SOURCE_RATE_PER_MIN``.  Sentiment is classified in one batched
+    call.  Returns {ticker: items fetched}.
+    """
+    tickers = _ingest_universe(tickers)
+    raw: Dict[str, List[Dict]] = dict(_alpha_vantage_market_news(set(tickers)))
+    from_feed = sum(bool(raw.get(t)) for t in tickers)
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="news-ingest"
+    ) as pool:
+        missing = [t for t in tickers if not raw.get(t)]
+        groups = [
+            missing[i : i + YAHOOQUERY_BATCH]
+            for i in range(0, len(missing), YAHOOQUERY_BATCH)
+        ]
+        for found in pool.map(
+            lambda group: contextvars.copy_context().run(_yahooquery_news, group),
+            groups,
+        ):
+            raw.update(found)
+
+        missing = [t for t in tickers if not raw.get(t)]
+        logger.info(
+            f"News ingestion: {from_feed}/{len(tickers)} tickers from the market "
+            f"feed, {len(tickers) - from_feed - len(missing)} from yahooquery, "
+            f"{len(missing)} gathered per ticker"
         )
-        if headline:
-            headlines.append({"headline": headline, "body": body, "url": url})
+        futures = {
+            pool.submit(contextvars.copy_context().run, gather_recent_headlines, t): t
+            for t in missing
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                raw[ticker] = future.result()[1]
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(f"Error gathering headlines for {ticker}: {exc}")
 
-    return headlines, raw
+    items = [(t, _headlines(raw.get(t, []))) for t in tickers]
+    try:
+        scores = [r["score"] for r in classify_sentiment(items)]
+    except Exception as exc:  # noqa: BLE001 – store the news regardless
+        logger.warning(f"Batched sentiment failed during ingestion: {exc}")
+        scores = [None] * len(items)
+    _save_news_batch(
+        [
+            (ticker, raw.get(ticker, []), score)
+            for (ticker, _), score in zip(items, scores)
+        ]
+    )
+    return {t: len(raw.get(t, [])) for t in tickers}
 
 
 _SYSTEM_PROMPT = (
     "You are a JSON-only sentiment classifier for equity news.\n"
-    'Return exactly: {"summary": "…", "score": ∈ [-1,1]}\n'
-    "score ∈ [-1,1]. No other text."
+    "Score EVERY numbered headline below independently and return exactly:\n"
+    '{"sentiments": [{"id": 1, "summary": "≤15 words", "score": ∈ [-1,1]}]}\n'
+    "One item per headline, score ∈ [-1,1]. No other text."
 )
 
-_JSON_RE = re.compile(r"\{.*?\}", re.DOTALL)
+_JSON_RE = re.compile(r"\{.*\}", re.DOTALL)
 
 
 def _safe_json(response: str) -> Dict[str, Any] | None:
@@ -321,69 +828,212 @@ def _safe_json(response: str) -> Dict[str, Any] | None:
     return None
 
 
-from typing import List, Dict, Any, Tuple
+def _headline_text(headline: Dict[str, str] | str) -> str:
+    return headline["headline"] if isinstance(headline, dict) else str(headline)
+
+
+def _sentiment_requests(
+    texts: Dict[str, str], token_budget: int
+) -> List[Tuple[List[str], str]]:
+    """Pack {hash: line} into (hashes, prompt) requests within the budget."""
+    budget = max(token_budget - prompt_encoder.count_tokens(_SYSTEM_PROMPT), 1)
+    requests, hashes, lines, used = [], [], [], 0
+    for h, text in texts.items():
+        cost = prompt_encoder.count_tokens(text) + 3  # number + newline
+        if lines and used + cost > budget:
+            requests.append((hashes, "\n".join([_SYSTEM_PROMPT, *lines])))
+            hashes, lines, used = [], [], 0
+        hashes.append(h)
+        lines.append(f"{len(lines) + 1}. {text}")
+        used += cost
+    if lines:
+        requests.append((hashes, "\n".join([_SYSTEM_PROMPT, *lines])))
+    return requests
+
+
+def _parse_sentiments(content: str, hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Return {hash: {summary, score}} for every well-formed reply item."""
+    js = _safe_json(content)
+    items = js.get("sentiments") if isinstance(js, dict) else None
+    parsed = {}
+    for item in items if isinstance(items, list) else []:
+        try:
+            idx = int(item["id"]) - 1
+            if not 0 <= idx < len(hashes):
+                continue
+            parsed[hashes[idx]] = {
+                "summary": str(item.get("summary", "")),
+                "score": max(-1.0, min(1.0, float(item["score"]))),
+            }
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+    return parsed
+
+
+def _score_headlines(
+    texts: Dict[str, str], token_budget: int
+) -> Tuple[Dict[str, Dict[str, Any]], Exception | None]:
+    """LLM scores for {hash: headline}, plus the last request error if any."""
+    scored: Dict[str, Dict[str, Any]] = {}
+    error = None
+    for hashes, prompt in _sentiment_requests(texts, token_budget):
+        try:
+            resp = _get_llm().invoke(
+                prompt,
+                response_format={"type": "json_object"},
+                timeout=deadline.timeout(deadline.LLM_TIMEOUT),
+            )
+        except Exception as exc:  # noqa: BLE001 – other chunks still count
+            logger.warning(
+                f"Sentiment request for {len(hashes)} headlines failed: {exc}"
+            )
+            error = exc
+            continue
+        scored.update(_parse_sentiments(resp.content, hashes))
+    return scored, error
+
+
+def cluster_headlines(
+    news_items: Dict[str, List[Dict[str, str]]],
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Collapse near-duplicate headlines (syndicated wire stories, the same
+    event reworded) per ticker into their newest representative, with the
+    group size under ``count``.  All texts are embedded in one call; without
+    an embedding model only exact (normalised) duplicates are merged.
+    """
+    texts = list(
+        dict.fromkeys(_headline_text(h) for hs in news_items.values() for h in hs)
+    )
+    vectors = embeddings.encode(texts)
+    row = {text: i for i, text in enumerate(texts)}
+
+    clustered = {}
+    for ticker, headlines in news_items.items():
+        items = [h if isinstance(h, dict) else {"headline": str(h)} for h in headlines]
+        if vectors is None:
+            groups: Dict[str, List[int]] = {}
+            for i, h in enumerate(items):
+                key = HeadlineSentiment.hash_text(h["headline"])
+                groups.setdefault(key, []).append(i)
+            members = list(groups.values())
+        else:
+            idx = [row[h["headline"]] for h in items]
+            members = embeddings.cluster(vectors[idx], DEDUPE_COSINE)
+        clustered[ticker] = [{**items[g[0]], "count": len(g)} for g in members]
+    return clustered
+
+
+def _stored_sentiments(tickers: List[str], qs) -> Dict[str, LLMSentiment]:
+    """Newest row of *qs* per ticker, in one query."""
+    rows = qs.filter(ticker__in=tickers).order_by("ticker", "-created")
+    return {row.ticker: row for row in rows.distinct("ticker")}
 
 
 def classify_sentiment(
-    news_items: List[Tuple[str, List[Dict[str, str]]]]
+    news_items: List[Tuple[str, List[Dict[str, str]]]],
+    *,
+    token_budget: int = SENTIMENT_TOKEN_BUDGET,
 ) -> List[Dict[str, Any]]:
-    results = []
+    """
+    Score each (ticker, headlines) pair.  Today's stored sentiments are read
+    with one query.  For the other tickers each headline is scored once
+    (``headline_cache``) after near-duplicates are collapsed
+    (``cluster_headlines``): only representatives not seen recently go to
+    the LLM,
+    packed into as few requests as *token_budget* allows, and the ticker
+    score is aggregated from its headline scores.  New ticker sentiments
+    are written with one ``bulk_create``.  Returns one result per item.
+    """
     if not news_items:
-        return results
+        return []
 
-    llm = _get_llm()
-    today = dt.date.today()
+    tickers = list(dict.fromkeys(t for t, _ in news_items))
+    stored = _stored_sentiments(
+        tickers, LLMSentiment.objects.filter(created__date=dt.date.today())
+    )
+    missing = [t for t in tickers if t not in stored]
+    if missing and deadline.low(SENTIMENT_MIN_BUDGET):
+        # out of budget: an older sentiment beats none
+        stored.update(_stored_sentiments(missing, LLMSentiment.objects.all()))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for ticker, row in stored.items():
+        logger.info(
+            f"Using stored sentiment for {ticker} ({row.created:%Y-%m-%d}). Skipping LLM call."
+        )
+        results[ticker] = {
+            "ticker": ticker,
+            "summary": row.summary,
+            "score": float(row.score),
+        }
 
+    pending: Dict[str, List[Dict[str, str]]] = {}
     for ticker, headlines in news_items:
-        # Check if sentiment for this ticker and today already exists
-        existing_sentiment = LLMSentiment.objects.filter(
-            ticker=ticker, created__date=today
-        ).first()
-
-        if existing_sentiment:
-            logger.info(
-                f"Sentiment for {ticker} on {today} already exists. Skipping LLM call."
-            )
-            results.append(
-                {
-                    "ticker": ticker,
-                    "summary": existing_sentiment.summary,
-                    "score": float(existing_sentiment.score),
-                }
-            )
+        if ticker in results:
             continue
+        if headlines:
+            pending.setdefault(ticker, headlines)
+        elif ticker not in pending:
+            results[ticker] = {
+                "ticker": ticker,
+                "summary": "No fresh headlines",
+                "score": 0.0,
+            }
+    for ticker in pending:
+        results.pop(ticker, None)
 
-        if not headlines:
-            results.append(
-                {"ticker": ticker, "summary": "No fresh headlines", "score": 0.0}
-            )
-            continue
+    # headline scores: cached ones reused, only unseen cluster
+    # representatives sent out, as compact lines within the ticker's budget
+    texts: Dict[str, str] = {}
+    lines: Dict[str, str] = {}
+    ticker_hashes: Dict[str, Dict[str, int]] = {}
+    for ticker, headlines in cluster_headlines(pending).items():
+        counts = ticker_hashes.setdefault(ticker, {})
+        for headline, line in prompt_encoder.encode_headlines(
+            headlines, HEADLINES_TOKEN_BUDGET
+        ):
+            h = HeadlineSentiment.hash_text(headline["headline"])
+            texts.setdefault(h, headline["headline"])
+            lines.setdefault(h, line)
+            counts[h] = counts.get(h, 0) + headline["count"]
+    known = headline_cache.lookup(texts)
+    unseen = {h: line for h, line in lines.items() if h not in known}
+    fresh, error = _score_headlines(unseen, token_budget) if unseen else ({}, None)
+    headline_cache.store(texts, fresh)
+    known.update(fresh)
+    logger.info(
+        f"Headline sentiment: {len(texts) - len(unseen)} cached, "
+        f"{len(fresh)}/{len(unseen)} scored by the LLM"
+    )
 
-        joined = "\n".join(f"- {h}" for h in headlines)
-        prompt = f"{_SYSTEM_PROMPT}\n" f"HEADLINES (newest first):\n{joined}"
-
-        resp = llm.invoke(prompt)
-        js = _safe_json(resp.content)
-        if js:
-            sentiment_score = float(js.get("score", 0.0))
-            sentiment_summary = str(js.get("summary", ""))
-            LLMSentiment.objects.create(
-                ticker=ticker,
-                score=Decimal(str(sentiment_score)),
-                summary=sentiment_summary,
-            )
-            results.append(
-                {
-                    "ticker": ticker,
-                    "summary": sentiment_summary,
-                    "score": sentiment_score,
-                }
-            )
-        else:
-            results.append(
-                {"ticker": ticker, "summary": "LLM parse error", "score": 0.0}
+    scored: Dict[str, Dict[str, Any]] = {}
+    for ticker, counts in ticker_hashes.items():
+        hits = [h for h in counts if h in known]
+        if hits:
+            scored[ticker] = headline_cache.aggregate(
+                [known[h] for h in hits], [counts[h] for h in hits]
             )
-    return results
+    if error is not None and not scored:
+        raise error
+
+    if scored:
+        LLMSentiment.objects.bulk_create(
+            [
+                LLMSentiment(
+                    ticker=ticker,
+                    score=Decimal(str(result["score"])),
+                    summary=result["summary"],
+                )
+                for ticker, result in scored.items()
+            ]
+        )
+    for ticker in pending:
+        results[ticker] = {
+            "ticker": ticker,
+            **scored.get(ticker, {"summary": "LLM parse error", "score": 0.0}),
+        }
+    return [results[ticker] for ticker, _ in news_items]
 
 
 # --------------------------------------------------------------------------- #
@@ -418,5 +1068,5 @@ def translate_holding_to_ticker(holding_name: str) -> str:
         f"You are a financial expert. Your task is to return just ticker for a given company name. Nothing else."
         f"Given the holding name '{holding_name}', what is its stock ticker?"
     )
-    response = llm.invoke(prompt)
+    response = llm.invoke(prompt, timeout=deadline.timeout(deadline.LLM_TIMEOUT))
     return response.content.strip()
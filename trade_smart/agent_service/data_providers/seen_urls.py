@@ -0,0 +1,86 @@
+"""
+seen_urls – compact index of article URLs already stored
+
+A Redis set of ``NewsArticle.url_hash`` values, consulted before any
+ingested item is parsed, looked up in the body cache or queued for
+extraction.  New rows are added as they are written; ``rebuild`` replaces
+the set from the table (last ``SEEN_URLS_DAYS`` days) so it stays bounded
+and recovers from Redis evictions.  Without Redis every URL is "unseen"
+and exact de-duplication falls back to the ``(url_hash, published_at)``
+index.
+
+Public functions:
+    seen(hashes)  -> set of hashes already stored
+    mark(hashes)  -> None
+    rebuild()     -> int hashes in the new set
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from typing import Iterable, Set
+
+from django.conf import settings
+from django.utils import timezone
+
+from trade_smart.models.news_article import NewsArticle
+from trade_smart.utils.tools import rds
+
+logger = logging.getLogger(__name__)
+
+KEY = "news:seen_urls"
+WINDOW_DAYS: int = getattr(settings, "SEEN_URLS_DAYS", 90)
+_BATCH = 5000
+
+
+def seen(hashes: Iterable[str]) -> Set[str]:
+    hashes = [h for h in dict.fromkeys(hashes) if h]
+    if not hashes or rds is None:
+        return set()
+    try:
+        flags = rds.smismember(KEY, hashes)
+    except Exception as exc:  # noqa: BLE001 – index is an optimisation only
+        logger.warning("Seen-URL lookup failed: %s", exc)
+        return set()
+    return {h for h, flag in zip(hashes, flags) if flag}
+
+
+def mark(hashes: Iterable[str]) -> None:
+    hashes = [h for h in set(hashes) if h]
+    if not hashes or rds is None:
+        return
+    try:
+        rds.sadd(KEY, *hashes)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Seen-URL update failed: %s", exc)
+
+
+def rebuild(days: int = WINDOW_DAYS) -> int:
+    """Rebuild the set from stored articles and swap it in atomically."""
+    if rds is None:
+        return 0
+    tmp = f"{KEY}:rebuild"
+    since = timezone.now() - dt.timedelta(days=days)
+    hashes = (
+        NewsArticle.objects.filter(published_at__gte=since)
+        .exclude(url_hash="")
+        .values_list("url_hash", flat=True)
+        .distinct()
+        .iterator(chunk_size=_BATCH)
+    )
+    rds.delete(tmp)
+    count, batch = 0, []
+    for h in hashes:
+        batch.append(h)
+        if len(batch) >= _BATCH:
+            count += rds.sadd(tmp, *batch)
+            batch = []
+    if batch:
+        count += rds.sadd(tmp, *batch)
+    if count:
+        rds.rename(tmp, KEY)
+    else:
+        rds.delete(KEY)
+    logger.info("Rebuilt seen-URL index with %d hashes", count)
+    return count
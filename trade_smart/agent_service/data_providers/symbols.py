@@ -0,0 +1,156 @@
+"""
+symbols – holding name → ticker resolution
+
+ETF providers sometimes report holdings by company name.  Resolved names
+live in the SymbolResolution table; an in-process index over it answers
+exact (normalised) names with a dict lookup and near misses ("NVIDIA
+Corporation" vs "Nvidia Corp") by trigram similarity; a near miss never
+crosses share classes ("Alphabet Inc Class A" vs "Class C").  Only names
+the index cannot match are sent to the caller's *translate* function (the
+LLM), and the answer is written back.
+
+Public functions:
+    normalize(name)            -> str
+    resolve(name, translate)   -> str   ticker (or *name* when unresolved)
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Set, Tuple
+
+from django.conf import settings
+
+from trade_smart.models.symbol_resolution import SymbolResolution
+
+logger = logging.getLogger(__name__)
+
+# trigram Jaccard similarity needed for a fuzzy hit
+FUZZY_THRESHOLD: float = getattr(settings, "SYMBOL_FUZZY_THRESHOLD", 0.8)
+# reload the table every so often to pick up other workers' writes
+INDEX_TTL: float = getattr(settings, "SYMBOL_INDEX_TTL_S", 600)
+LLM_CONFIDENCE = 0.8
+
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+_TICKER = re.compile(r"^[A-Z0-9][A-Z0-9.\-]{0,11}$")
+# a ticker-style name with a share class: "BRK.B", "BF-A", "RDS/A"
+_TICKER_CLASS = re.compile(r"^([a-z0-9]{1,6})[./\-]([a-z])$")
+# corporate suffixes and share-class noise that do not identify the issuer
+_STOPWORDS = frozenset(
+    "the inc incorporated corp corporation co company ltd limited plc sa ag nv "
+    "se holdings holding group class cl shs shares common ordinary adr".split()
+)
+_CLASS_WORDS = frozenset({"class", "cl"})
+
+
+def normalize(name: str) -> str:
+    """
+    Lower-case issuer words without corporate suffixes.  A share-class
+    letter ("Class A", "Cl. C", "BRK.B") is kept as a single-letter word,
+    so the classes of one issuer stay distinct.
+    """
+    lowered = _TICKER_CLASS.sub(r"\1 class \2", name.strip().lower())
+    words = _NON_WORD.sub(" ", lowered).split()
+    kept = [
+        w
+        for prev, w in zip(["", *words], words)
+        if (w not in _STOPWORDS and len(w) > 1)
+        or w.isdigit()
+        or (prev in _CLASS_WORDS and len(w) == 1)
+    ]
+    return " ".join(kept or words)[:200]
+
+
+def _share_class(normalized: str) -> Set[str]:
+    return {w for w in normalized.split() if len(w) == 1 and w.isalpha()}
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class _FuzzyIndex:
+    """Exact dict plus a trigram inverted index over normalised names."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = 0.0
+        self._exact: Dict[str, str] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+
+    def _add(self, normalized: str, ticker: str) -> None:
+        self._exact[normalized] = ticker
+        self._grams[normalized] = grams = _trigrams(normalized)
+        for gram in grams:
+            self._postings[gram].add(normalized)
+
+    def _refresh(self) -> None:
+        if time.monotonic() - self._loaded_at < INDEX_TTL:
+            return
+        rows = list(SymbolResolution.objects.values_list("normalized_name", "ticker"))
+        with self._lock:
+            self._exact, self._grams = {}, {}
+            self._postings = defaultdict(set)
+            for normalized, ticker in rows:
+                self._add(normalized, ticker)
+            self._loaded_at = time.monotonic()
+
+    def add(self, normalized: str, ticker: str) -> None:
+        with self._lock:
+            self._add(normalized, ticker)
+
+    def match(self, normalized: str) -> Tuple[str, float] | None:
+        """(ticker, similarity) of the closest known name above threshold."""
+        self._refresh()
+        with self._lock:
+            if (ticker := self._exact.get(normalized)) is not None:
+                return ticker, 1.0
+            grams = _trigrams(normalized)
+            share_class = _share_class(normalized)
+            shared: Dict[str, int] = defaultdict(int)
+            for gram in grams:
+                for candidate in self._postings.get(gram, ()):
+                    shared[candidate] += 1
+            best, best_sim = None, 0.0
+            for candidate, n in shared.items():
+                # "Alphabet A" is never a near miss of "Alphabet C"
+                if _share_class(candidate) != share_class:
+                    continue
+                sim = n / (len(grams) + len(self._grams[candidate]) - n)
+                if sim > best_sim:
+                    best, best_sim = candidate, sim
+            if best is None or best_sim < FUZZY_THRESHOLD:
+                return None
+            return self._exact[best], best_sim
+
+
+_index = _FuzzyIndex()
+
+
+def resolve(name: str, translate: Callable[[str], str]) -> str:
+    normalized = normalize(name)
+    if hit := _index.match(normalized):
+        return hit[0]
+
+    ticker = translate(name).strip().upper()
+    if not _TICKER.match(ticker):
+        logger.warning("Unusable ticker %r for holding %r", ticker[:40], name)
+        return name
+    SymbolResolution.objects.update_or_create(
+        normalized_name=normalized,
+        defaults={
+            "name": name[:200],
+            "ticker": ticker,
+            "source": "llm",
+            "confidence": LLM_CONFIDENCE,
+        },
+    )
+    _index.add(normalized, ticker)
+    logger.info("Resolved holding %r to %s", name, ticker)
+    return ticker
@@ -0,0 +1,127 @@
+"""
+fingerprint – skip advice synthesis when its inputs have not moved
+
+``fingerprint`` hashes a quantized snapshot of the position-level inputs
+synth sees: the latest value of every indicator, the sentiment score, the
+position's portfolio weight and a price bucket.  Portfolio-wide metrics
+(factor loadings, VaR, stress P/L) shift a little every day, so they are
+left out.  Advice is stored with its fingerprint; when tomorrow's inputs
+hash to the same value, the stored advice is reused instead of calling the
+LLM (unless the run is a forced refresh).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import math
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Tuple
+
+from django.conf import settings
+
+from trade_smart.agent_service.nodes.synth_llm import FALLBACK_RATIONALE
+
+# significant digits kept for indicators / metrics
+DIGITS: int = getattr(settings, "ADVICE_FINGERPRINT_DIGITS", 2)
+# price moves within one bucket (log scale) count as unchanged
+PRICE_BUCKET_PCT: float = getattr(settings, "ADVICE_PRICE_BUCKET_PCT", 0.01)
+SENTIMENT_STEP: float = getattr(settings, "ADVICE_SENTIMENT_STEP", 0.1)
+VERSION = 2  # bump when the snapshot layout changes
+
+
+def _quantize(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float, Decimal)):
+        f = float(value)
+        return float(f"{f:.{DIGITS}g}") if math.isfinite(f) else None
+    if isinstance(value, dict):
+        return {str(k): _quantize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_quantize(v) for v in value]
+    return str(value)
+
+
+def _price_bucket(price: Any) -> int | None:
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        return None
+    if not price > 0:
+        return None
+    return math.floor(math.log(price) / math.log1p(PRICE_BUCKET_PCT))
+
+
+def _weight(state: Dict[str, Any]) -> Any:
+    weights = (state.get("pf_metrics") or {}).get("weights") or {}
+    return weights.get(state.get("ticker"))
+
+
+def fingerprint(state: Dict[str, Any]) -> str:
+    tech = state.get("tech") or {}
+    score = (state.get("news_macro") or {}).get("score")
+    snapshot = {
+        "v": VERSION,
+        "tech": _quantize(
+            {k: v[-1] if isinstance(v, list) and v else v for k, v in tech.items()}
+        ),
+        "weight": _quantize(_weight(state)),
+        "sentiment": (
+            round(float(score) / SENTIMENT_STEP) if score is not None else None
+        ),
+        "price": _price_bucket(state.get("last_px")),
+        "degraded": sorted(state.get("degraded") or []),
+    }
+    payload = json.dumps(snapshot, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def unchanged(state: Dict[str, Any], fp: str) -> Dict[str, Any] | None:
+    """The stored advice, if it was synthesised from identical inputs."""
+    prior = state.get("prior_advice")
+    if state.get("force_refresh") or not prior or prior.get("fingerprint") != fp:
+        return None
+    return prior
+
+
+def stamp(advice: Dict[str, Any], fp: str) -> Dict[str, Any]:
+    # parse failures must not be reused, so they stay unfingerprinted
+    if advice.get("rationale") == FALLBACK_RATIONALE:
+        return advice
+    return {**advice, "fingerprint": fp}
+
+
+def partition(
+    states: Dict[str, Dict[str, Any]],
+) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """(fingerprints, reusable advice, states still to synthesise) by ticker."""
+    fps = {t: fingerprint(s) for t, s in states.items()}
+    reused = {
+        t: adv for t, s in states.items() if (adv := unchanged(s, fps[t])) is not None
+    }
+    return fps, reused, [s for t, s in states.items() if t not in reused]
+
+
+def skip_unchanged(fn: Callable) -> Callable:
+    """Wrap a synth node so unchanged inputs reuse the stored advice."""
+    if inspect.iscoroutinefunction(fn):
+
+        async def awrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+            fp = fingerprint(state)
+            if (prior := unchanged(state, fp)) is not None:
+                return {"advice": prior}
+            return {"advice": stamp((await fn(state))["advice"], fp)}
+
+        awrapper.__name__ = f"{fn.__name__}_fingerprinted"
+        return awrapper
+
+    def wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+        fp = fingerprint(state)
+        if (prior := unchanged(state, fp)) is not None:
+            return {"advice": prior}
+        return {"advice": stamp(fn(state)["advice"], fp)}
+
+    wrapper.__name__ = f"{fn.__name__}_fingerprinted"
+    return wrapper
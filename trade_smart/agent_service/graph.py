@@ -1,39 +1,256 @@
-from typing import TypedDict, Dict, Any
+import asyncio
+import logging
+import operator
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Annotated, Any, Callable, Dict, List, TypedDict
 
+from django.conf import settings
+from django.db import connections
 from langchain_core.runnables import Runnable
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 
-from trade_smart.agent_service.nodes.news_macro_node import web_news_node
-from trade_smart.agent_service.nodes.market_node import market_node
+from trade_smart.agent_service.checkpoint import checkpointed
+from trade_smart.agent_service.fingerprint import skip_unchanged
+from trade_smart.agent_service.nodes.news_macro_node import (
+    aweb_news_node,
+    web_news_node,
+)
+from trade_smart.agent_service.nodes.market_node import amarket_node, market_node
 from trade_smart.agent_service.nodes.pf_node import pf_node
 from trade_smart.agent_service.nodes.tech_node import tech_node
-from trade_smart.agent_service.nodes.synth_llm import synth_llm_node
+from trade_smart.agent_service.nodes.synth_llm import asynth_llm_node, synth_llm_node
+from trade_smart.agent_service.ticker_context import TICKER_STAGES, cached_stage
 from trade_smart.models import Portfolio
+from trade_smart.services import deadline
+from trade_smart.services.deadline import budgeted
+from trade_smart.services.tracing import traced
+from trade_smart.utils.aio import db_thread
+
+logger = logging.getLogger(__name__)
+
+PARALLEL_BRANCHES: bool = getattr(settings, "ADVICE_PARALLEL_BRANCHES", True)
+TICKER_CACHE: bool = getattr(settings, "ADVICE_TICKER_CACHE", True)
+BRANCH_TIMEOUTS: Dict[str, float] = getattr(
+    settings,
+    "ADVICE_BRANCH_TIMEOUTS",
+    {"market": 15, "tech": 30, "pf": 30, "news_macro": 60},
+)
+
+# state update used when a branch times out or raises
+BRANCH_FALLBACKS: Dict[str, Dict[str, Any]] = {
+    "market": {"last_px": None},
+    "tech": {"tech": {}},
+    "pf": {"pf_metrics": {"error": "Portfolio metrics unavailable"}},
+    "news_macro": {
+        "raw_headlines": [],
+        "news_macro": {"summary": "No sentiment", "score": 0.0},
+    },
+}
 
 
 class AdviceState(TypedDict, total=False):
+    run_id: str  # enables per-node checkpoints (resumable runs)
+    resumed: Dict[str, Any]  # this ticker's stored node outputs of the run
+    checkpoint_batch: Any  # checkpoint.Batch collecting new node outputs
+    deadline: float  # epoch seconds; see services.deadline
     ticker: str
     portfolio: Portfolio
     last_px: float
     tech: Dict[str, float]
     pf_metrics: Dict[str, Any]
+    raw_headlines: List[Dict[str, Any]]
     news_macro: Dict[str, Any]
     advice: Dict[str, Any]
+    prior_advice: Dict[str, Any]  # stored advice incl. its input fingerprint
+    force_refresh: bool  # synthesise even when the fingerprint is unchanged
+    refresh_news: bool  # query the news sources even if stored news is recent
+    degraded: Annotated[List[str], operator.add]  # branches that fell back
+
+
+# -------- Branch guard -------------------------------------------------------
+def _run_closing_connections(fn: Callable, state: Dict[str, Any], until: float):
+    # the branch limit is the active deadline inside the branch, so outbound
+    # calls of an abandoned branch give up with it instead of running on
+    try:
+        with deadline.use(until):
+            return fn(state)
+    finally:
+        connections.close_all()  # this branch thread's connections only
+
+
+def _branch_limit(timeout: float, state: Dict[str, Any]) -> float:
+    # a branch never outlives the run's deadline
+    with deadline.use(state.get("deadline")):
+        return deadline.timeout(timeout)
+
+
+def with_timeout(name: str, fn: Callable, timeout: float) -> Callable:
+    """
+    Run *fn* with a wall-clock limit (capped by the run deadline).  On
+    timeout or error the branch yields its fallback update and is listed in
+    ``degraded`` so synth can discount it.
+
+    Each call gets its own single-thread executor: a branch that times out
+    only holds its own thread (until its calls hit the branch deadline),
+    never a slot other branches or portfolios are queued behind.
+    """
+
+    def guarded(state: Dict[str, Any]) -> Dict[str, Any]:
+        limit = _branch_limit(timeout, state)
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"advice-{name}")
+        future = pool.submit(_run_closing_connections, fn, state, deadline.start(limit))
+        try:
+            return future.result(timeout=limit)
+        except FutureTimeout:
+            logger.warning(
+                "Branch %s timed out after %.1fs for %s", name, limit, state["ticker"]
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "Branch %s failed for %s: %s", name, state["ticker"], exc, exc_info=True
+            )
+        finally:
+            pool.shutdown(wait=False)
+        return {**BRANCH_FALLBACKS[name], "degraded": [name]}
+
+    guarded.__name__ = f"{name}_guarded"
+    return guarded
+
+
+def with_async_timeout(name: str, fn: Callable, timeout: float) -> Callable:
+    """``with_timeout`` for coroutine nodes, run on the caller's event loop."""
+
+    async def guarded(state: Dict[str, Any]) -> Dict[str, Any]:
+        limit = _branch_limit(timeout, state)
+        try:
+            return await asyncio.wait_for(fn(state), limit)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Branch %s timed out after %.1fs for %s", name, limit, state["ticker"]
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "Branch %s failed for %s: %s", name, state["ticker"], exc, exc_info=True
+            )
+        return {**BRANCH_FALLBACKS[name], "degraded": [name]}
+
+    guarded.__name__ = f"{name}_guarded"
+    return guarded
 
 
 # -------- Assemble DAG -------------------------------------------------------
-def build_graph() -> Runnable:
+def build_graph(
+    *,
+    parallel: bool = PARALLEL_BRANCHES,
+    branch_timeouts: Dict[str, float] | None = None,
+    synth: bool = True,
+    ticker_cache: bool = TICKER_CACHE,
+) -> Runnable:
+    """
+    ``parallel=True``: market, tech, pf and news_macro only depend on
+    ticker / portfolio, so they fan out from START and join before synth;
+    latency is max(branch) instead of sum(branch).
+    ``parallel=False`` keeps the original strictly serial chain.
+    ``synth=False`` stops after the branches, for callers that synthesise
+    several positions in one request (see ``synth_portfolio``).
+    ``ticker_cache=True`` serves ticker-scoped stages from today's
+    ticker context (see ``ticker_context``).
+    Every node is checkpointed when the input state carries a ``run_id``,
+    and traced (see ``services.tracing``).  synth reuses ``prior_advice``
+    when its input fingerprint is unchanged (see ``fingerprint``).  Nodes
+    run under the state's ``deadline`` (see ``services.deadline``).
+    """
+    branches = {
+        "market": market_node,
+        "tech": tech_node,
+        "pf": pf_node,
+        "news_macro": web_news_node,
+    }
+    if ticker_cache:
+        for name in TICKER_STAGES:
+            branches[name] = cached_stage(name, branches[name])
+    branches = {
+        name: budgeted(traced("advice", name, checkpointed(name, fn)))
+        for name, fn in branches.items()
+    }
+    timeouts = {**BRANCH_TIMEOUTS, **(branch_timeouts or {})}
+
+    g = StateGraph(AdviceState)
+    if synth:
+        g.add_node(
+            "synth",
+            budgeted(
+                traced(
+                    "advice",
+                    "synth",
+                    checkpointed("synth", skip_unchanged(synth_llm_node)),
+                )
+            ),
+        )
+        g.add_edge("synth", END)
+
+    if parallel:
+        for name, fn in branches.items():
+            g.add_node(name, with_timeout(name, fn, timeouts[name]))
+            g.add_edge(START, name)
+            if not synth:
+                g.add_edge(name, END)
+        if synth:
+            g.add_edge(list(branches), "synth")
+    else:
+        for name, fn in branches.items():
+            g.add_node(name, fn)
+        g.set_entry_point("market")
+        g.add_edge("market", "tech")
+        g.add_edge("tech", "pf")
+        g.add_edge("pf", "news_macro")
+        g.add_edge("news_macro", "synth" if synth else END)
+
+    return g.compile()
+
+
+def build_async_graph(
+    *,
+    branch_timeouts: Dict[str, float] | None = None,
+    synth: bool = True,
+    ticker_cache: bool = TICKER_CACHE,
+) -> Runnable:
+    """
+    Same DAG as ``build_graph(parallel=True)`` with coroutine nodes, for
+    ``ainvoke``.  market / news_macro / synth await their I/O (the LLM via
+    ``ainvoke``); CPU- and ORM-bound tech / pf run on executor threads, so
+    one event loop can drive many graph runs at once.
+    """
+    branches = {
+        "market": amarket_node,
+        "tech": db_thread(tech_node),
+        "pf": db_thread(pf_node),
+        "news_macro": aweb_news_node,
+    }
+    if ticker_cache:
+        for name in TICKER_STAGES:
+            branches[name] = cached_stage(name, branches[name])
+    timeouts = {**BRANCH_TIMEOUTS, **(branch_timeouts or {})}
+
     g = StateGraph(AdviceState)
-    g.add_node("market", market_node)
-    g.add_node("tech", tech_node)
-    g.add_node("pf", pf_node)
-    g.add_node("news_macro", web_news_node)
-    g.add_node("synth", synth_llm_node)
-
-    g.set_entry_point("market")
-    g.add_edge("market", "tech")
-    g.add_edge("tech", "pf")
-    g.add_edge("pf", "news_macro")
-    g.add_edge("news_macro", "synth")
-    g.add_edge("synth", END)
+    for name, fn in branches.items():
+        fn = budgeted(traced("advice", name, checkpointed(name, fn)))
+        g.add_node(name, with_async_timeout(name, fn, timeouts[name]))
+        g.add_edge(START, name)
+        if not synth:
+            g.add_edge(name, END)
+    if synth:
+        g.add_node(
+            "synth",
+            budgeted(
+                traced(
+                    "advice",
+                    "synth",
+                    checkpointed("synth", skip_unchanged(asynth_llm_node)),
+                )
+            ),
+        )
+        g.add_edge(list(branches), "synth")
+        g.add_edge("synth", END)
+
     return g.compile()
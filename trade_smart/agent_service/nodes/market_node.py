@@ -1,7 +1,12 @@
 from trade_smart.utils import tools
+from trade_smart.utils.aio import db_thread
 
 
 def market_node(state):
     ticker = state["ticker"]
-    state["last_px"] = tools.last_price(ticker)
-    return state
+    return {"last_px": tools.last_price(ticker)}
+
+
+async def amarket_node(state):
+    ticker = state["ticker"]
+    return {"last_px": await db_thread(tools.last_price)(ticker)}
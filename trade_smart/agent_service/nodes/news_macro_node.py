@@ -1,5 +1,6 @@
 from typing import Any, Dict
 
+from trade_smart.agent_service.data_providers import news_index
 from trade_smart.agent_service.data_providers.etf_utils import is_etf
 from trade_smart.agent_service.data_providers.news_macro import (
     _etf_sentiment,
@@ -7,21 +8,35 @@ from trade_smart.agent_service.data_providers.news_macro import (
     classify_sentiment,
     _save_news_articles,
 )
+from trade_smart.utils.aio import db_thread
 
 
 def web_news_node(state: Dict[str, Any]) -> Dict[str, Any]:
     ticker = state["ticker"]
     if is_etf(ticker):
-        state["raw_headlines"] = []
-        state["news_macro"] = _etf_sentiment(ticker)
-    else:
+        return {"raw_headlines": [], "news_macro": _etf_sentiment(ticker)}
+    # recently stored news: the most relevant articles from the index
+    headlines = (
+        None if state.get("refresh_news") else news_index.recent_headlines(ticker)
+    )
+    raw_news = []
+    if headlines is None:
         headlines, raw_news = gather_recent_headlines(ticker)
-        state["raw_headlines"] = headlines
-        sentiment_results = classify_sentiment([(ticker, headlines)])
-        sentiment_result = (
-            sentiment_results[0]
-            if sentiment_results
-            else {"summary": "No sentiment", "score": 0.0}
-        )
+    sentiment_results = classify_sentiment([(ticker, headlines)])
+    sentiment_result = (
+        sentiment_results[0]
+        if sentiment_results
+        else {"summary": "No sentiment", "score": 0.0}
+    )
+    if raw_news:
         _save_news_articles(ticker, raw_news, sentiment_result["score"])
-    return state
+    return {"raw_headlines": headlines, "news_macro": sentiment_result}
+
+
+async def aweb_news_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The news providers (yfinance, ddgs, feedparser, goose) and the ORM are
+    blocking libraries, so the whole pipeline runs on an executor thread;
+    the event loop stays free for the other tickers' branches.
+    """
+    return await db_thread(web_news_node)(state)
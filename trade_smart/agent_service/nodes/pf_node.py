@@ -1,17 +1,24 @@
 from trade_smart.analytics.portfolio_analyser import analyse
+from trade_smart.analytics.stress import stored_stress
 
 
 def pf_node(state):
     """
-    Analyzes the portfolio and updates the state with the metrics.
+    Analyzes the portfolio and returns its metrics,
+    including the latest stored stress-scenario results.  Metrics already
+    in the state (precomputed once per portfolio by the runner) are reused.
 
     Args:
         state (dict): The current state of the graph.
 
     Returns:
-        dict: The updated state with the portfolio metrics.
+        dict: State update with the portfolio metrics.
     """
+    if state.get("pf_metrics"):
+        return {"pf_metrics": state["pf_metrics"]}
+
     pf = state["portfolio"]
     metrics = analyse(pf)
-    state["pf_metrics"] = metrics
-    return state
+    if "error" not in metrics:
+        metrics["stress"] = stored_stress(pf)
+    return {"pf_metrics": metrics}
@@ -1,28 +1,78 @@
+import asyncio
 import json
+import logging
+import weakref
+from typing import Any, Dict, List
 
-from langchain.schema import SystemMessage, HumanMessage, AIMessage
+from django.conf import settings
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 
+from trade_smart.models.advice import Advice
+from trade_smart.services import deadline
 from trade_smart.services.llm import get_llm
+from trade_smart.services.prompt_encoder import compact_json, count_tokens
 
-llm = get_llm()
+logger = logging.getLogger(__name__)
 
+_llm = None  # built on first use (or by the worker warm-up), not at import
 
+
+# async clients per event loop: httpx connections belong to the loop that
+# opened them, and every async Celery task runs on a fresh ``asyncio.run``
+_async_llms: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_llm():
+    global _llm
+    if _llm is None:
+        _llm = get_llm()
+    return _llm
+
+
+def _get_async_llm():
+    """LLM client bound to the running event loop (for ``ainvoke``)."""
+    loop = asyncio.get_running_loop()
+    if (llm := _async_llms.get(loop)) is None:
+        import httpx
+
+        llm = _async_llms[loop] = get_llm(http_async_client=httpx.AsyncClient())
+    return llm
+
+
+async def aclose_llm() -> None:
+    """Close the running loop's client; call before the loop shuts down."""
+    llm = _async_llms.pop(asyncio.get_running_loop(), None)
+    if llm is not None:
+        await llm.http_async_client.aclose()
+
+
+FALLBACK_RATIONALE = "Could not parse LLM response, default to HOLD."
+
+# prompt-token budget for one portfolio-level synthesis request
+BATCH_TOKEN_BUDGET: int = getattr(settings, "SYNTH_BATCH_TOKEN_BUDGET", 6000)
+
+
+_DECISION_RULES = (
+    "You are WiseTrade – a disciplined, risk-aware investment assistant.\n\n"
+    "Decision hierarchy you MUST follow:\n"
+    "  1. PORTFOLIO METRICS (position size, target weight, realised P/L, "
+    "     user risk score).  Action MUST respect the user’s risk profile; "
+    "     e.g. never increase an overweight position.\n"
+    "  2. TECHNICALS (RSI, MACD, SMA/EMA crossover, Bollinger Band, etc.) "
+    "     – these determine timing.  Ignore technicals only if missing.\n"
+    "  3. MACRO / NEWS sentiment acts as a final filter; lower confidence "
+    "     when macro contradicts the trade idea.\n\n"
+    "Rules:\n"
+    "• Combine all three sources logically; if signals conflict, prefer HOLD.\n"
+    "• Never invent data; when something is missing, down-weight confidence.\n"
+)
 SYS = SystemMessage(
     content=(
-        "You are WiseTrade – a disciplined, risk-aware investment assistant.\n\n"
-        "Decision hierarchy you MUST follow:\n"
-        "  1. PORTFOLIO METRICS (position size, target weight, realised P/L, "
-        "     user risk score).  Action MUST respect the user’s risk profile; "
-        "     e.g. never increase an overweight position.\n"
-        "  2. TECHNICALS (RSI, MACD, SMA/EMA crossover, Bollinger Band, etc.) "
-        "     – these determine timing.  Ignore technicals only if missing.\n"
-        "  3. MACRO / NEWS sentiment acts as a final filter; lower confidence "
-        "     when macro contradicts the trade idea.\n\n"
-        "Rules:\n"
-        "• Combine all three sources logically; if signals conflict, prefer HOLD.\n"
-        "• Never invent data; when something is missing, down-weight confidence.\n"
-        "• Output ONLY a minified JSON object with exactly these keys:\n"
-        '      {"action": "BUY|SELL|HOLD|REBAL", '
+        _DECISION_RULES
+        + "• Output ONLY a minified JSON object with exactly these keys:\n"
+        '      {"action": "BUY|SELL|HOLD", '
         '       "confidence": 0.0, '
         '       "rationale": "≤250 words"}\n'
         "• confidence must be between 0.0 and 1.0 and represent the strength / "
@@ -30,6 +80,20 @@ SYS = SystemMessage(
         "• You must reason internally but expose ONLY the JSON in the final answer."
     )
 )
+BATCH_SYS = SystemMessage(
+    content=(
+        _DECISION_RULES
+        + "• You will receive several positions of ONE portfolio; judge each "
+        "  ticker independently but in the context of the shared metrics.\n"
+        "• Output ONLY a minified JSON object of this shape:\n"
+        '      {"advice": [{"ticker": "…", "action": "BUY|SELL|HOLD", '
+        '"confidence": 0.0, "rationale": "≤120 words"}, …]}\n'
+        "  with exactly one item per ticker given.\n"
+        "• confidence must be between 0.0 and 1.0 and represent the strength / "
+        "  agreement of the signals.\n"
+        "• You must reason internally but expose ONLY the JSON in the final answer."
+    )
+)
 FMT = """
 PORTFOLIO METRICS (risk first, weights second):
 {pf}
@@ -42,31 +106,232 @@ MACRO / NEWS SENTIMENT:
 
 Current Price = {price}
 
+Unavailable inputs (timed out / failed): {missing}
+
 Generate advice strictly per the JSON schema in the system instructions.
 """
+BATCH_FMT = """
+PORTFOLIO METRICS (shared by every position below):
+{pf}
 
+POSITIONS:
+{positions}
 
-def synth_llm_node(state):
+Generate advice for every ticker strictly per the JSON schema in the system instructions.
+"""
+POSITION_FMT = """### {ticker}
+TECHNICAL INDICATORS: {tech}
+MACRO / NEWS SENTIMENT: {news}
+Current Price = {price}
+Unavailable inputs (timed out / failed): {missing}
+"""
+
+
+def _action(value: Any) -> str:
+    """*value* as one of ``Advice.ACTIONS``; ValueError for anything else."""
+    action = str(value).strip().upper()
+    if action not in Advice.ACTIONS:
+        raise ValueError(f"unknown action {action[:20]!r}")
+    return action
+
+
+def _single_messages(state: Dict[str, Any]) -> List[Any]:
     prompt = FMT.format(
-        pf=json.dumps(state.get("pf_metrics"), indent=2),
-        tech=json.dumps(state.get("tech"), indent=2),
-        news=json.dumps(state.get("news_macro"), indent=2),
+        pf=compact_json(state.get("pf_metrics")),
+        tech=compact_json(state.get("tech")),
+        news=compact_json(state.get("news_macro")),
         price=state.get("last_px"),
+        missing=", ".join(state.get("degraded") or []) or "none",
     )
-    resp = llm.invoke(
-        [SYS, HumanMessage(content=prompt)], response_format={"type": "json_object"}
-    )
+    return [SYS, HumanMessage(content=prompt)]
+
+
+def _parse_single(resp: Any) -> Dict[str, Any]:
     try:
         js = json.loads(resp.content if hasattr(resp, "content") else resp)
-        state["advice"] = {
-            "action": js["action"],
+        advice = {
+            "action": _action(js["action"]),
             "confidence": js["confidence"],
             "rationale": js["rationale"],
         }
     except Exception as e:
-        state["advice"] = {
+        logger.debug("Unparseable synth reply, falling back to HOLD: %s", e)
+        advice = {
             "action": "HOLD",
             "confidence": 0.3,
-            "rationale": "Could not parse LLM response, default to HOLD.",
+            "rationale": FALLBACK_RATIONALE,
         }
-    return state
+    return {"advice": advice}
+
+
+def synth_llm_node(state):
+    resp = _get_llm().invoke(
+        _single_messages(state),
+        response_format={"type": "json_object"},
+        timeout=deadline.timeout(deadline.LLM_TIMEOUT),
+    )
+    return _parse_single(resp)
+
+
+async def asynth_llm_node(state):
+    resp = await _get_async_llm().ainvoke(
+        _single_messages(state),
+        response_format={"type": "json_object"},
+        timeout=deadline.timeout(deadline.LLM_TIMEOUT),
+    )
+    return _parse_single(resp)
+
+
+# --------------------------------------------------------------------------- #
+#   Portfolio-level (batched) synthesis
+# --------------------------------------------------------------------------- #
+def _position_block(state: Dict[str, Any]) -> str:
+    return POSITION_FMT.format(
+        ticker=state["ticker"],
+        tech=compact_json(state.get("tech")),
+        news=compact_json(state.get("news_macro")),
+        price=state.get("last_px"),
+        missing=", ".join(state.get("degraded") or []) or "none",
+    )
+
+
+def _chunk_by_budget(
+    blocks: List[tuple[str, str]], budget: int
+) -> List[List[tuple[str, str]]]:
+    chunks, current, used = [], [], 0
+    for ticker, block in blocks:
+        cost = count_tokens(block)
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append((ticker, block))
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _parse_batch(content: str) -> Dict[str, Dict[str, Any]]:
+    """Return {ticker: advice} for every well-formed item of a batch reply."""
+    try:
+        items = json.loads(content).get("advice", [])
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+    parsed = {}
+    for item in items if isinstance(items, list) else []:
+        try:
+            confidence = float(item["confidence"])
+            if not 0.0 <= confidence <= 1.0 or not item["rationale"]:
+                continue
+            parsed[str(item["ticker"]).upper()] = {
+                "action": _action(item["action"]),
+                "confidence": confidence,
+                "rationale": str(item["rationale"]),
+            }
+        except (KeyError, TypeError, ValueError):
+            continue
+    return parsed
+
+
+def _batch_requests(
+    states: List[Dict[str, Any]], token_budget: int
+) -> tuple[Dict[str, Dict[str, Any]], List[tuple[List[str], List[Any]]]]:
+    """Split *states* into (tickers, messages) requests within the budget."""
+    by_ticker = {s["ticker"]: s for s in states}
+    pf_block = compact_json(states[0].get("pf_metrics"))
+    overhead = count_tokens(BATCH_SYS.content + BATCH_FMT + pf_block)
+    blocks = [(t, _position_block(s)) for t, s in by_ticker.items()]
+
+    requests = []
+    for chunk in _chunk_by_budget(blocks, max(token_budget - overhead, 1)):
+        prompt = BATCH_FMT.format(
+            pf=pf_block, positions="\n".join(block for _, block in chunk)
+        )
+        messages = [BATCH_SYS, HumanMessage(content=prompt)]
+        requests.append(([t for t, _ in chunk], messages))
+    return by_ticker, requests
+
+
+def _collect(advice: Dict[str, Dict[str, Any]], tickers: List[str], resp: Any) -> None:
+    """Merge one batch reply (or the exception it raised) into *advice*."""
+    if isinstance(resp, BaseException):
+        logger.warning("Batched synthesis failed: %s", resp)
+        return
+    parsed = _parse_batch(resp.content if hasattr(resp, "content") else resp)
+    for ticker in tickers:
+        if ticker.upper() in parsed:
+            advice[ticker] = parsed[ticker.upper()]
+
+
+def synth_portfolio(
+    states: List[Dict[str, Any]], *, token_budget: int = BATCH_TOKEN_BUDGET
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Synthesise advice for several positions of one portfolio, sharing the
+    system prompt and pf_metrics across a few requests chunked by token
+    budget.  Tickers missing or malformed in a reply fall back to a
+    per-ticker synth_llm_node call; tickers that still fail are omitted.
+    """
+    if not states:
+        return {}
+
+    by_ticker, requests = _batch_requests(states, token_budget)
+    advice: Dict[str, Dict[str, Any]] = {}
+    for tickers, messages in requests:
+        try:
+            resp = _get_llm().invoke(
+                messages,
+                response_format={"type": "json_object"},
+                timeout=deadline.timeout(deadline.LLM_TIMEOUT),
+            )
+        except Exception as exc:  # noqa: BLE001
+            resp = exc
+        _collect(advice, tickers, resp)
+
+    for ticker, state in by_ticker.items():
+        if ticker in advice:
+            continue
+        logger.info("Falling back to single-ticker synthesis for %s", ticker)
+        try:
+            advice[ticker] = synth_llm_node(state)["advice"]
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Synthesis failed for %s: %s", ticker, exc)
+    return advice
+
+
+async def asynth_portfolio(
+    states: List[Dict[str, Any]], *, token_budget: int = BATCH_TOKEN_BUDGET
+) -> Dict[str, Dict[str, Any]]:
+    """``synth_portfolio`` with all chunk and fallback requests in flight at once."""
+    if not states:
+        return {}
+
+    by_ticker, requests = _batch_requests(states, token_budget)
+    replies = await asyncio.gather(
+        *(
+            _get_async_llm().ainvoke(
+                messages,
+                response_format={"type": "json_object"},
+                timeout=deadline.timeout(deadline.LLM_TIMEOUT),
+            )
+            for _, messages in requests
+        ),
+        return_exceptions=True,
+    )
+    advice: Dict[str, Dict[str, Any]] = {}
+    for (tickers, _), resp in zip(requests, replies):
+        _collect(advice, tickers, resp)
+
+    missing = [t for t in by_ticker if t not in advice]
+    for ticker in missing:
+        logger.info("Falling back to single-ticker synthesis for %s", ticker)
+    fallbacks = await asyncio.gather(
+        *(asynth_llm_node(by_ticker[t]) for t in missing), return_exceptions=True
+    )
+    for ticker, out in zip(missing, fallbacks):
+        if isinstance(out, BaseException):
+            logger.error("Synthesis failed for %s: %s", ticker, out)
+        else:
+            advice[ticker] = out["advice"]
+    return advice
@@ -4,19 +4,18 @@ from trade_smart.analytics.ta_engine import calculate_indicators
 
 def tech_node(state):
     """
-    Calculates a history of technical indicators for a given ticker and updates the state.
+    Calculates a history of technical indicators for a given ticker.
 
     Args:
         state (dict): The current state of the graph.
 
     Returns:
-        dict: The updated state with a history of technical indicators.
+        dict: State update with a history of technical indicators.
     """
     ticker = state["ticker"]
     indicators = calculate_indicators(ticker)
     if not indicators:
-        state["tech"] = {}
-        return state
+        return {"tech": {}}
 
     # Group indicators by name
     grouped_indicators = defaultdict(list)
@@ -30,5 +29,4 @@ def tech_node(state):
         latest_values = [float(val[1]) for val in sorted_values[-5:]]
         indicator_history[name] = latest_values
 
-    state["tech"] = indicator_history
-    return state
+    return {"tech": indicator_history}
@@ -1,33 +1,432 @@
-from trade_smart.agent_service.graph import build_graph
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from trade_smart.agent_service import checkpoint, fingerprint
+from trade_smart.agent_service.graph import build_async_graph, build_graph
+from trade_smart.agent_service.nodes.pf_node import pf_node
+from trade_smart.agent_service.nodes.synth_llm import (
+    aclose_llm,
+    asynth_portfolio,
+    synth_portfolio,
+)
 from trade_smart.models.advice import Advice
 from trade_smart.models.portfolio import Portfolio
+from trade_smart.services import deadline
+from trade_smart.services.tracing import aspan, span
+from trade_smart.utils.aio import db_thread
+
+logger = logging.getLogger(__name__)
+
+
+POSITION_CONCURRENCY: int = getattr(settings, "ADVICE_POSITION_CONCURRENCY", 4)
+BATCH_SYNTH: bool = getattr(settings, "ADVICE_BATCH_SYNTH", True)
+ADVICE_FIELDS = ("action", "confidence", "rationale")
+# graph runs (and batch syntheses) in flight at once on one event loop
+ASYNC_CONCURRENCY: int = getattr(settings, "ADVICE_ASYNC_CONCURRENCY", 32)
+
+
+@functools.lru_cache(maxsize=None)
+def get_graph(*, synth: bool = True, asynchronous: bool = False):
+    """Compiled advice graph, built once per process on first use."""
+    if asynchronous:
+        return build_async_graph(synth=synth)
+    return build_graph(synth=synth)
+
+
+def _initial_state(pf: Portfolio, ticker: str, **extra) -> Dict[str, Any]:
+    # the budget starts when the position starts, not when it was queued
+    return {
+        "ticker": ticker,
+        "portfolio": pf,
+        "deadline": deadline.start(deadline.ADVICE_DEADLINE),
+        **extra,
+    }
+
+
+def _evaluate(g, pf: Portfolio, ticker: str, **extra) -> Dict[str, Any]:
+    try:
+        return g.invoke(_initial_state(pf, ticker, **extra))
+    finally:
+        connections.close_all()  # pool threads must not leak DB connections
+
+
+def _valid_advice(ticker: str, adv: Dict[str, Any]) -> Dict[str, Any] | None:
+    """*adv* coerced to what the Advice columns accept, or None if unusable."""
+    action = str(adv.get("action", "")).strip().upper()
+    if action not in Advice.ACTIONS:
+        logger.warning("Invalid action %r for %s, storing HOLD", action[:20], ticker)
+        action = Advice.ACTIONS.HOLD
+    try:
+        confidence = min(max(float(adv["confidence"]), 0.0), 1.0)
+    except (KeyError, TypeError, ValueError):
+        logger.error("Advice for %s has no usable confidence, not stored", ticker)
+        return None
+    return {
+        "action": action,
+        "confidence": round(confidence, 2),
+        "rationale": str(adv.get("rationale") or ""),
+        "fingerprint": str(adv.get("fingerprint") or "")[:64],
+    }
+
+
+def _save_rows(rows: List[Advice]) -> List[str]:
+    """Save *rows* one by one; returns the tickers that failed."""
+    failed = []
+    for obj in rows:
+        try:
+            with transaction.atomic():
+                obj.save()
+        except DatabaseError as exc:
+            logger.error("Storing advice for %s failed: %s", obj.ticker, exc)
+            failed.append(obj.ticker)
+    return failed
+
+
+def _store_advice(pf: Portfolio, advice: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Upsert all advice rows of *pf* in one short transaction; rows reused
+    because their input fingerprint is unchanged are left untouched.  Rows
+    are validated first; if the bulk write still fails, rows are saved one
+    by one so a bad row only loses itself.  Returns the tickers not stored.
+    """
+    now = timezone.now()
+    existing: Dict[str, Advice] = {}
+    for row in Advice.objects.filter(portfolio=pf, ticker__in=list(advice)):
+        existing.setdefault(row.ticker, row)
+
+    failed, to_update, to_create = [], [], []
+    for ticker, adv in advice.items():
+        values = _valid_advice(ticker, adv)
+        if values is None:
+            failed.append(ticker)
+            continue
+        if ticker in existing:
+            obj = existing[ticker]
+            if values["fingerprint"] and obj.fingerprint == values["fingerprint"]:
+                continue
+            for f, v in values.items():
+                setattr(obj, f, v)
+            obj.modified = now
+            to_update.append(obj)
+        else:
+            to_create.append(Advice(portfolio=pf, ticker=ticker, **values))
+
+    try:
+        with transaction.atomic():
+            Advice.objects.bulk_update(
+                to_update, [*ADVICE_FIELDS, "fingerprint", "modified"]
+            )
+            Advice.objects.bulk_create(to_create)
+    except DatabaseError as exc:
+        logger.warning(
+            "Bulk advice upsert failed for portfolio %s (%s), saving rows singly",
+            pf.id,
+            exc,
+        )
+        failed += _save_rows(to_update + to_create)
+    return failed
+
+
+def _pending(
+    pf: Portfolio, run_id: str | None
+) -> Tuple[List[str], Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Tickers still to evaluate, advice already checkpointed by *run_id*, and
+    every node output the run stored per ticker (one query), which the
+    graph's nodes resume from instead of reading their checkpoints.
+    """
+    tickers = list(pf.positions.values_list("ticker", flat=True))
+    finished: Dict[str, Dict[str, Any]] = {}
+    done: Dict[str, Dict[str, Any]] = {}
+    if run_id:
+        done = checkpoint.load_run(run_id, pf.id, tickers)
+        finished = {
+            t: nodes["synth"]["advice"] for t, nodes in done.items() if "synth" in nodes
+        }
+        tickers = [t for t in tickers if t not in finished]
+        if finished:
+            logger.info("Run %s resumed: %d positions done", run_id, len(finished))
+    return tickers, finished, done
+
 
+def _prior_advice(pf: Portfolio, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Stored advice with a fingerprint, keyed by ticker (one query)."""
+    prior = {}
+    for row in (
+        Advice.objects.filter(portfolio=pf, ticker__in=tickers)
+        .exclude(fingerprint="")
+        .order_by("-modified")
+        .values("ticker", "fingerprint", *ADVICE_FIELDS)
+    ):
+        row["confidence"] = float(row["confidence"])
+        prior.setdefault(row.pop("ticker"), row)
+    return prior
 
-graph = build_graph()
 
+def _synth_inputs(
+    states: Dict[str, Dict[str, Any]],
+) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    fps, reused, todo = fingerprint.partition(states)
+    if reused:
+        logger.info("Inputs unchanged, reusing advice for %s", ", ".join(reused))
+    return fps, reused, todo
 
-from django.db import transaction
 
+def _pf_metrics(pf: Portfolio) -> Dict[str, Any] | None:
+    # portfolio-scoped, so computed once instead of once per position;
+    # on failure each graph run retries it inside its guarded pf branch
+    try:
+        return pf_node({"portfolio": pf})["pf_metrics"]
+    except Exception as e:
+        logger.warning("Portfolio metrics failed for %s: %s", pf.id, e)
+        return None
 
-def run_for_portfolio(pf: Portfolio) -> bool:
+
+def _save_synth_checkpoints(
+    batch: checkpoint.Batch,
+    results: Dict[str, Dict[str, Any]],
+    states: Dict[str, Dict[str, Any]],
+) -> None:
+    for ticker, adv in results.items():
+        update = {"advice": adv}
+        if checkpoint.reusable(states.get(ticker, {}), update):
+            batch.add(ticker, "synth", update)
+    batch.flush()
+
+
+def run_for_portfolio(
+    pf: Portfolio,
+    *,
+    concurrency: int | None = None,
+    batch_synth: bool = BATCH_SYNTH,
+    run_id: str | None = None,
+    force_refresh: bool = False,
+) -> bool:
+    """
+    Evaluate every position concurrently (no DB transaction held while the
+    graph does HTTP / LLM work), then write all advice in one bulk upsert.
+    With *batch_synth* the positions are synthesised together in a few
+    portfolio-level LLM requests instead of one request each.
+    With *run_id* every node output is checkpointed, so rerunning the same
+    run id skips finished positions and nodes; degraded outputs are not
+    checkpointed and are retried.  Checkpoints are written in one upsert
+    once all positions are evaluated and once more after the batch synth.
+    Positions whose synth inputs hash to the fingerprint of their stored
+    advice reuse it without an LLM call, unless *force_refresh*.
+    Returns False if any position failed.
+    """
+    g = get_graph(synth=not batch_synth)
+    tickers, finished, resumed = _pending(pf, run_id)
+    batch = checkpoint.Batch(run_id, pf.id) if run_id else None
+    prior = {} if force_refresh else _prior_advice(pf, tickers)
+    pf_metrics = _pf_metrics(pf)
+    states: Dict[str, Dict[str, Any]] = {}
     all_evaluated = True
-    with transaction.atomic():
-        for pos in pf.positions.all():
+
+    with ThreadPoolExecutor(
+        max_workers=concurrency or POSITION_CONCURRENCY,
+        thread_name_prefix=f"advice-pf{pf.id}",
+    ) as pool:
+        futures = {
+            pool.submit(
+                _evaluate,
+                g,
+                pf,
+                t,
+                pf_metrics=pf_metrics,
+                run_id=run_id,
+                resumed=resumed.get(t, {}),
+                checkpoint_batch=batch,
+                prior_advice=prior.get(t),
+                force_refresh=force_refresh,
+            ): t
+            for t in tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
             try:
-                state = graph.invoke({"ticker": pos.ticker, "portfolio": pf})
-                adv = state["advice"]
-                Advice.objects.update_or_create(
-                    portfolio=pf,
-                    ticker=pos.ticker,
-                    defaults=dict(
-                        action=adv["action"],
-                        confidence=adv["confidence"],
-                        rationale=adv["rationale"],
-                    ),
-                )
+                states[ticker] = future.result()
             except Exception as e:
-                print(
-                    f"Error evaluating position {pos.ticker} for portfolio {pf.id}: {e}"
+                logger.error(
+                    "Error evaluating position %s for portfolio %s: %s",
+                    ticker,
+                    pf.id,
+                    e,
                 )
                 all_evaluated = False
+    if batch:
+        batch.flush()
+
+    if batch_synth:
+        fps, reused, todo = _synth_inputs(states)
+        with span(
+            "advice", "synth_batch", run_id=run_id or "", portfolio_id=pf.id
+        ), deadline.use(deadline.start(deadline.ADVICE_DEADLINE)):
+            results = synth_portfolio(todo)
+        results = {t: fingerprint.stamp(adv, fps[t]) for t, adv in results.items()}
+        results.update(reused)
+        for ticker in states.keys() - results.keys():
+            logger.error("No advice synthesised for %s in portfolio %s", ticker, pf.id)
+            all_evaluated = False
+        if batch:
+            _save_synth_checkpoints(batch, results, states)
+    else:
+        results = {t: s["advice"] for t, s in states.items()}
+
+    results.update(finished)
+    if results and _store_advice(pf, results):
+        all_evaluated = False
+    return all_evaluated
+
+
+# --------------------------------------------------------------------------- #
+#   Async path: many portfolios on one event loop
+# --------------------------------------------------------------------------- #
+async def _aevaluate(
+    g, limit: asyncio.Semaphore, pf: Portfolio, ticker: str, **extra
+) -> Dict[str, Any]:
+    async with limit:
+        return await g.ainvoke(_initial_state(pf, ticker, **extra))
+
+
+async def arun_for_portfolio(
+    pf: Portfolio,
+    *,
+    limit: asyncio.Semaphore | None = None,
+    batch_synth: bool = BATCH_SYNTH,
+    run_id: str | None = None,
+    force_refresh: bool = False,
+) -> bool:
+    """
+    ``run_for_portfolio`` on the event loop: every position's graph is
+    awaited concurrently, bounded by *limit* (shared across portfolios by
+    ``arun_portfolios``); ORM work runs in ``sync_to_async`` threads.
+    """
+    limit = limit or asyncio.Semaphore(ASYNC_CONCURRENCY)
+    g = get_graph(synth=not batch_synth, asynchronous=True)
+    tickers, finished, resumed = await db_thread(_pending)(pf, run_id)
+    batch = checkpoint.Batch(run_id, pf.id) if run_id else None
+    prior = {} if force_refresh else await db_thread(_prior_advice)(pf, tickers)
+    pf_metrics = await db_thread(_pf_metrics)(pf)
+
+    outcomes = await asyncio.gather(
+        *(
+            _aevaluate(
+                g,
+                limit,
+                pf,
+                t,
+                pf_metrics=pf_metrics,
+                run_id=run_id,
+                resumed=resumed.get(t, {}),
+                checkpoint_batch=batch,
+                prior_advice=prior.get(t),
+                force_refresh=force_refresh,
+            )
+            for t in tickers
+        ),
+        return_exceptions=True,
+    )
+    states: Dict[str, Dict[str, Any]] = {}
+    all_evaluated = True
+    for ticker, outcome in zip(tickers, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(
+                "Error evaluating position %s for portfolio %s: %s",
+                ticker,
+                pf.id,
+                outcome,
+            )
+            all_evaluated = False
+        else:
+            states[ticker] = outcome
+    if batch:
+        await db_thread(batch.flush)()
+
+    if batch_synth:
+        fps, reused, todo = _synth_inputs(states)
+        async with limit, aspan(
+            "advice", "synth_batch", run_id=run_id or "", portfolio_id=pf.id
+        ):
+            with deadline.use(deadline.start(deadline.ADVICE_DEADLINE)):
+                results = await asynth_portfolio(todo)
+        results = {t: fingerprint.stamp(adv, fps[t]) for t, adv in results.items()}
+        results.update(reused)
+        for ticker in states.keys() - results.keys():
+            logger.error("No advice synthesised for %s in portfolio %s", ticker, pf.id)
+            all_evaluated = False
+        if batch:
+            await db_thread(_save_synth_checkpoints)(batch, results, states)
+    else:
+        results = {t: s["advice"] for t, s in states.items()}
+
+    results.update(finished)
+    if results and await db_thread(_store_advice)(pf, results):
+        all_evaluated = False
     return all_evaluated
+
+
+async def arun_portfolios(
+    portfolio_ids: Iterable[int],
+    *,
+    concurrency: int | None = None,
+    batch_synth: bool = BATCH_SYNTH,
+    run_id: str | None = None,
+    force_refresh: bool = False,
+) -> Dict[int, bool]:
+    """Advise several portfolios concurrently; returns {portfolio id: all evaluated}."""
+    limit = asyncio.Semaphore(concurrency or ASYNC_CONCURRENCY)
+    portfolios = await db_thread(list)(Portfolio.objects.filter(id__in=portfolio_ids))
+    outcomes = await asyncio.gather(
+        *(
+            arun_for_portfolio(
+                pf,
+                limit=limit,
+                batch_synth=batch_synth,
+                run_id=run_id,
+                force_refresh=force_refresh,
+            )
+            for pf in portfolios
+        ),
+        return_exceptions=True,
+    )
+    results = {}
+    for pf, outcome in zip(portfolios, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error("Advice run failed for portfolio %s: %s", pf.id, outcome)
+            outcome = False
+        results[pf.id] = outcome
+    return results
+
+
+def run_portfolios_async(
+    portfolio_ids: Iterable[int], *, concurrency: int | None = None, **kwargs
+) -> Dict[int, bool]:
+    """
+    Synchronous entry point (Celery): drive ``arun_portfolios`` on a fresh
+    event loop whose default executor is sized for the ``sync_to_async``
+    work that many concurrent graph runs offload.
+    """
+    concurrency = concurrency or ASYNC_CONCURRENCY
+
+    async def main() -> Dict[int, bool]:
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=concurrency * 2, thread_name_prefix="advice-async"
+            )
+        )
+        try:
+            return await arun_portfolios(
+                portfolio_ids, concurrency=concurrency, **kwargs
+            )
+        finally:
+            await aclose_llm()  # its connections die with this loop
+
+    return asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+ticker_context – per-ticker cache of the ticker-scoped advice stages
+
+market, tech and news_macro only depend on the ticker, so their output is
+the same for every portfolio holding it.  ``cached_stage`` wraps those nodes
+with a read-through Redis cache keyed by (day, stage, ticker); the nightly
+run first calls ``prepare`` once per distinct ticker, after which every
+portfolio-scoped graph run (pf, synth) is served from the cache.  Only
+complete outputs are cached: a degraded, empty or placeholder result is
+recomputed on the next call instead of being served for ``CACHE_TTL``.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import inspect
+import json
+import logging
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+
+from trade_smart.agent_service.nodes.market_node import market_node
+from trade_smart.agent_service.nodes.news_macro_node import web_news_node
+from trade_smart.agent_service.nodes.tech_node import tech_node
+from trade_smart.utils.aio import db_thread
+from trade_smart.utils.tools import _cache_get, _cache_set
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL: int = getattr(settings, "TICKER_CONTEXT_TTL", 12 * 3600)
+
+# stage -> (node, state keys worth caching; the first must be non-empty)
+TICKER_STAGES: Dict[str, tuple[Callable, tuple[str, ...]]] = {
+    "market": (market_node, ("last_px",)),
+    "tech": (tech_node, ("tech",)),
+    "news_macro": (web_news_node, ("news_macro", "raw_headlines")),
+}
+# sentiment summaries written when headlines could not be scored
+_PLACEHOLDER_SUMMARIES = frozenset({"No sentiment", "LLM parse error"})
+
+
+def _key(stage: str, ticker: str) -> str:
+    return f"ticker_ctx:{dt.date.today().isoformat()}:{stage}:{ticker.upper()}"
+
+
+def _cacheable(stage: str, update: Dict[str, Any]) -> bool:
+    if update.get("degraded"):
+        return False
+    value = update.get(TICKER_STAGES[stage][1][0])
+    if value is None or value == {} or value == []:
+        return False
+    return not (
+        isinstance(value, dict) and value.get("summary") in _PLACEHOLDER_SUMMARIES
+    )
+
+
+def cached_stage(stage: str, fn: Callable) -> Callable:
+    """
+    Serve *stage* from today's cache, computing and storing it on a miss
+    (or when the state asks for ``refresh_news``).  *fn* may be a plain or
+    a coroutine node; for the latter the cache is read and written on an
+    executor thread.
+    """
+    keys = TICKER_STAGES[stage][1]
+
+    def _store(state: Dict[str, Any], update: Dict[str, Any]) -> None:
+        if not _cacheable(stage, update):
+            return
+        _cache_set(
+            _key(stage, state["ticker"]),
+            json.dumps({k: update.get(k) for k in keys}, default=str),
+            CACHE_TTL,
+        )
+
+    if inspect.iscoroutinefunction(fn):
+
+        async def awrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+            # blocking Redis client: keep its round trips off the event loop
+            if not state.get("refresh_news") and (
+                cached := await db_thread(_cache_get)(_key(stage, state["ticker"]))
+            ):
+                return json.loads(cached)
+            update = await fn(state)
+            await db_thread(_store)(state, update)
+            return update
+
+        awrapper.__name__ = f"{stage}_cached"
+        return awrapper
+
+    def wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+        if not state.get("refresh_news") and (
+            cached := _cache_get(_key(stage, state["ticker"]))
+        ):
+            return json.loads(cached)
+
+        update = fn(state)
+        _store(state, update)
+        return update
+
+    wrapper.__name__ = f"{stage}_cached"
+    return wrapper
+
+
+def prepare(ticker: str, *, refresh_news: bool = False) -> Dict[str, Any]:
+    """
+    Run every ticker-scoped stage for *ticker* once and cache the results;
+    with *refresh_news* they are recomputed and news is fetched from the
+    sources rather than the index.
+    """
+    state: Dict[str, Any] = {"ticker": ticker, "refresh_news": refresh_news}
+    for stage, (fn, _) in TICKER_STAGES.items():
+        try:
+            state.update(cached_stage(stage, fn)(state))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Stage %s failed for %s: %s", stage, ticker, exc)
+    return state
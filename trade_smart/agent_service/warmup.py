@@ -0,0 +1,55 @@
+"""
+warmup – pre-build what the advice tasks need, off the task path
+
+Heavy dependencies are imported lazily at first use so that ``manage.py``
+commands and workers serving other queues never pay for them.  Advice
+workers call ``warm_up`` from ``worker_process_init`` instead, so the
+first task of each pool process does not absorb the cost.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# libraries imported lazily by the nodes / data providers
+HEAVY_MODULES = (
+    "goose3",
+    "ddgs",
+    "feedparser",
+    "yfinance",
+    "pandas_ta",
+    "sentence_transformers",
+    "tiktoken",
+)
+
+
+def warm_up() -> None:
+    t0 = time.perf_counter()
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as exc:
+            logger.warning("Warm-up could not import %s: %s", name, exc)
+
+    from trade_smart.agent_service.data_providers import news_macro
+    from trade_smart.agent_service.nodes import synth_llm
+    from trade_smart.agent_service.runner import get_graph
+    from trade_smart.services import embeddings, prompt_encoder
+    from trade_smart.services.tracing import install_http_hooks
+
+    for synth in (True, False):
+        for asynchronous in (False, True):
+            get_graph(synth=synth, asynchronous=asynchronous)
+    try:
+        synth_llm._get_llm()
+        news_macro._get_llm()
+    except Exception as exc:  # noqa: BLE001 – built again on first use
+        logger.warning("Warm-up could not build the LLM client: %s", exc)
+    embeddings._get_model()  # a failed load backs off instead of raising
+    prompt_encoder.count_tokens("")  # loads the tokenizer
+    install_http_hooks()
+    logger.info("Worker warm-up finished in %.2fs", time.perf_counter() - t0)
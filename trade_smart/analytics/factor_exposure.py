@@ -0,0 +1,205 @@
+"""
+factor_exposure – betas & factor loadings against several benchmarks at once
+
+Public functions:
+    factor_returns(days: int = 252) -> pd.DataFrame
+    session_returns(prices: pd.DataFrame) -> pd.DataFrame
+    regress(asset_returns: pd.DataFrame, factors: pd.DataFrame) -> dict
+    benchmark_for(tickers: list[str]) -> str
+
+All assets (positions + the portfolio itself) are regressed on all factors
+in a single batched least-squares solve over the shared return matrix, so
+N assets × K factors costs about as much as one pandas ``cov``.
+
+Factor proxies trade on different exchange calendars.  Their returns are
+taken between each proxy's own sessions, so a local holiday is a missing
+observation rather than a zero return, and each single-factor beta is
+estimated on every day that asset and factor both have, not only on the
+days all factors share.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from collections import Counter
+from io import StringIO
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from trade_smart.analytics.price_loader import load_price_matrix
+from trade_smart.utils.tools import _cache_get, _cache_set
+
+logger = logging.getLogger(__name__)
+
+# factor name -> proxy ticker (must exist in MarketData)
+FACTOR_PROXIES: Dict[str, str] = getattr(
+    settings,
+    "FACTOR_PROXIES",
+    {
+        "SPY": "SPY",  # US broad market
+        "QQQ": "QQQ",  # US large-cap growth / tech
+        "WIG20": "ETFBW20TR.WA",  # Polish large caps
+        "DAX": "EXS1.DE",  # German large caps
+        "XLK": "XLK",  # sector: technology
+        "XLF": "XLF",  # sector: financials
+        "XLE": "XLE",  # sector: energy
+        "XLV": "XLV",  # sector: health care
+    },
+)
+
+# ticker suffix -> factor used as the headline benchmark
+REGIONAL_BENCHMARKS: Dict[str, str] = getattr(
+    settings,
+    "REGIONAL_BENCHMARKS",
+    {".WA": "WIG20", ".PL": "WIG20", ".DE": "DAX", ".HA": "DAX"},
+)
+DEFAULT_FACTOR = "SPY"
+MIN_OBSERVATIONS = 30
+CACHE_TTL = 24 * 3600
+
+
+# ------------------------------------------------------------------ #
+# Factor return matrix (cached daily)
+# ------------------------------------------------------------------ #
+def _factor_returns(
+    day: dt.date, days: int, proxies: Tuple[Tuple[str, str], ...]
+) -> pd.DataFrame:
+    cache_key = f"factor_returns:v2:{day.isoformat()}:{days}:" + ",".join(
+        f"{n}={t}" for n, t in proxies
+    )
+    if cached := _cache_get(cache_key):
+        df = pd.read_json(StringIO(cached), orient="split", convert_axes=False)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.index), name="date")
+        return df
+
+    names = {t: n for n, t in proxies}
+    prices = load_price_matrix(list(names), days=days, fill=False)
+    returns = session_returns(prices).iloc[1:].rename(columns=names)
+    # a missing or short proxy (failed download) must not stick for a day
+    short = [
+        n for n, _ in proxies if returns.get(n, pd.Series()).count() <= MIN_OBSERVATIONS
+    ]
+    if short:
+        logger.warning("Factor returns incomplete, not cached: %s", ", ".join(short))
+    else:
+        _cache_set(
+            cache_key, returns.to_json(orient="split", date_format="iso"), ttl=CACHE_TTL
+        )
+    return returns
+
+
+def factor_returns(days: int = 252) -> pd.DataFrame:
+    """
+    (day × factor) daily returns of every configured proxy, cached in Redis
+    for the day once every proxy has enough history.
+    """
+    return _factor_returns(dt.date.today(), days, tuple(FACTOR_PROXIES.items()))
+
+
+def session_returns(prices: pd.DataFrame) -> pd.DataFrame:
+    """
+    Daily returns of each column between its own trading days; days a
+    column did not trade are NaN, not 0.  *prices* must not be forward-filled.
+    """
+    return prices.apply(lambda col: col.dropna().pct_change()).reindex(prices.index)
+
+
+def factor_tickers() -> List[str]:
+    return list(FACTOR_PROXIES.values())
+
+
+def benchmark_for(tickers: List[str]) -> str:
+    """Pick the headline benchmark from the dominant listing venue."""
+    venues = Counter(
+        next(
+            (f for sfx, f in REGIONAL_BENCHMARKS.items() if t.upper().endswith(sfx)),
+            DEFAULT_FACTOR,
+        )
+        for t in tickers
+    )
+    return venues.most_common(1)[0][0] if venues else DEFAULT_FACTOR
+
+
+# ------------------------------------------------------------------ #
+# Batched regression
+# ------------------------------------------------------------------ #
+def _pairwise_betas(Y: np.ndarray, F: np.ndarray) -> np.ndarray:
+    """
+    (N × K) single-factor betas, each over the rows where that asset and
+    that factor are both observed (NaN = missing).  Pairs with too few
+    common rows are NaN.
+    """
+    y_ok, f_ok = ~np.isnan(Y), ~np.isnan(F)
+    Yv, Fv = np.where(y_ok, Y, 0.0), np.where(f_ok, F, 0.0)
+    y_w, f_w = y_ok.astype(np.float64), f_ok.astype(np.float64)
+
+    n = y_w.T @ f_w
+    sum_y = Yv.T @ f_w
+    sum_f = y_w.T @ Fv
+    sum_yf = Yv.T @ Fv
+    sum_ff = y_w.T @ Fv**2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sum_yf - sum_y * sum_f / n
+        var = sum_ff - sum_f**2 / n
+        betas = cov / np.where(var > 0, var, np.nan)
+    return np.where(n > MIN_OBSERVATIONS, betas, np.nan)
+
+
+def regress(asset_returns: pd.DataFrame, factors: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Regress every column of *asset_returns* on *factors* in one pass.
+
+    Returns ``{"observations": n, "assets": {name: {alpha, r2, loadings, betas}}}``
+    where *loadings* are the joint multi-factor coefficients over the *n*
+    days every series is observed, and *betas* the single-factor betas
+    (cov / var) against each factor separately, each on its own full
+    overlapping sample.  NaN marks a missing observation.
+    """
+    factors = factors.dropna(axis=1, how="all")
+    if factors.empty:
+        return {"observations": 0, "assets": {}}
+
+    assets = list(asset_returns.columns)
+    names = list(factors.columns)
+    aligned = asset_returns.join(factors, how="inner", rsuffix="_factor")
+    Y_all = aligned.iloc[:, : len(assets)].to_numpy(dtype=np.float64)
+    F_all = aligned.iloc[:, len(assets) :].to_numpy(dtype=np.float64)
+    betas = _pairwise_betas(Y_all, F_all)
+
+    complete = ~(np.isnan(Y_all).any(axis=1) | np.isnan(F_all).any(axis=1))
+    n_obs = int(complete.sum())
+    if n_obs <= MIN_OBSERVATIONS and not np.isfinite(betas).any():
+        return {"observations": n_obs, "assets": {}}
+
+    coef = np.full((len(names) + 1, len(assets)), np.nan)
+    r2 = np.full(len(assets), np.nan)
+    if n_obs > MIN_OBSERVATIONS:
+        Y, F = Y_all[complete], F_all[complete]
+        # joint loadings: [1 | F] @ coef = Y, all assets solved together
+        X = np.column_stack([np.ones(len(F)), F])
+        coef, *_ = np.linalg.lstsq(X, Y, rcond=None)
+        resid = Y - X @ coef
+        y_var = Y.var(axis=0)
+        r2 = np.where(
+            y_var > 0, 1 - resid.var(axis=0) / np.where(y_var > 0, y_var, 1), 0
+        )
+
+    def _r(x):
+        return round(float(x), 4) if np.isfinite(x) else None
+
+    return {
+        "observations": n_obs,
+        "assets": {
+            a: {
+                "alpha": _r(coef[0, i]),
+                "r2": _r(r2[i]),
+                "loadings": {f: _r(coef[k + 1, i]) for k, f in enumerate(names)},
+                "betas": {f: _r(betas[i, k]) for k, f in enumerate(names)},
+            }
+            for i, a in enumerate(assets)
+        },
+    }
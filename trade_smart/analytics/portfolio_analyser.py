@@ -2,8 +2,10 @@
 portfolio_analyser – risk & attribution metrics
 
 Public function:
-    analyse(portfolio: Portfolio, benchmark: str = DEFAULT_BENCHMARK) -> dict
-Used by pf_node without arguments (default benchmark applies).
+    analyse(portfolio: Portfolio, benchmark: str | None = None) -> dict
+Used by pf_node without arguments: the benchmark is picked from the
+portfolio's dominant listing venue (SPY / WIG20 / DAX proxy) and the
+portfolio plus each position is regressed on every configured factor.
 """
 
 from __future__ import annotations
@@ -14,34 +16,28 @@ from typing import Dict, Any, List
 import numpy as np
 import pandas as pd
 
-from trade_smart.models.market_data import MarketData
+from trade_smart.analytics.factor_exposure import (
+    DEFAULT_FACTOR,
+    FACTOR_PROXIES,
+    benchmark_for,
+    factor_returns,
+    regress,
+    session_returns,
+)
+from trade_smart.analytics.price_loader import load_price_matrix
 from trade_smart.models.portfolio import Portfolio
 
 logger = logging.getLogger(__name__)
 
-DEFAULT_BENCHMARK = "SPY"  # broad US equity market proxy
+DEFAULT_BENCHMARK = DEFAULT_FACTOR  # broad US equity market proxy
+PORTFOLIO_COLUMN = "__portfolio__"
 
 
 # ------------------------------------------------------------------ #
 # Helpers
 # ------------------------------------------------------------------ #
 def _price_matrix(tickers: List[str], days: int = 252) -> pd.DataFrame:
-    qs = MarketData.objects.filter(
-        ticker__in=tickers,
-        date__gte=pd.Timestamp.today() - pd.Timedelta(days=days),
-    ).values("ticker", "date", "close")
-
-    df = pd.DataFrame.from_records(qs)
-    if df.empty:
-        return pd.DataFrame()
-
-    df["close"] = df["close"].astype(float)
-    return (
-        df.pivot(index="date", columns="ticker", values="close")
-        .sort_index()
-        .ffill()
-        .astype(float)
-    )
+    return load_price_matrix(tickers, days=days)
 
 
 # ------------------------------------------------------------------ #
@@ -50,7 +46,7 @@ def _price_matrix(tickers: List[str], days: int = 252) -> pd.DataFrame:
 def analyse(
     portfolio: Portfolio,
     *,
-    benchmark: str = DEFAULT_BENCHMARK,
+    benchmark: str | None = None,
 ) -> Dict[str, Any]:
     if not portfolio.positions.exists():
         return {"error": "Portfolio empty"}
@@ -65,27 +61,31 @@ def analyse(
     }
 
     tickers = list(weights.keys())
-    price_df = _price_matrix(tickers + [benchmark])
+    benchmark = benchmark or benchmark_for(tickers)
+    price_df = _price_matrix(tickers)
     if price_df.shape[0] < 60:
         return {"error": "Insufficient price history"}
 
     returns = price_df.pct_change().dropna()
     port_ret = (returns[tickers] * pd.Series(weights)).sum(axis=1)
 
-    # ----------- beta -------------------------------------------------------
-    if benchmark not in returns.columns:
-        return {"error": f"Benchmark '{benchmark}' data not found."}
-
-    pair = pd.concat(
-        [port_ret.rename("pf"), returns[benchmark].rename("bm")],
-        axis=1,
-        join="inner",
-    ).dropna()
-
-    if len(pair) > 30 and pair["bm"].var() != 0:
-        beta = pair.cov().iloc[0, 1] / pair["bm"].var()
-    else:
-        beta = None
+    # ----------- beta & factor exposure ------------------------------------
+    factors = factor_returns()
+    if benchmark not in factors.columns:
+        # a factor name (e.g. WIG20) is loaded through its proxy ticker
+        proxy = FACTOR_PROXIES.get(benchmark, benchmark)
+        bm_px = load_price_matrix([proxy], fill=False)
+        if proxy in bm_px.columns:
+            bm_ret = session_returns(bm_px)[proxy].rename(benchmark)
+            factors = factors.join(bm_ret, how="outer")
+        else:
+            logger.warning("Benchmark %s (%s) has no price data", benchmark, proxy)
+
+    # portfolio + every position against every factor in one solve
+    assets = returns[tickers].assign(**{PORTFOLIO_COLUMN: port_ret})
+    exposure = regress(assets, factors)
+    pf_exposure = exposure["assets"].get(PORTFOLIO_COLUMN)
+    beta = pf_exposure["betas"].get(benchmark) if pf_exposure else None
 
     # ----------- risk -------------------------------------------------------
     var_95 = np.percentile(port_ret, 5)
@@ -93,9 +93,16 @@ def analyse(
 
     return {
         "weights": {k: round(v, 6) for k, v in weights.items()},
-        "beta": round(beta, 4) if beta is not None else None,
+        "beta": beta,
         "var_95_daily": round(float(var_95), 4),
         "vol_annual": round(float(ann_vol), 4),
         "benchmark_used": benchmark,
         "data_points": int(len(port_ret)),
+        "factor_exposure": {
+            "observations": exposure["observations"],
+            "portfolio": pf_exposure,
+            "positions": {
+                t: e for t, e in exposure["assets"].items() if t != PORTFOLIO_COLUMN
+            },
+        },
     }
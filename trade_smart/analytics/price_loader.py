@@ -0,0 +1,158 @@
+"""
+price_loader – stream MarketData rows into preallocated NumPy buffers
+
+Public functions:
+    load_price_matrix(tickers, *, days=252, field="close", fill=True, dtype=...) -> pd.DataFrame
+    load_ohlcv(ticker, *, days=365, dtype=...) -> pd.DataFrame
+
+Both read through a server-side cursor (``QuerySet.iterator``) in chunks and
+cast prices to float inside Postgres, so no per-row dicts or Decimal objects
+are ever materialised.  Peak memory is the output buffer plus one chunk,
+which keeps multi-year lookbacks over hundreds of tickers affordable.
+Use ``dtype=np.float32`` to halve the buffer for large risk scans.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from itertools import islice
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from trade_smart.models.market_data import MarketData
+
+DEFAULT_CHUNK_SIZE: int = getattr(settings, "PRICE_LOADER_CHUNK_SIZE", 5_000)
+DEFAULT_DTYPE = np.dtype(getattr(settings, "PRICE_LOADER_DTYPE", "float64"))
+
+OHLCV_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+# ------------------------------------------------------------------ #
+# Helpers
+# ------------------------------------------------------------------ #
+def _chunks(iterable: Iterable, size: int):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _ffill(buf: np.ndarray) -> None:
+    """Forward-fill NaNs down each column, in place."""
+    if not buf.size:
+        return
+    rows = np.arange(buf.shape[0])[:, None]
+    idx = np.where(np.isnan(buf), 0, rows)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    buf[:] = buf[idx, np.arange(buf.shape[1])]
+
+
+def _trading_days(tickers: List[str], window: dict, chunk_size: int) -> np.ndarray:
+    """Sorted datetime64[D] array of every date any of *tickers* traded."""
+    qs = (
+        MarketData.objects.filter(ticker__in=tickers, **window)
+        .order_by("date")
+        .values_list("date", flat=True)
+        .distinct()
+    )
+    return np.array(list(qs.iterator(chunk_size=chunk_size)), dtype="datetime64[D]")
+
+
+# ------------------------------------------------------------------ #
+# Public
+# ------------------------------------------------------------------ #
+def load_price_matrix(
+    tickers: List[str],
+    *,
+    days: int = 252,
+    start: dt.date | None = None,
+    end: dt.date | None = None,
+    field: str = "close",
+    fill: bool = True,
+    dtype: np.dtype | str = DEFAULT_DTYPE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
+    """
+    Return a (trading day × ticker) matrix of *field*, aligned on the union
+    of trading days and forward-filled unless ``fill=False`` (then days a
+    ticker did not trade stay NaN).  Tickers without data are dropped.
+    The window is the last *days* calendar days unless *start* is given.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    window = {
+        "date__gte": start or (pd.Timestamp.today() - pd.Timedelta(days=days)).date()
+    }
+    if end is not None:
+        window["date__lte"] = end
+
+    index = _trading_days(tickers, window, chunk_size)
+    if not len(index):
+        return pd.DataFrame()
+
+    col = {t: i for i, t in enumerate(tickers)}
+    buf = np.full((len(index), len(tickers)), np.nan, dtype=dtype)
+    seen = np.zeros(len(tickers), dtype=bool)
+
+    qs = MarketData.objects.filter(ticker__in=tickers, **window).values_list(
+        "ticker", "date", Cast(field, FloatField())
+    )
+    for chunk in _chunks(qs.iterator(chunk_size=chunk_size), chunk_size):
+        syms, dates, values = zip(*chunk)
+        rows = np.searchsorted(index, np.array(dates, dtype="datetime64[D]"))
+        cols = np.fromiter((col[s] for s in syms), dtype=np.intp, count=len(syms))
+        buf[rows, cols] = np.asarray(values, dtype=dtype)
+        seen[cols] = True
+
+    if fill:
+        _ffill(buf)
+    return pd.DataFrame(
+        buf[:, seen],
+        index=pd.DatetimeIndex(index, name="date"),
+        columns=pd.Index([t for t, ok in zip(tickers, seen) if ok], name="ticker"),
+        copy=False,
+    )
+
+
+def load_ohlcv(
+    ticker: str,
+    *,
+    days: int = 365,
+    dtype: np.dtype | str = DEFAULT_DTYPE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
+    """Return OHLCV DataFrame indexed by date for a single *ticker*."""
+    end = dt.date.today()
+    start = end - dt.timedelta(days=days)
+
+    qs = MarketData.objects.filter(ticker=ticker, date__gte=start, date__lte=end)
+    n = qs.count()
+    if not n:
+        return pd.DataFrame()
+
+    index = np.empty(n, dtype="datetime64[D]")
+    buf = np.empty((n, len(OHLCV_FIELDS)), dtype=dtype)
+
+    rows = qs.order_by("date").values_list(
+        "date", *(Cast(f, FloatField()) for f in OHLCV_FIELDS)
+    )
+    pos = 0
+    # rows inserted between count() and the cursor read are simply ignored
+    for chunk in _chunks(rows.iterator(chunk_size=chunk_size), chunk_size):
+        chunk = chunk[: n - pos]
+        dates, *_ = zip(*chunk)
+        index[pos : pos + len(chunk)] = np.array(dates, dtype="datetime64[D]")
+        buf[pos : pos + len(chunk)] = np.asarray([r[1:] for r in chunk], dtype=dtype)
+        pos += len(chunk)
+        if pos >= n:
+            break
+
+    return pd.DataFrame(
+        buf[:pos],
+        index=pd.DatetimeIndex(index[:pos], name="date"),
+        columns=list(OHLCV_FIELDS),
+        copy=False,
+    )
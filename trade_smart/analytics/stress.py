@@ -0,0 +1,369 @@
+"""
+stress – vectorised scenario stress-testing across all portfolios
+
+Public functions:
+    run_stress_tests(scenarios=None, portfolio_ids=None) -> int
+    missing_history(scenarios=None) -> [(ticker, start, end)]
+    current_results(portfolio, as_of=None) -> QuerySet[StressResult]
+    stored_stress(portfolio, as_of=None) -> dict
+    purge(ttl_days=...) -> int
+
+A scenario shocks tickers directly, shocks factors / benchmarks (mapped to
+tickers through the factor loadings of ``factor_exposure``), or replays a
+historical window.  All scenarios are assembled into one (ticker × scenario)
+shock matrix and applied to every portfolio at once:
+
+    pnl (portfolio × scenario) = holdings value (portfolio × ticker) @ shocks
+
+Holdings are valued in ``STRESS_BASE_CURRENCY`` (listing currency from the
+ticker suffix).  A historical window that a held ticker has no prices for
+(and no factor proxy can stand in) is not priced as a zero move: that
+portfolio's result is stored with NULL P/L and a note, and
+``missing_history`` lists the downloads that would fill the gap.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Tuple, Iterable
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, QuerySet
+
+from trade_smart.analytics.factor_exposure import (
+    FACTOR_PROXIES,
+    MIN_OBSERVATIONS,
+    factor_returns,
+    regress,
+)
+from trade_smart.analytics.portfolio_analyser import _price_matrix
+from trade_smart.analytics.price_loader import load_price_matrix
+from trade_smart.models import Portfolio, Position, StressResult
+from trade_smart.services.fx import fx_rate
+
+logger = logging.getLogger(__name__)
+
+# results older than this (relative to the as-of date) are not served
+MAX_AGE_DAYS: int = getattr(settings, "STRESS_MAX_AGE_DAYS", 3)
+# daily rows older than this are deleted
+RETENTION_DAYS: int = getattr(settings, "STRESS_RETENTION_DAYS", 30)
+# P/L currency; positions are converted from their listing currency
+BASE_CURRENCY: str = getattr(settings, "STRESS_BASE_CURRENCY", "USD")
+# ticker suffix -> listing currency (anything else is BASE_CURRENCY)
+LISTING_CURRENCIES: Dict[str, str] = getattr(
+    settings,
+    "STRESS_LISTING_CURRENCIES",
+    {".WA": "PLN", ".PL": "PLN", ".DE": "EUR", ".HA": "EUR", ".F": "EUR"},
+)
+# a window counts as covered if prices exist this close to both of its ends
+WINDOW_SLACK_DAYS = 7
+
+
+# ------------------------------------------------------------------ #
+# Scenarios
+# ------------------------------------------------------------------ #
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    ticker_shocks: Dict[str, float] = field(default_factory=dict)
+    factor_shocks: Dict[str, float] = field(default_factory=dict)
+    window: Tuple[str, str] | None = None  # ISO dates, historical replay
+
+
+DEFAULT_SCENARIOS: List[Scenario] = [
+    Scenario("covid_crash_2020_03", window=("2020-02-19", "2020-03-23")),
+    Scenario("rates_shock_2022", window=("2022-01-03", "2022-10-12")),
+    Scenario("us_equity_-10", factor_shocks={"SPY": -0.10}),
+    Scenario("us_equity_-20", factor_shocks={"SPY": -0.20}),
+    Scenario("tech_selloff", factor_shocks={"QQQ": -0.15, "XLK": -0.18}),
+    Scenario("pl_equity_-15", factor_shocks={"WIG20": -0.15}),
+    Scenario("de_equity_-15", factor_shocks={"DAX": -0.15}),
+    Scenario("oil_spike", factor_shocks={"XLE": 0.20}),
+]
+
+
+def load_scenarios() -> List[Scenario]:
+    """``settings.STRESS_SCENARIOS`` (list of dicts) overrides the defaults."""
+    raw = getattr(settings, "STRESS_SCENARIOS", None)
+    if raw is None:
+        return DEFAULT_SCENARIOS
+    return [
+        Scenario(**{**r, "window": tuple(r["window"]) if r.get("window") else None})
+        for r in raw
+    ]
+
+
+# ------------------------------------------------------------------ #
+# Helpers
+# ------------------------------------------------------------------ #
+def _holdings(
+    portfolio_ids: Iterable[int] | None,
+) -> Tuple[List[int], List[str], np.ndarray]:
+    """Return (portfolio ids, tickers, qty matrix portfolio × ticker)."""
+    qs = Position.objects.all()
+    if portfolio_ids is not None:
+        qs = qs.filter(portfolio_id__in=list(portfolio_ids))
+    rows = list(qs.values_list("portfolio_id", "ticker", "qty"))
+    if not rows:
+        return [], [], np.zeros((0, 0))
+
+    pf_ids = sorted({r[0] for r in rows})
+    tickers = sorted({r[1] for r in rows})
+    p_idx = {p: i for i, p in enumerate(pf_ids)}
+    t_idx = {t: i for i, t in enumerate(tickers)}
+
+    qty = np.zeros((len(pf_ids), len(tickers)))
+    np.add.at(
+        qty,
+        ([p_idx[r[0]] for r in rows], [t_idx[r[1]] for r in rows]),
+        [float(r[2]) for r in rows],
+    )
+    return pf_ids, tickers, qty
+
+
+def _loadings(returns: pd.DataFrame, factors: pd.DataFrame) -> pd.DataFrame:
+    """(ticker × factor) joint loadings; tickers with short history get 0."""
+    usable = returns.loc[:, returns.notna().sum() > MIN_OBSERVATIONS].fillna(0.0)
+    # factor holidays stay NaN: regress drops them instead of reading 0 %
+    exposure = regress(usable, factors)
+    rows = {t: e["loadings"] for t, e in exposure["assets"].items()}
+    return (
+        pd.DataFrame.from_dict(rows, orient="index", columns=factors.columns)
+        .reindex(returns.columns)
+        .astype(float)
+        .fillna(0.0)
+    )
+
+
+def _expand_factor_shocks(shocks: Dict[str, float], cov: pd.DataFrame) -> np.ndarray:
+    """
+    Full factor move given shocks on a subset: unshocked factors take their
+    conditional expectation  f_o = Σ_os Σ_ss⁻¹ f_s.
+    """
+    shocked = [f for f in shocks if f in cov.index]
+    others = [f for f in cov.index if f not in shocks]
+    full = pd.Series(0.0, index=cov.index)
+    if not shocked:
+        return full.to_numpy()
+
+    f_s = np.array([shocks[f] for f in shocked])
+    full[shocked] = f_s
+    if others:
+        sigma_ss = cov.loc[shocked, shocked].to_numpy()
+        full[others] = cov.loc[others, shocked].to_numpy() @ (
+            np.linalg.pinv(sigma_ss) @ f_s
+        )
+    return full.to_numpy()
+
+
+def _currency(ticker: str) -> str:
+    t = ticker.upper()
+    return next(
+        (c for sfx, c in LISTING_CURRENCIES.items() if t.endswith(sfx)), BASE_CURRENCY
+    )
+
+
+def _fx_to_base(tickers: List[str]) -> np.ndarray:
+    """Base-currency value of one unit of each ticker's currency; NaN if unknown."""
+    rates: Dict[str, float] = {}
+    for ccy in {_currency(t) for t in tickers}:
+        try:
+            rates[ccy] = fx_rate(ccy, BASE_CURRENCY)
+        except RuntimeError as exc:
+            logger.warning(
+                "No %s/%s rate for stress tests: %s", ccy, BASE_CURRENCY, exc
+            )
+            rates[ccy] = np.nan
+    return np.array([rates[_currency(t)] for t in tickers])
+
+
+def _window_dates(window: Tuple[str, str]) -> Tuple[dt.date, dt.date]:
+    start, end = (dt.date.fromisoformat(d) for d in window)
+    return start, end
+
+
+def _window_returns(tickers: List[str], window: Tuple[str, str]) -> pd.Series:
+    """
+    Total return per ticker over *window*; NaN unless the ticker has prices
+    within ``WINDOW_SLACK_DAYS`` of both the start and the end.
+    """
+    start, end = _window_dates(window)
+    px = load_price_matrix(tickers, start=start, end=end, fill=False)
+    if px.empty:
+        return pd.Series(np.nan, index=tickers)
+    slack = pd.Timedelta(days=WINDOW_SLACK_DAYS)
+    first = px.apply(pd.Series.first_valid_index)
+    last = px.apply(pd.Series.last_valid_index)
+    covered = (first <= pd.Timestamp(start) + slack) & (
+        last >= pd.Timestamp(end) - slack
+    )
+    ret = px.ffill().iloc[-1] / px.bfill().iloc[0] - 1.0
+    return ret.where(covered).reindex(tickers)
+
+
+def _shock_matrix(
+    tickers: List[str],
+    scenarios: List[Scenario],
+    loadings: pd.DataFrame,
+    factor_cov: pd.DataFrame,
+) -> np.ndarray:
+    """
+    (ticker × scenario) matrix of simple returns; NaN where a historical
+    window has neither the ticker's own prices nor any factor proxy's.
+    """
+    B = loadings.to_numpy()
+    proxy_names = {t: n for n, t in FACTOR_PROXIES.items()}
+    shocks = np.zeros((len(tickers), len(scenarios)))
+
+    for j, sc in enumerate(scenarios):
+        col = np.zeros(len(tickers))
+        if sc.factor_shocks:
+            col += B @ _expand_factor_shocks(sc.factor_shocks, factor_cov)
+
+        if sc.window:
+            hist = _window_returns(tickers + list(proxy_names), sc.window)
+            fwin = hist[list(proxy_names)].rename(index=proxy_names).dropna()
+            if fwin.empty:
+                implied = np.full(len(tickers), np.nan)
+            else:
+                implied = B @ _expand_factor_shocks(fwin.to_dict(), factor_cov)
+            observed = hist[tickers].to_numpy()
+            col += np.where(np.isnan(observed), implied, observed)
+
+        for t, s in sc.ticker_shocks.items():
+            if t in loadings.index:
+                col[loadings.index.get_loc(t)] = s
+        shocks[:, j] = col
+    return shocks
+
+
+# ------------------------------------------------------------------ #
+# Public
+# ------------------------------------------------------------------ #
+def run_stress_tests(
+    scenarios: List[Scenario] | None = None,
+    portfolio_ids: Iterable[int] | None = None,
+) -> int:
+    """Evaluate *scenarios* for every portfolio and upsert StressResult rows."""
+    scenarios = scenarios or load_scenarios()
+    pf_ids, tickers, qty = _holdings(portfolio_ids)
+    if not pf_ids or not scenarios:
+        return 0
+
+    prices = _price_matrix(tickers).reindex(columns=tickers)
+    if prices.empty:
+        logger.warning("No prices for stress universe, skipping.")
+        return 0
+
+    factors = factor_returns()
+    loadings = _loadings(prices.pct_change().iloc[1:], factors)
+    shocks = _shock_matrix(tickers, scenarios, loadings, factors.cov())
+
+    # portfolio × ticker, in the base currency
+    fx = _fx_to_base(tickers)
+    values = qty * np.nan_to_num(prices.iloc[-1].to_numpy()) * fx
+    held = qty != 0
+    no_fx = held @ np.isnan(fx)  # per portfolio
+    unpriced = held.astype(float) @ np.isnan(shocks)  # portfolio × scenario
+    values = np.nan_to_num(values)
+    total = values.sum(axis=1)
+    pnl = values @ np.nan_to_num(shocks)  # portfolio × scenario
+    pnl_pct = np.divide(
+        pnl, total[:, None], out=np.zeros_like(pnl), where=total[:, None] > 0
+    )
+
+    def _result(i: int, j: int) -> Dict[str, object]:
+        if no_fx[i]:
+            note = f"no FX rate to {BASE_CURRENCY}"
+        elif unpriced[i, j]:
+            note = f"no price history for {int(unpriced[i, j])} holdings"
+        else:
+            return {
+                "pnl_pct": Decimal(str(round(float(pnl_pct[i, j]), 4))),
+                "pnl_value": Decimal(str(round(float(pnl[i, j]), 2))),
+            }
+        return {"pnl_pct": None, "pnl_value": None, "note": note}
+
+    today = dt.date.today()
+    objects = [
+        StressResult(portfolio_id=pf_id, scenario=sc.name, as_of=today, **_result(i, j))
+        for i, pf_id in enumerate(pf_ids)
+        for j, sc in enumerate(scenarios)
+    ]
+    with transaction.atomic():
+        StressResult.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            update_fields=["pnl_pct", "pnl_value", "note", "modified"],
+            unique_fields=["portfolio", "scenario", "as_of"],
+        )
+        # scenarios no longer configured would otherwise linger forever
+        StressResult.objects.filter(portfolio_id__in=pf_ids).exclude(
+            scenario__in=[sc.name for sc in scenarios]
+        ).delete()
+    logger.info(
+        "Stress-tested %d portfolios × %d scenarios", len(pf_ids), len(scenarios)
+    )
+    return len(objects)
+
+
+def missing_history(
+    scenarios: List[Scenario] | None = None,
+) -> List[Tuple[str, dt.date, dt.date]]:
+    """
+    (ticker, start, end) downloads that would let the historical windows of
+    *scenarios* be replayed for every held ticker and factor proxy.
+    """
+    tickers = sorted(
+        set(Position.objects.values_list("ticker", flat=True))
+        | set(FACTOR_PROXIES.values())
+    )
+    slack = dt.timedelta(days=WINDOW_SLACK_DAYS)
+    missing = []
+    for sc in scenarios or load_scenarios():
+        if not sc.window or not tickers:
+            continue
+        start, end = _window_dates(sc.window)
+        hist = _window_returns(tickers, sc.window)
+        missing += [(t, start - slack, end + slack) for t in hist[hist.isna()].index]
+    return missing
+
+
+def current_results(
+    portfolio: Portfolio, as_of: dt.date | None = None
+) -> QuerySet[StressResult]:
+    """
+    Rows of *portfolio*'s latest stress run on or before *as_of* (default
+    today); empty when that run is more than ``STRESS_MAX_AGE_DAYS`` old.
+    """
+    as_of = as_of or dt.date.today()
+    window = portfolio.stress_results.filter(
+        as_of__lte=as_of, as_of__gte=as_of - dt.timedelta(days=MAX_AGE_DAYS)
+    )
+    latest = window.aggregate(latest=Max("as_of"))["latest"]
+    return window.filter(as_of=latest) if latest else window.none()
+
+
+def stored_stress(
+    portfolio: Portfolio, as_of: dt.date | None = None
+) -> Dict[str, float]:
+    """Scenario P/L (fraction of portfolio value) of the current run."""
+    return {
+        name: float(pct)
+        for name, pct in current_results(portfolio, as_of)
+        .filter(pnl_pct__isnull=False)
+        .values_list("scenario", "pnl_pct")
+    }
+
+
+def purge(ttl_days: int = RETENTION_DAYS) -> int:
+    """Delete daily results older than *ttl_days*."""
+    cutoff = dt.date.today() - dt.timedelta(days=ttl_days)
+    deleted, _ = StressResult.objects.filter(as_of__lt=cutoff).delete()
+    return deleted
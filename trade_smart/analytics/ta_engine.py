@@ -12,14 +12,12 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from datetime import date, timedelta
 from typing import List
 
 import pandas as pd
-import pandas_ta as ta
 
+from trade_smart.analytics.price_loader import load_ohlcv
 from trade_smart.helpers.helpers import _to_records
-from trade_smart.models.market_data import MarketData
 
 logger = logging.getLogger(__name__)
 
@@ -40,22 +38,7 @@ class TechnicalIndicator:
 # ------------------------------------------------------------------ #
 def _load_ohlcv(ticker: str, *, days: int = 365) -> pd.DataFrame:
     """Return OHLCV DataFrame indexed by date."""
-    end = date.today()
-    start = end - timedelta(days=days)
-
-    qs = (
-        MarketData.objects.filter(
-            ticker=ticker,
-            date__gte=start,
-            date__lte=end,
-        )
-        .values("date", "open", "high", "low", "close", "volume")
-        .order_by("date")
-    )
-    if not qs:
-        return pd.DataFrame()
-
-    return pd.DataFrame.from_records(qs).set_index("date").astype(float)
+    return load_ohlcv(ticker, days=days)
 
 
 # ------------------------------------------------------------------ #
@@ -79,6 +62,8 @@ def calculate_indicators(ticker: str) -> List[TechnicalIndicator]:
     )
 
     # ---------------- indicator calculations ----------------------- #
+    import pandas_ta as ta
+
     results = {
         # ── Trend
         "SMA_50": ta.sma(close, length=50),
@@ -0,0 +1,70 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from django.core.management import BaseCommand
+
+from trade_smart.analytics.price_loader import load_price_matrix
+from trade_smart.models import MarketData
+
+
+def _legacy_price_matrix(tickers, days):
+    """The previous from_records/pivot implementation, kept for comparison."""
+    qs = MarketData.objects.filter(
+        ticker__in=tickers,
+        date__gte=pd.Timestamp.today() - pd.Timedelta(days=days),
+    ).values("ticker", "date", "close")
+    df = pd.DataFrame.from_records(qs)
+    if df.empty:
+        return pd.DataFrame()
+    df["close"] = df["close"].astype(float)
+    return (
+        df.pivot(index="date", columns="ticker", values="close")
+        .sort_index()
+        .ffill()
+        .astype(float)
+    )
+
+
+def _measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    df = fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return df.shape, elapsed, peak / 2**20
+
+
+class Command(BaseCommand):
+    help = "Compare peak memory / wall time of the legacy and streaming price loaders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=3650)
+        parser.add_argument("--tickers", type=int, default=500)
+
+    def handle(self, *args, **options):
+        days, limit = options["days"], options["tickers"]
+        tickers = list(
+            MarketData.objects.values_list("ticker", flat=True)
+            .distinct()
+            .order_by("ticker")[:limit]
+        )
+        self.stdout.write(f"{len(tickers)} tickers, {days} days lookback")
+
+        runs = {
+            "legacy from_records": lambda: _legacy_price_matrix(tickers, days),
+            "streaming float64": lambda: load_price_matrix(
+                tickers, days=days, dtype=np.float64
+            ),
+            "streaming float32": lambda: load_price_matrix(
+                tickers, days=days, dtype=np.float32
+            ),
+        }
+        for name, fn in runs.items():
+            shape, elapsed, peak_mib = _measure(fn)
+            self.stdout.write(
+                f"{name:<22} shape={shape!s:<14} "
+                f"time={elapsed:7.2f}s  peak={peak_mib:8.1f} MiB"
+            )
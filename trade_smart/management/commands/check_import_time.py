@@ -0,0 +1,70 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+# "import time: self [us] | cumulative | imported package"
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+DEFAULT_MODULES = ("trade_smart.tasks",)
+DEFAULT_BUDGET_MS: float = getattr(settings, "IMPORT_TIME_BUDGET_MS", 1500)
+
+
+def _importtime(modules) -> dict[str, tuple[int, int, int]]:
+    """{module: (self us, cumulative us, depth)} for a fresh interpreter."""
+    code = "import django; django.setup()" + "".join(f"; import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+    )
+    if proc.returncode:
+        raise CommandError(proc.stderr.strip().splitlines()[-1])
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if m := _LINE.match(line):
+            depth = (len(m.group(3)) - 1) // 2
+            timings[m.group(4)] = (int(m.group(1)), int(m.group(2)), depth)
+    return timings
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the cold-import cost of MODULES on top of django.setup() "
+        "with -X importtime and fail when it exceeds the budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+        parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+        parser.add_argument("--top", type=int, default=15)
+
+    def handle(self, *args, **options):
+        baseline = _importtime([])
+        timings = _importtime(options["modules"])
+        added = {m: t for m, t in timings.items() if m not in baseline}
+        total_ms = sum(t[0] for t in added.values()) / 1000
+
+        self.stdout.write(f"{'module':<60}{'cumulative ms':>15}")
+        top_level = sorted(
+            ((m, t[1]) for m, t in added.items() if t[2] == 0),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        for module, cumulative in top_level[: options["top"]]:
+            self.stdout.write(f"{module:<60}{cumulative / 1000:>15.1f}")
+        self.stdout.write(
+            f"\n{len(added)} modules, {total_ms:.0f} ms "
+            f"(budget {options['budget_ms']:.0f} ms)"
+        )
+
+        if total_ms > options["budget_ms"]:
+            raise CommandError(
+                f"Import time {total_ms:.0f} ms exceeds budget "
+                f"{options['budget_ms']:.0f} ms"
+            )
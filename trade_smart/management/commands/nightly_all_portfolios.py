@@ -1,7 +1,7 @@
 from django.core.management import BaseCommand
 from django.db import transaction
 
-from trade_smart.agent_service.runner import graph
+from trade_smart.agent_service.runner import get_graph
 from trade_smart.models import Position, MarketData, Portfolio, Advice
 from trade_smart.tasks import (
     nightly_all_portfolios,
@@ -33,7 +33,7 @@ class Command(BaseCommand):
 def advice_for_ticker(ticker):
     pf = Portfolio.objects.get(id=1)
     try:
-        state = graph.invoke({"ticker": ticker, "portfolio": pf})
+        state = get_graph().invoke({"ticker": ticker, "portfolio": pf})
         adv = state["advice"]
         Advice.objects.update_or_create(
             portfolio=pf,
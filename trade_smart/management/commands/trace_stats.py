@@ -0,0 +1,38 @@
+import datetime as dt
+
+from django.core.management import BaseCommand
+
+from trade_smart.services.tracing import node_percentiles
+
+
+class Command(BaseCommand):
+    help = "Print per-node latency percentiles and cost totals from NodeTrace."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=24)
+        parser.add_argument("--graph", choices=["advice", "proposition"])
+
+    def handle(self, *args, **options):
+        stats = node_percentiles(
+            since=dt.timedelta(hours=options["hours"]), graph=options["graph"]
+        )
+        if not stats:
+            self.stdout.write("No traces in window.")
+            return
+
+        header = (
+            f"{'graph.node':<26}{'n':>7}{'p50ms':>9}{'p90ms':>9}{'p99ms':>9}"
+            f"{'db':>7}{'db_ms':>9}{'http':>6}{'http_ms':>9}"
+            f"{'tok_in':>9}{'tok_out':>8}{'hit/miss':>10}"
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for s in stats:
+            self.stdout.write(
+                f"{s['graph'] + '.' + s['node']:<26}{s['count']:>7}"
+                f"{s['p50_ms']:>9.0f}{s['p90_ms']:>9.0f}{s['p99_ms']:>9.0f}"
+                f"{s['db_queries']:>7}{s['db_ms']:>9.0f}"
+                f"{s['http_calls']:>6}{s['http_ms']:>9.0f}"
+                f"{s['llm_prompt_tokens']:>9}{s['llm_completion_tokens']:>8}"
+                f"{str(s['cache_hits']) + '/' + str(s['cache_misses']):>10}"
+            )
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:30
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trade_smart", "0013_advice_portfolio"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StressResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="created",
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="modified",
+                    ),
+                ),
+                ("scenario", models.CharField(max_length=64)),
+                ("as_of", models.DateField()),
+                ("pnl_pct", models.DecimalField(decimal_places=4, max_digits=8)),
+                ("pnl_value", models.DecimalField(decimal_places=2, max_digits=20)),
+                (
+                    "portfolio",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stress_results",
+                        to="trade_smart.portfolio",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("scenario",),
+                "unique_together": {("portfolio", "scenario")},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:05
+
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trade_smart", "0014_stressresult"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GraphCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="created",
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="modified",
+                    ),
+                ),
+                ("run_id", models.CharField(max_length=64)),
+                ("portfolio_id", models.BigIntegerField(blank=True, null=True)),
+                ("ticker", models.CharField(max_length=25)),
+                ("node", models.CharField(max_length=32)),
+                ("output", models.JSONField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["created"], name="trade_smart_created_d12882_idx"
+                    )
+                ],
+                "unique_together": {("run_id", "portfolio_id", "ticker", "node")},
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:40
+
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trade_smart", "0015_graphcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NodeTrace",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="created",
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="modified",
+                    ),
+                ),
+                ("graph", models.CharField(max_length=32)),
+                ("node", models.CharField(max_length=32)),
+                ("run_id", models.CharField(blank=True, default="", max_length=64)),
+                ("ticker", models.CharField(blank=True, default="", max_length=25)),
+                ("portfolio_id", models.BigIntegerField(blank=True, null=True)),
+                ("wall_ms", models.FloatField()),
+                ("db_queries", models.PositiveIntegerField(default=0)),
+                ("db_ms", models.FloatField(default=0)),
+                ("http_calls", models.PositiveIntegerField(default=0)),
+                ("http_ms", models.FloatField(default=0)),
+                ("llm_calls", models.PositiveIntegerField(default=0)),
+                ("llm_prompt_tokens", models.PositiveIntegerField(default=0)),
+                ("llm_completion_tokens", models.PositiveIntegerField(default=0)),
+                ("cache_hits", models.PositiveIntegerField(default=0)),
+                ("cache_misses", models.PositiveIntegerField(default=0)),
+                ("error", models.CharField(blank=True, default="", max_length=200)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["graph", "node", "created"],
+                        name="trade_smart_graph_95b134_idx",
+                    ),
+                    models.Index(
+                        fields=["created"], name="trade_smart_created_a3362d_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trade_smart", "0016_nodetrace"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="advice",
+            name="fingerprint",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
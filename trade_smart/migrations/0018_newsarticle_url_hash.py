@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:10
+
+import hashlib
+from urllib.parse import urldefrag
+
+from django.db import migrations, models
+
+
+def fill_url_hash(apps, schema_editor):
+    NewsArticle = apps.get_model("trade_smart", "NewsArticle")
+    batch = []
+    for article in NewsArticle.objects.only("id", "url").iterator(chunk_size=2000):
+        article.url_hash = hashlib.sha1(
+            urldefrag(article.url.strip())[0].encode()
+        ).hexdigest()
+        batch.append(article)
+        if len(batch) >= 2000:
+            NewsArticle.objects.bulk_update(batch, ["url_hash"])
+            batch = []
+    NewsArticle.objects.bulk_update(batch, ["url_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trade_smart", "0017_advice_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newsarticle",
+            name="url_hash",
+            field=models.CharField(blank=True, default="", max_length=40),
+        ),
+        migrations.RunPython(fill_url_hash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="newsarticle",
+            index=models.Index(
+                fields=["url_hash", "published_at"],
+                name="trade_smart_url_has_82c683_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:20
+
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trade_smart", "0018_newsarticle_url_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HeadlineSentiment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="created",
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="modified",
+                    ),
+                ),
+                ("text_hash", models.CharField(max_length=40, unique=True)),
+                ("headline", models.TextField()),
+                ("score", models.DecimalField(decimal_places=3, max_digits=4)),
+                (
+                    "summary",
+                    models.CharField(blank=True, default="", max_length=200),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["modified"], name="trade_smart_modifie_cc98f3_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trade_smart", "0019_headlinesentiment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newsarticle",
+            name="indexed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="newsarticle",
+            index=models.Index(
+                condition=models.Q(("indexed_at__isnull", True)),
+                fields=["id"],
+                name="newsarticle_unindexed_idx",
+            ),
+        ),
+    ]
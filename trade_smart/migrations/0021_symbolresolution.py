@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:40
+
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trade_smart", "0020_newsarticle_indexed_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SymbolResolution",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="created",
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="modified",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200)),
+                ("normalized_name", models.CharField(max_length=200, unique=True)),
+                ("ticker", models.CharField(max_length=12)),
+                ("source", models.CharField(max_length=16)),
+                ("confidence", models.FloatField(default=1.0)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:10
+
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trade_smart", "0021_symbolresolution"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EtfConstituents",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="created",
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="modified",
+                    ),
+                ),
+                ("symbol", models.CharField(max_length=12, unique=True)),
+                ("holdings", models.JSONField(default=list)),
+                ("is_etf", models.BooleanField(default=False)),
+                ("fetched_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name_plural": "ETF constituents",
+            },
+        ),
+    ]
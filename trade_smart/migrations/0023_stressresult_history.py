@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trade_smart", "0022_etfconstituents"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="stressresult",
+            unique_together={("portfolio", "scenario", "as_of")},
+        ),
+        migrations.AddField(
+            model_name="stressresult",
+            name="note",
+            field=models.CharField(blank=True, default="", max_length=200),
+        ),
+        migrations.AlterField(
+            model_name="stressresult",
+            name="pnl_pct",
+            field=models.DecimalField(decimal_places=4, max_digits=8, null=True),
+        ),
+        migrations.AlterField(
+            model_name="stressresult",
+            name="pnl_value",
+            field=models.DecimalField(decimal_places=2, max_digits=20, null=True),
+        ),
+    ]
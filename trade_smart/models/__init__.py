@@ -8,3 +8,9 @@ from .advice import *
 from .news_article import *
 from .llm_sentiment import *
 from .inwestement_goal import *
+from .stress_result import *
+from .graph_checkpoint import *
+from .node_trace import *
+from .headline_sentiment import *
+from .symbol_resolution import *
+from .etf_constituents import *
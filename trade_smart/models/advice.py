@@ -21,6 +21,8 @@ class Advice(TimeStampedModel):
     confidence = models.DecimalField(max_digits=5, decimal_places=2)
     rationale = models.TextField()
     weight_pct = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    # hash of the quantized synth inputs this advice was generated from
+    fingerprint = models.CharField(max_length=64, blank=True, default="")
 
     def __str__(self):
         return f"{self.action} {self.ticker} for {self.user.username}"
@@ -0,0 +1,17 @@
+from django.db import models
+from model_utils.models import TimeStampedModel
+
+
+class EtfConstituents(TimeStampedModel):
+    """Last fetched top holdings of a symbol; empty = not an ETF."""
+
+    symbol = models.CharField(max_length=12, unique=True)
+    holdings = models.JSONField(default=list)  # [[ticker, weight 0-1], …]
+    is_etf = models.BooleanField(default=False)
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "ETF constituents"
+
+    def __str__(self):
+        return f"{self.symbol} ({len(self.holdings)} holdings)"
@@ -0,0 +1,19 @@
+from django.db import models
+from model_utils.models import TimeStampedModel
+
+
+class GraphCheckpoint(TimeStampedModel):
+    """Output of one completed advice-graph node, so a rerun can skip it."""
+
+    run_id = models.CharField(max_length=64)
+    portfolio_id = models.BigIntegerField(null=True, blank=True)
+    ticker = models.CharField(max_length=25)
+    node = models.CharField(max_length=32)
+    output = models.JSONField()
+
+    class Meta:
+        unique_together = ("run_id", "portfolio_id", "ticker", "node")
+        indexes = [models.Index(fields=["created"])]
+
+    def __str__(self):
+        return f"{self.run_id} {self.portfolio_id}/{self.ticker} {self.node}"
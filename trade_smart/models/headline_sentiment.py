@@ -0,0 +1,28 @@
+import hashlib
+import re
+
+from django.db import models
+from model_utils.models import TimeStampedModel
+
+_NON_WORD = re.compile(r"\W+")
+
+
+class HeadlineSentiment(TimeStampedModel):
+    """LLM score of one headline, shared by every ticker that carries it."""
+
+    # sha1 of the normalised headline text (see ``hash_text``)
+    text_hash = models.CharField(max_length=40, unique=True)
+    headline = models.TextField()
+    score = models.DecimalField(max_digits=4, decimal_places=3)
+    summary = models.CharField(max_length=200, blank=True, default="")
+
+    class Meta:
+        indexes = [models.Index(fields=["modified"])]
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        normalised = _NON_WORD.sub(" ", text.lower()).strip()
+        return hashlib.sha1(normalised.encode()).hexdigest()
+
+    def __str__(self):
+        return f"{self.score} {self.headline[:60]}"
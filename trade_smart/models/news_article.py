@@ -1,3 +1,6 @@
+import hashlib
+from urllib.parse import urldefrag
+
 from django.db import models
 from model_utils.models import TimeStampedModel
 
@@ -7,11 +10,32 @@ class NewsArticle(TimeStampedModel):
     headline = models.TextField()
     source = models.CharField(max_length=60)
     url = models.URLField(max_length=300)
+    # sha1 of the de-fragmented url; compact key for the seen-URL index
+    url_hash = models.CharField(max_length=40, blank=True, default="")
     body = models.TextField(null=True, blank=True)
     published_at = models.DateTimeField(db_index=True)
     sentiment = models.DecimalField(max_digits=4, decimal_places=3, null=True)
+    # set once embedded into the Chroma index (see data_providers.news_index)
+    indexed_at = models.DateTimeField(null=True, blank=True)
 
     # we keep vector only in Chroma → not in SQL
     class Meta:
-        indexes = [models.Index(fields=["ticker", "-published_at"])]
+        indexes = [
+            models.Index(fields=["ticker", "-published_at"]),
+            models.Index(fields=["url_hash", "published_at"]),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(indexed_at__isnull=True),
+                name="newsarticle_unindexed_idx",
+            ),
+        ]
         unique_together = ("url", "published_at")
+
+    @staticmethod
+    def hash_url(url: str) -> str:
+        return hashlib.sha1(urldefrag(url.strip())[0].encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        if self.url and not self.url_hash:
+            self.url_hash = self.hash_url(self.url)
+        super().save(*args, **kwargs)
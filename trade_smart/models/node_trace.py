@@ -0,0 +1,33 @@
+from django.db import models
+from model_utils.models import TimeStampedModel
+
+
+class NodeTrace(TimeStampedModel):
+    """Cost of one graph-node execution (see services.tracing)."""
+
+    graph = models.CharField(max_length=32)  # "advice" | "proposition"
+    node = models.CharField(max_length=32)
+    run_id = models.CharField(max_length=64, blank=True, default="")
+    ticker = models.CharField(max_length=25, blank=True, default="")
+    portfolio_id = models.BigIntegerField(null=True, blank=True)
+
+    wall_ms = models.FloatField()
+    db_queries = models.PositiveIntegerField(default=0)
+    db_ms = models.FloatField(default=0)
+    http_calls = models.PositiveIntegerField(default=0)
+    http_ms = models.FloatField(default=0)
+    llm_calls = models.PositiveIntegerField(default=0)
+    llm_prompt_tokens = models.PositiveIntegerField(default=0)
+    llm_completion_tokens = models.PositiveIntegerField(default=0)
+    cache_hits = models.PositiveIntegerField(default=0)
+    cache_misses = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=200, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["graph", "node", "created"]),
+            models.Index(fields=["created"]),
+        ]
+
+    def __str__(self):
+        return f"{self.graph}.{self.node} {self.wall_ms:.0f}ms"
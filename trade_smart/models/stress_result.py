@@ -0,0 +1,28 @@
+from django.db import models
+from model_utils.models import TimeStampedModel
+
+from trade_smart.models import Portfolio
+
+
+class StressResult(TimeStampedModel):
+    """
+    Outcome of one stress scenario for one portfolio on one day, in the
+    base currency.  P/L is NULL (with ``note`` saying why) when the
+    scenario could not be priced for the portfolio.
+    """
+
+    portfolio = models.ForeignKey(
+        Portfolio, related_name="stress_results", on_delete=models.CASCADE
+    )
+    scenario = models.CharField(max_length=64)
+    as_of = models.DateField()
+    pnl_pct = models.DecimalField(max_digits=8, decimal_places=4, null=True)
+    pnl_value = models.DecimalField(max_digits=20, decimal_places=2, null=True)
+    note = models.CharField(max_length=200, blank=True, default="")
+
+    class Meta:
+        unique_together = ("portfolio", "scenario", "as_of")
+        ordering = ("scenario",)
+
+    def __str__(self):
+        return f"{self.portfolio_id} {self.scenario}: {self.pnl_pct}"
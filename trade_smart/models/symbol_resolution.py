@@ -0,0 +1,16 @@
+from django.db import models
+from model_utils.models import TimeStampedModel
+
+
+class SymbolResolution(TimeStampedModel):
+    """Ticker of an ETF holding reported by name (e.g. 'Nvidia Corp')."""
+
+    name = models.CharField(max_length=200)
+    # see data_providers.symbols.normalize
+    normalized_name = models.CharField(max_length=200, unique=True)
+    ticker = models.CharField(max_length=12)
+    source = models.CharField(max_length=16)  # "llm" | "manual" | provider
+    confidence = models.FloatField(default=1.0)
+
+    def __str__(self):
+        return f"{self.name} → {self.ticker}"
@@ -1,5 +1,4 @@
 import logging
-from yahooquery import Ticker
 import pandas as pd
 
 logger = logging.getLogger(__name__)
@@ -11,6 +10,8 @@ def quick_filter(state):
         logger.info("No symbols to filter.")
         return {"filtered_tickers": []}
 
+    from yahooquery import Ticker
+
     logger.info(f"Starting quick filter for {len(symbols)} candidates...")
     tk = Ticker(symbols, asynchronous=True)
 
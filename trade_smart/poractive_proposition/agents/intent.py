@@ -4,6 +4,7 @@ from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 
 
+from trade_smart.services import deadline
 from trade_smart.services.llm import get_llm
 
 logger = logging.getLogger(__name__)
@@ -17,7 +18,7 @@ class Intent(BaseModel):
 
 
 def _model():
-    return get_llm()
+    return get_llm(timeout=deadline.timeout(deadline.LLM_TIMEOUT))
 
 
 _parser = PydanticOutputParser(pydantic_object=Intent)
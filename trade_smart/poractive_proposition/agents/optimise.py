@@ -1,12 +1,12 @@
 import logging
-from yahooquery import Ticker
-from pypfopt import EfficientFrontier, risk_models, expected_returns
 
 logger = logging.getLogger(__name__)
 
 
 def _build_frontier(mu, S, max_weight):
     """Utility helper so we don’t repeat the same two lines everywhere."""
+    from pypfopt import EfficientFrontier
+
     ef = EfficientFrontier(mu, S)
     ef.add_constraint(lambda w: w <= max_weight)
     return ef
@@ -20,6 +20,9 @@ def optimise_portfolio(state):
 
     logger.info("Optimising portfolio for %d symbols …", len(symbols))
 
+    from pypfopt import expected_returns, risk_models
+    from yahooquery import Ticker
+
     # -------------------- price matrix --------------------
     tk = Ticker(symbols)
     prices = (
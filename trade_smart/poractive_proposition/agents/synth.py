@@ -3,6 +3,7 @@ from typing import List
 from pydantic import BaseModel, Field, RootModel
 from langchain.output_parsers import PydanticOutputParser
 from langchain.prompts import ChatPromptTemplate
+from trade_smart.services import deadline
 from trade_smart.services.llm import get_llm
 
 
@@ -39,7 +40,7 @@ User:
 
 
 def synthesise_proposal(state: dict) -> dict:
-    llm = get_llm()
+    llm = get_llm(timeout=deadline.timeout(deadline.LLM_TIMEOUT))
     prompt = PROMPT_TMPL.format(
         format_instructions=parser.get_format_instructions(),
         date=datetime.date.today(),
@@ -11,6 +11,8 @@ from trade_smart.poractive_proposition.agents.screener import (
     screener_agent,
 )
 from trade_smart.poractive_proposition.agents.synth import synthesise_proposal
+from trade_smart.services.deadline import budgeted
+from trade_smart.services.tracing import traced
 
 
 # ─── state schema ────────────────────────────────────────────
@@ -22,17 +24,23 @@ class ProactivePropositionState(TypedDict):
     optimised_portfolio: Dict[str, Any]
     converted_amount: float
     proposal: str
+    deadline: float  # epoch seconds; see services.deadline
+
+
+def _node(name, fn):
+    # sequential request path: a node never starts past the deadline
+    return budgeted(traced("proposition", name, fn), strict=True)
 
 
 def build_graph():
     sg = StateGraph(ProactivePropositionState)
 
-    sg.add_node("parse", parse_intent)
-    sg.add_node("screener", screener_agent)
-    sg.add_node("filter", quick_filter)
-    sg.add_node("optimise", optimise_portfolio)
-    sg.add_node("fx", convert_amount)
-    sg.add_node("synth", synthesise_proposal)
+    sg.add_node("parse", _node("parse", parse_intent))
+    sg.add_node("screener", _node("screener", screener_agent))
+    sg.add_node("filter", _node("filter", quick_filter))
+    sg.add_node("optimise", _node("optimise", optimise_portfolio))
+    sg.add_node("fx", _node("fx", convert_amount))
+    sg.add_node("synth", _node("synth", synthesise_proposal))
 
     sg.set_entry_point("parse")
 
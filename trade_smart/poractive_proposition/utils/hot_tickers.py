@@ -13,6 +13,7 @@ from typing import List, Optional
 
 import requests
 import pandas as pd  # already in requirements
+from trade_smart.services import deadline
 from trade_smart.utils.tools import _cache_get, _cache_set  # keep!
 
 logger = logging.getLogger(__name__)
@@ -38,7 +39,9 @@ def _http_get_json(url: str, params: dict, ttl: int = 900) -> list[dict]:
 
     for attempt in range(1, 4):  # at most 3 tries
         try:
-            r = requests.get(url, params=params, headers=_HEADERS, timeout=10)
+            r = requests.get(
+                url, params=params, headers=_HEADERS, timeout=deadline.timeout(10)
+            )
             if r.status_code in (429, 500, 502, 503, 504):
                 raise requests.HTTPError(f"{r.status_code} from {url}", response=r)
             r.raise_for_status()
@@ -47,9 +50,11 @@ def _http_get_json(url: str, params: dict, ttl: int = 900) -> list[dict]:
             return data
         except Exception as exc:
             logger.warning("GET %s (try %s/3) failed: %s", url, attempt, exc)
+            if deadline.low(5):
+                break  # no budget left for another try
             time.sleep(1.5 * attempt + random.uniform(0, 0.3))
 
-    raise RuntimeError(f"GET {url} failed after 3 attempts")
+    raise RuntimeError(f"GET {url} failed after {attempt} attempts")
 
 
 # ---------------------------------------------------------------------------
@@ -81,7 +86,7 @@ def get_hot_tickers(limit: int = 120) -> List[str]:
         if cached := _cache_get(cache_key):
             return json.loads(cached)
 
-        r = requests.get(_STOOQ_URL, headers=_HEADERS, timeout=10)
+        r = requests.get(_STOOQ_URL, headers=_HEADERS, timeout=deadline.timeout(10))
         r.raise_for_status()
         import io
 
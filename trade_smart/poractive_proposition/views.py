@@ -8,6 +8,7 @@ from rest_framework.response import Response
 
 from trade_smart.models import InvestmentGoal
 from trade_smart.poractive_proposition.graph import build_graph
+from trade_smart.services import deadline
 from trade_smart.poractive_proposition.serializers import (
     InvestmentGoalSerializer,
     ProposalRequestSerializer,
@@ -36,9 +37,17 @@ def propose(request):
         logger.info(f"Received request with data: {serializer.validated_data}")
         graph = build_graph()
         try:
-            output = graph.invoke({"user_request": serializer.validated_data})
+            output = graph.invoke(
+                {
+                    "user_request": serializer.validated_data,
+                    "deadline": deadline.start(deadline.PROPOSE_DEADLINE),
+                }
+            )
             logger.info(f"Successfully processed request with output: {output}")
             return Response(output)
+        except deadline.DeadlineExceeded as exc:
+            logger.warning(f"Proposal ran out of time: {exc}")
+            return Response({"error": str(exc)}, status=504)
         except Exception as exc:
             logger.error(f"Error processing request: {exc}", exc_info=True)
             return Response({"error": str(exc)}, status=500)
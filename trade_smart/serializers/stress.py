@@ -0,0 +1,9 @@
+from rest_framework import serializers
+
+from trade_smart.models import StressResult
+
+
+class StressResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StressResult
+        fields = ("scenario", "as_of", "pnl_pct", "pnl_value", "note")
@@ -0,0 +1,112 @@
+"""
+deadline – per-run time budget shared by graph nodes and external calls
+
+A run gets an absolute deadline (``start``) that travels in the graph state
+under ``deadline``.  ``budgeted`` makes it the active deadline while a node
+runs, and every outbound call sizes its own timeout with ``timeout(cap)``:
+the call's usual timeout, shortened to what is left of the run.  Nodes
+check ``low(seconds)`` to degrade (skip optional work, use cached data)
+instead of overrunning.
+
+Usage:
+    with use(start(PROPOSE_DEADLINE)):
+        requests.get(url, timeout=timeout(8))
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import inspect
+import time
+from typing import Any, Callable, Dict, Iterator
+
+from django.conf import settings
+
+# seconds per position (advice graph) / per request (proposition graph)
+ADVICE_DEADLINE: float = getattr(settings, "ADVICE_DEADLINE_S", 120)
+PROPOSE_DEADLINE: float = getattr(settings, "PROPOSE_DEADLINE_S", 90)
+# default cap for LLM calls, before the remaining budget is applied
+LLM_TIMEOUT: float = getattr(settings, "LLM_TIMEOUT_S", 60)
+# never hand a client less than this, it would fail for no benefit
+MIN_TIMEOUT: float = 1.0
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "run_deadline", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def start(seconds: float) -> float:
+    """Absolute (epoch) deadline *seconds* from now; survives JSON / threads."""
+    return time.time() + seconds
+
+
+def current() -> float | None:
+    return _deadline.get()
+
+
+def remaining() -> float | None:
+    """Seconds left in the active budget, or None when no budget is set."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.time()
+
+
+def low(seconds: float) -> bool:
+    left = remaining()
+    return left is not None and left < seconds
+
+
+def timeout(cap: float) -> float:
+    """*cap* shortened to the remaining budget (at least ``MIN_TIMEOUT``)."""
+    left = remaining()
+    if left is None:
+        return cap
+    return max(min(cap, left), MIN_TIMEOUT)
+
+
+def check() -> None:
+    if (left := remaining()) is not None and left <= 0:
+        raise DeadlineExceeded(f"Run deadline exceeded by {-left:.1f}s")
+
+
+@contextlib.contextmanager
+def use(deadline: float | None) -> Iterator[None]:
+    """Make *deadline* active; an outer, earlier deadline still wins."""
+    outer = _deadline.get()
+    if deadline is None or (outer is not None and outer < deadline):
+        deadline = outer
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def budgeted(fn: Callable, *, strict: bool = False) -> Callable:
+    """
+    Run a graph node under the deadline carried in its state.  *strict*
+    nodes raise ``DeadlineExceeded`` instead of starting past the deadline.
+    """
+    if inspect.iscoroutinefunction(fn):
+
+        async def awrapper(state: Dict[str, Any]) -> Any:
+            with use(state.get("deadline")):
+                if strict:
+                    check()
+                return await fn(state)
+
+        awrapper.__name__ = f"{fn.__name__}_budgeted"
+        return awrapper
+
+    def wrapper(state: Dict[str, Any]) -> Any:
+        with use(state.get("deadline")):
+            if strict:
+                check()
+            return fn(state)
+
+    wrapper.__name__ = f"{fn.__name__}_budgeted"
+    return wrapper
@@ -0,0 +1,140 @@
+"""
+embeddings – local CPU sentence embeddings with a per-text cache
+
+``encode`` returns unit-normalised vectors from a sentence-transformers
+model loaded once per process on CPU.  Vectors are cached in Redis by the
+hash of the text, so a headline seen under several tickers or on several
+days is embedded once.  When the model cannot be loaded ``encode`` returns
+None and callers fall back to exact matching; a failed load (download,
+corrupt files) is retried only after ``LOAD_RETRY_S``.
+
+``cluster`` groups near-duplicate vectors (cosine ≥ threshold) greedily in
+input order: the first member of each group is its representative.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from typing import List
+
+import numpy as np
+from django.conf import settings
+
+from trade_smart.services.tracing import record_cache
+from trade_smart.utils.tools import rds
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME: str = getattr(
+    settings, "EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+)
+BATCH_SIZE: int = getattr(settings, "EMBEDDING_BATCH_SIZE", 64)
+CACHE_TTL: int = getattr(settings, "EMBEDDING_CACHE_TTL", 30 * 24 * 3600)
+# after a failed model load, callers get None without retrying for this long
+LOAD_RETRY_S: float = getattr(settings, "EMBEDDING_LOAD_RETRY_S", 600)
+
+_model = None
+_unavailable = False  # the import failed; do not retry on every call
+_retry_at = 0.0  # monotonic time before which a failed load is not retried
+_lock = threading.Lock()
+
+
+def _get_model():
+    global _model, _unavailable, _retry_at
+    if _model is not None or _unavailable or time.monotonic() < _retry_at:
+        return _model
+    with _lock:
+        if _model is None and not _unavailable and time.monotonic() >= _retry_at:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as exc:
+                _unavailable = True
+                logger.warning("sentence-transformers unavailable: %s", exc)
+                return None
+            try:
+                _model = SentenceTransformer(MODEL_NAME, device="cpu")
+            except Exception as exc:  # noqa: BLE001 – network, disk, bad files
+                _retry_at = time.monotonic() + LOAD_RETRY_S
+                logger.warning(
+                    "Loading %s failed, retrying in %ds: %s",
+                    MODEL_NAME,
+                    LOAD_RETRY_S,
+                    exc,
+                )
+    return _model
+
+
+def _key(text: str) -> str:
+    return f"emb:{MODEL_NAME}:{hashlib.sha1(text.strip().encode()).hexdigest()}"
+
+
+def _cached(keys: List[str]) -> List[np.ndarray | None]:
+    if rds is None:
+        return [None] * len(keys)
+    try:
+        raw = rds.mget(keys)
+    except Exception:  # noqa: BLE001
+        return [None] * len(keys)
+    for value in raw:
+        record_cache(hit=bool(value))
+    return [np.frombuffer(v, dtype=np.float32) if v else None for v in raw]
+
+
+def _remember(keys: List[str], vectors: np.ndarray) -> None:
+    if rds is None:
+        return
+    try:
+        with rds.pipeline(transaction=False) as pipe:
+            for key, vector in zip(keys, vectors):
+                pipe.set(key, vector.tobytes(), ex=CACHE_TTL)
+            pipe.execute()
+    except Exception:  # noqa: BLE001
+        pass
+
+
+def encode(texts: List[str], *, cache: bool = True) -> np.ndarray | None:
+    """
+    (len(texts), dim) float32 unit vectors, or None without a model.  Pass
+    ``cache=False`` for texts embedded only once (article bodies).
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    keys = [_key(t) for t in texts]
+    vectors = _cached(keys) if cache else [None] * len(texts)
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        try:
+            model = _get_model()
+            if model is None:
+                return None
+            fresh = model.encode(
+                [texts[i] for i in missing],
+                batch_size=BATCH_SIZE,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+            ).astype(np.float32)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Embedding %d texts failed: %s", len(missing), exc)
+            return None
+        if cache:
+            _remember([keys[i] for i in missing], fresh)
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+    return np.vstack(vectors)
+
+
+def cluster(vectors: np.ndarray, threshold: float) -> List[List[int]]:
+    """Greedy near-duplicate groups of row indices, representative first."""
+    sims = vectors @ vectors.T
+    assigned = np.zeros(len(vectors), dtype=bool)
+    groups = []
+    for i in range(len(vectors)):
+        if assigned[i]:
+            continue
+        members = np.flatnonzero(~assigned & (sims[i] >= threshold))
+        assigned[members] = True
+        groups.append([i, *(int(j) for j in members if j != i)])
+    return groups
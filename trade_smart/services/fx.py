@@ -0,0 +1,73 @@
+"""
+fx – spot exchange rates
+
+``fx_rate(base, quote)`` tries exchangerate.host first and falls back to the
+ECB daily reference rates (EUR pivot, triangulated).  Rates are cached per
+process for the current day, so long-lived workers pick up new fixings.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import functools
+import logging
+import xml.etree.ElementTree as ET
+
+import requests
+
+from trade_smart.services import deadline
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=64)
+def _fx_rate(base: str, quote: str, day: dt.date) -> float:
+    try:
+        r = requests.get(
+            "https://api.exchangerate.host/convert",
+            params={"from": base, "to": quote},
+            timeout=deadline.timeout(8),
+        )
+        r.raise_for_status()
+        data = r.json()
+        if data.get("result") is not None:
+            return float(data["result"])
+        logger.warning("exchangerate.host returned no 'result': %s", data)
+    except Exception as exc:
+        logger.warning("exchangerate.host failed (%s) – using ECB fallback.", exc)
+
+    # fallback – ECB EUR-based basket
+    try:
+        xml_raw = requests.get(
+            "https://www.ecb.europa.eu/stats/eurofxref/eurofxref-daily.xml",
+            timeout=deadline.timeout(8),
+        ).text
+        tree = ET.fromstring(xml_raw)
+
+        # currency -> rate vs EUR
+        eur_rates = {
+            cube.attrib["currency"]: float(cube.attrib["rate"])
+            for cube in tree.iter(
+                "{http://www.ecb.int/vocabulary/2002-08-01/eurofxref}Cube"
+            )
+            if "currency" in cube.attrib
+        }
+        eur_rates["EUR"] = 1.0
+
+        if base not in eur_rates or quote not in eur_rates:
+            raise RuntimeError(f"ECB feed missing {base} or {quote}")
+
+        # EUR is the pivot: base/quote = (EUR/quote) / (EUR/base)
+        return eur_rates[quote] / eur_rates[base]
+
+    except Exception as exc:
+        logger.error("ECB fallback failed as well: %s", exc)
+        raise RuntimeError("Unable to obtain FX rate") from exc
+
+
+def fx_rate(base: str, quote: str = "USD") -> float:
+    """Units of *quote* per unit of *base*; RuntimeError if no source answers."""
+    base, quote = base.upper(), quote.upper()
+    if base == quote:
+        return 1.0
+    return _fx_rate(base, quote, dt.date.today())
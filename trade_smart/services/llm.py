@@ -9,22 +9,40 @@ GROQ_MODEL     : optional; overrides the default model
 GROQ_API_BASE  : optional; defaults to "https://api.groq.com/openai/v1"
 """
 
+from __future__ import annotations
+
 import os
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING, Any
+
 import settings
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from trade_smart.services.tracing import token_usage_handler
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 
 @retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(5))
 def get_llm(
     model: str | None = None,
     temperature: float = 0.0,
     timeout: int | float | None = None,
+    http_async_client: Any = None,
 ) -> ChatOpenAI:
+    """
+    Pass *http_async_client* (an ``httpx.AsyncClient``) for a client used
+    from one specific event loop; otherwise the async connection pool is
+    shared process-wide.
+    """
+    from langchain_openai import ChatOpenAI  # heavy: only once a client is needed
+
     return ChatOpenAI(
         base_url="https://api.groq.com/openai/v1",
         api_key=settings.GROQ_API_KEY,
         model="meta-llama/llama-4-scout-17b-16e-instruct",
         temperature=temperature,
         timeout=timeout,
+        http_async_client=http_async_client,
+        callbacks=[token_usage_handler],
     )
@@ -15,9 +15,10 @@ from typing import Literal
 
 import pandas as pd
 import requests
-import yfinance as yf
 from django.conf import settings
 
+from trade_smart.services import deadline
+
 
 log = logging.getLogger(__name__)
 
@@ -126,9 +127,15 @@ class MarketDataFetcher:
         start = _parse_date(start)
         end = _parse_date(end)
         symbol = self._alias(symbol, provider="yf")
+        import yfinance as yf
+
         yf_ticker = yf.Ticker(symbol)
         df = yf_ticker.history(
-            start=start, end=end, interval=interval, auto_adjust=False
+            start=start,
+            end=end,
+            interval=interval,
+            auto_adjust=False,
+            timeout=deadline.timeout(15),
         )
 
         # yfinance always returns columns in title-case, rename to lower.
@@ -172,7 +179,7 @@ class MarketDataFetcher:
             )
 
         for attempt in range(max_retries + 1):
-            resp = requests.get(url, timeout=15)
+            resp = requests.get(url, timeout=deadline.timeout(15))
             payload = resp.json()
 
             # Alpha Vantage returns {"Note": "... throttled ..."} when rate limited.
@@ -216,7 +223,7 @@ class MarketDataFetcher:
             "https://financialmodelingprep.com/api/v3/historical-price-full/"
             f"{symbol}?from={_date_str(start)}&to={_date_str(end)}&apikey={FMP_KEY}"
         )
-        resp = requests.get(url, timeout=15)
+        resp = requests.get(url, timeout=deadline.timeout(15))
         payload = resp.json()
 
         if "historical" not in payload or not payload["historical"]:
@@ -0,0 +1,146 @@
+"""
+prompt_encoder – compact, token-budgeted prompt blocks
+
+Token counts come from a local tiktoken encoding (``PROMPT_TOKENIZER``);
+if tiktoken or its encoding file is unavailable a chars/4 estimate is used.
+
+Headlines are rendered one per line ("headline — lead sentence (×n)"),
+without URLs or full bodies, ranked by recency, retrieval relevance and
+the number of near-duplicates they stand for, and cut off once the token
+budget is spent.  JSON blocks (indicators, metrics, sentiment) are
+minified with numbers rounded to a few significant digits.
+
+Public functions:
+    count_tokens(text)                 -> int
+    compact_json(obj, digits=...)      -> str
+    lead_sentence(text, max_chars=...) -> str
+    encode_headlines(headlines, budget, lead=True) -> [(headline, line)]
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import re
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER: str = getattr(settings, "PROMPT_TOKENIZER", "cl100k_base")
+JSON_DIGITS: int = getattr(settings, "PROMPT_JSON_DIGITS", 4)
+LEAD_CHARS: int = getattr(settings, "PROMPT_LEAD_CHARS", 160)
+# a headline this many hours old weighs half as much as a fresh one
+RECENCY_HALF_LIFE_H: float = getattr(settings, "PROMPT_RECENCY_HALF_LIFE_H", 24)
+# without timestamps the input order (newest first) decays by this per item
+POSITION_DECAY = 0.9
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_encoding = None
+_encoding_failed = False
+_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    with _lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding(TOKENIZER)
+            except Exception as exc:  # noqa: BLE001 – estimate instead
+                _encoding_failed = True
+                logger.warning("tiktoken unavailable (%s), estimating tokens", exc)
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+# --------------------------------------------------------------------------- #
+#   JSON blocks
+# --------------------------------------------------------------------------- #
+def _round(value: Any, digits: int) -> Any:
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        return float(f"{value:.{digits}g}") if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _round(v, digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_round(v, digits) for v in value]
+    return value
+
+
+def compact_json(obj: Any, *, digits: int = JSON_DIGITS) -> str:
+    """Minified JSON with floats cut to *digits* significant digits."""
+    return json.dumps(_round(obj, digits), separators=(",", ":"), default=str)
+
+
+# --------------------------------------------------------------------------- #
+#   Headlines
+# --------------------------------------------------------------------------- #
+def lead_sentence(text: str | None, max_chars: int = LEAD_CHARS) -> str:
+    """First sentence of *text*, cut at a word boundary to *max_chars*."""
+    if not text:
+        return ""
+    text = " ".join(text.split())
+    lead = _SENTENCE_END.split(text, maxsplit=1)[0]
+    if len(lead) <= max_chars:
+        return lead
+    return lead[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+def _line(headline: Dict[str, Any], lead: bool) -> str:
+    line = " ".join(headline["headline"].split())
+    if lead and (sentence := lead_sentence(headline.get("body"))):
+        if sentence.lower() != headline["headline"].strip().lower():
+            line += f" — {sentence}"
+    if (count := headline.get("count", 1)) > 1:
+        line += f" (×{count})"
+    return line
+
+
+def _rank(headlines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    now = time.time()
+
+    def weight(item: Tuple[int, Dict[str, Any]]) -> float:
+        i, h = item
+        if ts := h.get("published_ts"):
+            recency = 0.5 ** (max(now - ts, 0) / 3600 / RECENCY_HALF_LIFE_H)
+        else:
+            recency = POSITION_DECAY**i
+        relevance = h.get("relevance", 1.0)
+        return recency * relevance * (1 + math.log(h.get("count", 1)))
+
+    ranked = sorted(enumerate(headlines), key=weight, reverse=True)
+    return [h for _, h in ranked]
+
+
+def encode_headlines(
+    headlines: List[Dict[str, Any] | str], budget: int, *, lead: bool = True
+) -> List[Tuple[Dict[str, Any], str]]:
+    """
+    (headline, line) pairs, best ranked first, whose lines fit in *budget*
+    tokens.  The first line is always kept; callers add their own bullet
+    or numbering.
+    """
+    items = [h if isinstance(h, dict) else {"headline": str(h)} for h in headlines]
+    encoded, used = [], 0
+    for headline in _rank(items):
+        line = _line(headline, lead)
+        cost = count_tokens(line) + 1  # newline
+        if encoded and used + cost > budget:
+            break
+        encoded.append((headline, line))
+        used += cost
+    return encoded
@@ -0,0 +1,348 @@
+"""
+tracing – per-node latency & cost instrumentation for the LangGraph graphs
+
+Usage:
+    g.add_node("tech", traced("advice", "tech", tech_node))
+
+    with span("advice", "synth_batch", portfolio_id=pf.id):
+        ...
+
+Coroutine nodes get ``aspan``; their DB work runs on executor threads with
+their own connections, so async spans leave the DB counters at zero.
+
+Each span records wall time, DB query count/time (``execute_wrapper``),
+outbound HTTP count/time (requests / httpx hooks), LLM calls and tokens
+(LangChain callback attached in ``services.llm``) and cache hits/misses
+(``utils.tools``), tagged with run id, ticker and portfolio, and is stored
+as a NodeTrace row.  ``node_percentiles`` aggregates them in SQL
+(``percentile_cont``) for the ``trace_stats`` command; ``cached_percentiles``
+serves the Prometheus ``/metrics/`` endpoint from a short-lived Redis copy.
+``purge`` removes rows older than ``GRAPH_TRACE_TTL_DAYS``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import datetime as dt
+import functools
+import inspect
+import json
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Aggregate, Count, FloatField, Sum
+from django.utils import timezone
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED: bool = getattr(settings, "GRAPH_TRACING", True)
+QUANTILES = (0.5, 0.9, 0.99)
+TTL_DAYS: int = getattr(settings, "GRAPH_TRACE_TTL_DAYS", 14)
+# how long one aggregate serves /metrics/ scrapes
+METRICS_CACHE_S: int = getattr(settings, "GRAPH_METRICS_CACHE_S", 60)
+SUMMED = (
+    "db_queries",
+    "db_ms",
+    "http_calls",
+    "http_ms",
+    "llm_prompt_tokens",
+    "llm_completion_tokens",
+    "cache_hits",
+    "cache_misses",
+)
+
+_current: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "graph_span", default=None
+)
+
+
+@dataclass
+class Span:
+    graph: str
+    node: str
+    run_id: str = ""
+    ticker: str = ""
+    portfolio_id: int | None = None
+    wall_ms: float = 0.0
+    db_queries: int = 0
+    db_ms: float = 0.0
+    http_calls: int = 0
+    http_ms: float = 0.0
+    llm_calls: int = 0
+    llm_prompt_tokens: int = 0
+    llm_completion_tokens: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    error: str = ""
+
+
+# ------------------------------------------------------------------ #
+# Collectors
+# ------------------------------------------------------------------ #
+def record_cache(hit: bool) -> None:
+    if span_ := _current.get():
+        if hit:
+            span_.cache_hits += 1
+        else:
+            span_.cache_misses += 1
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    span_ = _current.get()
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if span_:
+            span_.db_queries += 1
+            span_.db_ms += (time.perf_counter() - t0) * 1000
+
+
+def _timed_http(send: Callable) -> Callable:
+    @functools.wraps(send)
+    def wrapper(*args, **kwargs):
+        span_ = _current.get()
+        if span_ is None:
+            return send(*args, **kwargs)
+        t0 = time.perf_counter()
+        try:
+            return send(*args, **kwargs)
+        finally:
+            span_.http_calls += 1
+            span_.http_ms += (time.perf_counter() - t0) * 1000
+
+    return wrapper
+
+
+def _timed_async_http(send: Callable) -> Callable:
+    @functools.wraps(send)
+    async def wrapper(*args, **kwargs):
+        span_ = _current.get()
+        if span_ is None:
+            return await send(*args, **kwargs)
+        t0 = time.perf_counter()
+        try:
+            return await send(*args, **kwargs)
+        finally:
+            span_.http_calls += 1
+            span_.http_ms += (time.perf_counter() - t0) * 1000
+
+    return wrapper
+
+
+@functools.lru_cache(maxsize=None)
+def install_http_hooks() -> None:
+    """Count requests / httpx traffic made while a span is active (once)."""
+    import httpx
+    import requests
+
+    requests.Session.send = _timed_http(requests.Session.send)
+    httpx.Client.send = _timed_http(httpx.Client.send)
+    httpx.AsyncClient.send = _timed_async_http(httpx.AsyncClient.send)
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """LangChain callback adding LLM calls / token usage to the active span."""
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        span_ = _current.get()
+        if span_ is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        span_.llm_calls += 1
+        span_.llm_prompt_tokens += int(usage.get("prompt_tokens") or 0)
+        span_.llm_completion_tokens += int(usage.get("completion_tokens") or 0)
+
+
+token_usage_handler = TokenUsageHandler()
+
+
+# ------------------------------------------------------------------ #
+# Spans
+# ------------------------------------------------------------------ #
+def _store(span_: Span) -> None:
+    from trade_smart.models import NodeTrace
+
+    try:
+        NodeTrace.objects.create(**asdict(span_))
+    except Exception as exc:  # noqa: BLE001 – tracing must never break a run
+        logger.debug("Could not store trace %s.%s: %s", span_.graph, span_.node, exc)
+
+
+@contextlib.contextmanager
+def span(graph: str, node: str, **tags: Any) -> Iterator[Span | None]:
+    if not TRACING_ENABLED:
+        yield None
+        return
+
+    install_http_hooks()
+    current = Span(graph=graph, node=node, **tags)
+    token = _current.set(current)
+    t0 = time.perf_counter()
+    try:
+        with connection.execute_wrapper(_db_wrapper):
+            yield current
+    except Exception as exc:
+        current.error = f"{type(exc).__name__}: {exc}"[:200]
+        raise
+    finally:
+        current.wall_ms = (time.perf_counter() - t0) * 1000
+        _current.reset(token)
+        _store(current)
+
+
+@contextlib.asynccontextmanager
+async def aspan(graph: str, node: str, **tags: Any) -> AsyncIterator[Span | None]:
+    """``span`` for coroutines; the row is stored off the event loop."""
+    from trade_smart.utils.aio import db_thread
+
+    if not TRACING_ENABLED:
+        yield None
+        return
+
+    install_http_hooks()
+    current = Span(graph=graph, node=node, **tags)
+    token = _current.set(current)
+    t0 = time.perf_counter()
+    try:
+        yield current
+    except Exception as exc:
+        current.error = f"{type(exc).__name__}: {exc}"[:200]
+        raise
+    finally:
+        current.wall_ms = (time.perf_counter() - t0) * 1000
+        _current.reset(token)
+        await db_thread(_store)(current)
+
+
+def _tags(state: Dict[str, Any]) -> Dict[str, Any]:
+    pf = state.get("portfolio")
+    return {
+        "run_id": state.get("run_id") or "",
+        "ticker": state.get("ticker") or "",
+        "portfolio_id": getattr(pf, "id", None),
+    }
+
+
+def traced(graph: str, node: str, fn: Callable) -> Callable:
+    """Wrap a LangGraph node so each execution is recorded as a span."""
+    if inspect.iscoroutinefunction(fn):
+
+        async def awrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+            async with aspan(graph, node, **_tags(state)):
+                return await fn(state)
+
+        awrapper.__name__ = f"{node}_traced"
+        return awrapper
+
+    def wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+        with span(graph, node, **_tags(state)):
+            return fn(state)
+
+    wrapper.__name__ = f"{node}_traced"
+    return wrapper
+
+
+# ------------------------------------------------------------------ #
+# Aggregation
+# ------------------------------------------------------------------ #
+class _Percentile(Aggregate):
+    """Postgres ``percentile_cont(q) WITHIN GROUP (ORDER BY expr)``."""
+
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(quantile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, quantile: float, **extra):
+        super().__init__(expression, quantile=float(quantile), **extra)
+
+
+def node_percentiles(
+    since: dt.timedelta = dt.timedelta(hours=24), graph: str | None = None
+) -> List[Dict[str, Any]]:
+    """Per (graph, node): count, wall-time quantiles and summed costs."""
+    from trade_smart.models import NodeTrace
+
+    qs = NodeTrace.objects.filter(created__gte=timezone.now() - since)
+    if graph:
+        qs = qs.filter(graph=graph)
+    rows = (
+        qs.values("graph", "node")
+        .annotate(
+            count=Count("id"),
+            wall_ms_sum=Sum("wall_ms"),
+            **{f"p{int(q * 100)}_ms": _Percentile("wall_ms", q) for q in QUANTILES},
+            **{name: Sum(name) for name in SUMMED},
+        )
+        .order_by("graph", "node")
+    )
+    return [
+        {
+            **row,
+            **{
+                name: (float if name.endswith("_ms") else int)(row[name] or 0)
+                for name in SUMMED
+            },
+        }
+        for row in rows
+    ]
+
+
+def cached_percentiles() -> List[Dict[str, Any]]:
+    """``node_percentiles()`` computed at most once per ``METRICS_CACHE_S``."""
+    from trade_smart.utils.tools import _cache_get, _cache_set
+
+    key = "graph_metrics:24h"
+    if cached := _cache_get(key):
+        return json.loads(cached)
+    stats = node_percentiles()
+    _cache_set(key, json.dumps(stats), ttl=METRICS_CACHE_S)
+    return stats
+
+
+def purge(ttl_days: int = TTL_DAYS) -> int:
+    from trade_smart.models import NodeTrace
+
+    cutoff = timezone.now() - dt.timedelta(days=ttl_days)
+    deleted, _ = NodeTrace.objects.filter(created__lt=cutoff).delete()
+    return deleted
+
+
+def prometheus_text(stats: List[Dict[str, Any]]) -> str:
+    """Render ``node_percentiles`` output in Prometheus text exposition format."""
+    lines = [
+        "# HELP graph_node_wall_seconds Graph node wall time.",
+        "# TYPE graph_node_wall_seconds summary",
+    ]
+    counters = (
+        "db_queries",
+        "http_calls",
+        "llm_prompt_tokens",
+        "llm_completion_tokens",
+        "cache_hits",
+        "cache_misses",
+    )
+    for s in stats:
+        labels = f'graph="{s["graph"]}",node="{s["node"]}"'
+        for q in QUANTILES:
+            value = s[f"p{int(q * 100)}_ms"] / 1000
+            lines.append(
+                f'graph_node_wall_seconds{{{labels},quantile="{q}"}} {value:.6f}'
+            )
+        lines.append(
+            f"graph_node_wall_seconds_sum{{{labels}}} {s['wall_ms_sum'] / 1000:.6f}"
+        )
+        lines.append(f"graph_node_wall_seconds_count{{{labels}}} {s['count']}")
+    for name in counters:
+        lines.append(f"# TYPE graph_node_{name} gauge")
+        lines.extend(
+            f'graph_node_{name}{{graph="{s["graph"]}",node="{s["node"]}"}} {s[name]}'
+            for s in stats
+        )
+    return "\n".join(lines) + "\n"
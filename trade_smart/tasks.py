@@ -4,17 +4,16 @@ import logging
 from datetime import date, timedelta
 from typing import List
 
-import httpx
 import pandas as pd
-import yfinance as yf
-from celery import shared_task
+from celery import chord, shared_task
 from celery.schedules import crontab
+from celery.signals import celeryd_after_setup, worker_process_init
 from django.conf import settings
 from django.db import IntegrityError, transaction
 import datetime as dt
+import time
 
-from trade_smart.agent_service.nodes.news_macro_node import web_news_node
-from trade_smart.agent_service.runner import run_for_portfolio
+from trade_smart.analytics.factor_exposure import factor_tickers
 from trade_smart.analytics.ta_engine import calculate_indicators
 from trade_smart.celery import app
 from trade_smart.models import Portfolio, Position, Advice, InvestmentGoal
@@ -32,6 +31,11 @@ logger = logging.getLogger(__name__)
 ###############################################################################
 
 DEFAULT_LOOKBACK_DAYS: int = getattr(settings, "MARKET_LOOKBACK_DAYS", 365)
+# drive the nightly advice run on an event loop, this many portfolios per task
+ASYNC_ADVICE: bool = getattr(settings, "ADVICE_ASYNC_RUNNER", False)
+ASYNC_ADVICE_BATCH: int = getattr(settings, "ADVICE_ASYNC_PORTFOLIOS_PER_TASK", 25)
+# worker processes consuming any of these queues pre-build graphs / clients
+WARMUP_QUEUES: tuple = tuple(getattr(settings, "CELERY_WARMUP_QUEUES", ("celery",)))
 ###############################################################################
 # Helpers (single-responsibility functions)
 ###############################################################################
@@ -86,6 +90,16 @@ def _df_to_objects(df: pd.DataFrame, ticker: str) -> list[MarketData]:
     ]
 
 
+def _upsert_ohlcv(objects: list[MarketData]) -> None:
+    with transaction.atomic():
+        MarketData.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            update_fields=["open", "high", "low", "close", "volume"],
+            unique_fields=["ticker", "date"],
+        )
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def fetch_daily_ohlcv(self, ticker: str) -> str:
     """
@@ -101,13 +115,7 @@ def fetch_daily_ohlcv(self, ticker: str) -> str:
         if not objects:
             return f"No valid rows for {ticker}"
 
-        with transaction.atomic():
-            MarketData.objects.bulk_create(
-                objects,
-                update_conflicts=True,
-                update_fields=["open", "high", "low", "close", "volume"],
-                unique_fields=["ticker", "date"],
-            )
+        _upsert_ohlcv(objects)
 
         msg = f"Stored {len(objects)} OHLCV rows for {ticker}"
         logger.info(msg)
@@ -136,9 +144,10 @@ def fetch_daily_ohlcv(self, ticker: str) -> str:
 def fetch_all_tickers(self) -> None:
     """
     Enqueue a download task for every distinct ticker that exists
-    in the user's portfolios.
+    in the user's portfolios, plus the factor / benchmark proxies.
     """
-    tickers = Position.objects.values_list("ticker", flat=True).distinct()
+    tickers = set(Position.objects.values_list("ticker", flat=True).distinct())
+    tickers.update(factor_tickers())
     for symbol in tickers:
         fetch_daily_ohlcv.delay(symbol)
 
@@ -179,38 +188,220 @@ def compute_all_indicators():
 
 
 @shared_task
-def issue_portfolio_advice(portfolio_id: int):
-    pf = Portfolio.objects.get(id=portfolio_id)
-    all_evaluated = run_for_portfolio(pf)
-    if all_evaluated:
-        EmailNotificationService().send_advice_email(pf)
-        logger.info(f"Successfully sent advice email for portfolio {portfolio_id}")
-    else:
+def run_stress_tests():
+    from trade_smart.analytics import stress
+
+    rows = stress.run_stress_tests()
+    return f"{rows} stress results stored"
+
+
+@shared_task
+def backfill_stress_history():
+    """
+    Download the OHLCV history that the historical stress windows need and
+    the daily fetch (last ``MARKET_LOOKBACK_DAYS``) never covers.  Each
+    (ticker, window) is tried at most once a week: tickers listed after a
+    window starts stay uncovered.
+    """
+    from trade_smart.analytics import stress
+    from trade_smart.utils.tools import _cache_get, _cache_set
+
+    stored = 0
+    for ticker, start, end in stress.missing_history():
+        key = f"stress_backfill:{ticker}:{start.isoformat()}"
+        if _cache_get(key):
+            continue
+        _cache_set(key, "1", ttl=7 * 24 * 3600)
+        try:
+            df = _fetcher.get_ohlcv(ticker, start=start, end=end, interval="1d")
+        except Exception as exc:  # noqa: BLE001 – the scenario stays NULL
+            logger.warning("Stress history back-fill failed for %s: %s", ticker, exc)
+            continue
+        if df.empty:
+            continue
+        objects = _df_to_objects(df, ticker)
+        _upsert_ohlcv(objects)
+        stored += len(objects)
+    return f"{stored} OHLCV rows back-filled for stress windows"
+
+
+@shared_task
+def purge_stress_results():
+    from trade_smart.analytics import stress
+
+    deleted = stress.purge()
+    return f"{deleted} stress results purged"
+
+
+def _notify_advice(pf: Portfolio, all_evaluated: bool, run_id: str | None) -> None:
+    from trade_smart.agent_service import checkpoint
+
+    if not all_evaluated:
         logger.warning(
-            f"Failed to send advice email for portfolio {portfolio_id} because not all positions were evaluated."
+            f"Failed to send advice email for portfolio {pf.id} because not all positions were evaluated."
         )
+        return
+    # a rerun of a run that already mailed this portfolio has nothing new
+    if run_id and checkpoint.notified(run_id, pf.id):
+        logger.info(f"Advice email for portfolio {pf.id} already sent in {run_id}")
+        return
+    EmailNotificationService().send_advice_email(pf)
+    logger.info(f"Successfully sent advice email for portfolio {pf.id}")
+    if run_id:
+        checkpoint.mark_notified(run_id, pf.id)
+
+
+# acks_late: a task lost with its worker is redelivered and resumes from
+# the run's checkpoints instead of starting over
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def issue_portfolio_advice(
+    portfolio_id: int, run_id: str | None = None, force_refresh: bool = False
+):
+    from trade_smart.agent_service.runner import run_for_portfolio
+
+    pf = Portfolio.objects.get(id=portfolio_id)
+    _notify_advice(
+        pf,
+        run_for_portfolio(pf, run_id=run_id, force_refresh=force_refresh),
+        run_id,
+    )
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def issue_portfolios_advice_async(
+    portfolio_ids: List[int], run_id: str | None = None, force_refresh: bool = False
+):
+    """Advise several portfolios concurrently on one event loop in this worker."""
+    from trade_smart.agent_service.runner import run_portfolios_async
+
+    outcomes = run_portfolios_async(
+        portfolio_ids, run_id=run_id, force_refresh=force_refresh
+    )
+    for pf in Portfolio.objects.filter(id__in=outcomes):
+        _notify_advice(pf, outcomes[pf.id], run_id)
+
+
+@shared_task
+def prepare_ticker_context(ticker: str, refresh_news: bool = False) -> str:
+    from trade_smart.agent_service import ticker_context
+
+    # never raises, so the chord always fires
+    ticker_context.prepare(ticker, refresh_news=refresh_news)
+    return ticker
+
+
+@shared_task
+def issue_all_portfolio_advice(
+    *_, run_id: str | None = None, force_refresh: bool = False
+):
+    pf_ids = list(Portfolio.objects.values_list("id", flat=True))
+    if ASYNC_ADVICE:
+        for i in range(0, len(pf_ids), ASYNC_ADVICE_BATCH):
+            batch = pf_ids[i : i + ASYNC_ADVICE_BATCH]
+            issue_portfolios_advice_async.delay(
+                batch, run_id=run_id, force_refresh=force_refresh
+            )
+        return
+    for pf_id in pf_ids:
+        issue_portfolio_advice.delay(pf_id, run_id=run_id, force_refresh=force_refresh)
+
+
+@shared_task
+def purge_graph_checkpoints():
+    from trade_smart.agent_service import checkpoint
+
+    deleted = checkpoint.purge()
+    return f"{deleted} graph checkpoints purged"
+
+
+@shared_task
+def purge_node_traces():
+    from trade_smart.services import tracing
+
+    deleted = tracing.purge()
+    return f"{deleted} node traces purged"
+
+
+@shared_task
+def purge_headline_sentiments():
+    from trade_smart.agent_service.data_providers import headline_cache
+
+    deleted = headline_cache.purge()
+    return f"{deleted} headline sentiments purged"
+
+
+@shared_task
+def nightly_all_portfolios(force_refresh: bool = False):
+    """
+    Phase 1 runs the ticker-scoped stages once per distinct ticker and caches
+    them; phase 2 (chord callback) runs the portfolio-scoped stages, which
+    read the cached ticker context instead of recomputing it per position.
+    Positions whose inputs are unchanged keep their advice unless
+    *force_refresh*.
+    """
+    tickers = Position.objects.values_list("ticker", flat=True).distinct()
+    # same run id for the whole day: a re-triggered nightly run resumes;
+    # a forced rerun gets its own id so it recomputes (and mails) again
+    run_id = f"nightly:{dt.date.today().isoformat()}"
+    if force_refresh:
+        run_id += f":forced:{int(time.time())}"
+    chord(prepare_ticker_context.s(t, refresh_news=force_refresh) for t in tickers)(
+        issue_all_portfolio_advice.si(run_id=run_id, force_refresh=force_refresh)
+    )
+
+
+@shared_task
+def backfill_article_bodies(urls: List[str] | None = None):
+    from trade_smart.agent_service.data_providers import article_bodies
+
+    updated = article_bodies.backfill_bodies(urls)
+    return f"{updated} article bodies back-filled"
 
 
 @shared_task
-def nightly_all_portfolios():
-    for pf_id in Portfolio.objects.values_list("id", flat=True):
-        issue_portfolio_advice.delay(pf_id)
+def rebuild_seen_urls():
+    from trade_smart.agent_service.data_providers import seen_urls
+
+    return f"{seen_urls.rebuild()} URLs in the seen-URL index"
 
 
 @shared_task
 def fetch_news_for_all_positions():
-    unique_tickers = set()
-    for portfolio in Portfolio.objects.all():
-        for position in portfolio.positions.all():
-            unique_tickers.add(position.ticker)
+    from trade_smart.agent_service.data_providers.news_macro import ingest_news
+
+    tickers = Position.objects.values_list("ticker", flat=True).distinct()
+    fetched = ingest_news(tickers)
+    return f"{sum(fetched.values())} news items for {len(fetched)} tickers"
+
+
+@shared_task
+def refresh_etf_constituents(symbols: List[str] | None = None):
+    """
+    Re-fetch ETF holdings for *symbols*, or for every tracked ticker that
+    was never looked up or whose cached holdings are past their TTL.
+    """
+    from trade_smart.agent_service.data_providers import etf_utils
 
-    for ticker in unique_tickers:
-        logger.info(f"Fetching news for ticker: {ticker}")
-        web_news_node({"ticker": ticker})
+    if symbols is None:
+        tracked = Position.objects.values_list("ticker", flat=True).distinct()
+        symbols = etf_utils.due_for_refresh(tracked)
+    etfs = etf_utils.refresh(symbols)
+    return f"{len(symbols)} symbols refreshed, {etfs} ETFs"
+
+
+@shared_task
+def index_news_articles():
+    from trade_smart.agent_service.data_providers import news_index
+
+    return f"{news_index.index_pending()} news articles indexed"
 
 
 @shared_task
 def run_proactive_proposition(goal_id: int):
+    import httpx
+
+    from trade_smart.services import deadline
+
     goal = InvestmentGoal.objects.get(id=goal_id)
 
     payload = {
@@ -219,7 +410,8 @@ def run_proactive_proposition(goal_id: int):
         "horizon": goal.horizon_months,
         "risk": goal.risk_level,
     }
-    with httpx.Client(timeout=180) as client:
+    # the server stops at PROPOSE_DEADLINE_S; leave room for the response
+    with httpx.Client(timeout=deadline.PROPOSE_DEADLINE + 15) as client:
         res = client.post(f"{AGENT_SVC}/propose", json=payload)
         res.raise_for_status()
     data = res.json()
@@ -239,6 +431,33 @@ def run_proactive_proposition(goal_id: int):
     goal.save()
 
 
+###############################################################################
+# Worker warm-up
+###############################################################################
+
+_worker_queues: set[str] = set()
+
+
+@celeryd_after_setup.connect
+def _remember_queues(sender, instance, **kwargs):
+    # runs in the parent before the pool forks, so children inherit it
+    _worker_queues.update(instance.app.amqp.queues.consume_from)
+
+
+@worker_process_init.connect
+def warm_up_worker(**kwargs):
+    """
+    Pay the heavy imports (LangGraph, LangChain, news / market libraries)
+    once per pool process at boot rather than inside the first task, and
+    only in workers serving the advice queues.
+    """
+    if not _worker_queues & set(WARMUP_QUEUES):
+        return
+    from trade_smart.agent_service import warmup
+
+    warmup.warm_up()
+
+
 ###############################################################################
 # Periodic job registration
 ###############################################################################
@@ -259,8 +478,63 @@ def setup_periodic_tasks(sender, **kwargs):
         compute_all_indicators.s(),
         name="Compute daily technical indicators",
     )
+    sender.add_periodic_task(
+        crontab(minute=50, hour=1),
+        backfill_stress_history.s(),
+        name="Back-fill price history for stress windows",
+    )
+    sender.add_periodic_task(
+        crontab(minute=15, hour=2),
+        run_stress_tests.s(),
+        name="Nightly portfolio stress tests",
+    )
+    sender.add_periodic_task(
+        crontab(minute=45, hour=1),
+        refresh_etf_constituents.s(),
+        name="Refresh cached ETF constituents",
+    )
     sender.add_periodic_task(
         crontab(minute=30, hour=2),
         nightly_all_portfolios.s(),
         name="Nightly advice generation",
     )
+    sender.add_periodic_task(
+        crontab(minute="*/30"),
+        backfill_article_bodies.s(),
+        name="Back-fill news article bodies",
+    )
+    sender.add_periodic_task(
+        crontab(minute="5-59/15"),
+        index_news_articles.s(),
+        name="Embed new news articles into the vector index",
+    )
+    sender.add_periodic_task(
+        crontab(minute=45, hour=4),
+        rebuild_seen_urls.s(),
+        name="Rebuild the seen news URL index",
+    )
+    sender.add_periodic_task(
+        crontab(minute=0, hour=5),
+        purge_graph_checkpoints.s(),
+        name="Purge expired advice-graph checkpoints",
+    )
+    sender.add_periodic_task(
+        crontab(minute=5, hour=5),
+        purge_node_traces.s(),
+        name="Purge expired graph node traces",
+    )
+    sender.add_periodic_task(
+        crontab(minute=10, hour=5),
+        purge_headline_sentiments.s(),
+        name="Purge expired headline sentiments",
+    )
+    sender.add_periodic_task(
+        crontab(minute=20, hour=5),
+        purge_stress_results.s(),
+        name="Purge stale portfolio stress results",
+    )
+    sender.add_periodic_task(
+        crontab(minute=0, hour="*/6"),
+        fetch_news_for_all_positions.s(),
+        name="Ingest news for every held ticker",
+    )
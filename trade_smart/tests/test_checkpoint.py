@@ -0,0 +1,161 @@
+"""Run checkpoints: what is reusable, batched writes and runner resume."""
+
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase
+
+from trade_smart.agent_service import checkpoint, runner
+from trade_smart.agent_service.nodes.synth_llm import FALLBACK_RATIONALE
+
+ADVICE = {"action": "HOLD", "confidence": 0.5, "rationale": "range-bound"}
+
+
+class ReusableTests(SimpleTestCase):
+    def test_clean_output_is_reusable(self):
+        self.assertTrue(checkpoint.reusable({}, {"tech": {"rsi": 50}}))
+        self.assertTrue(checkpoint.reusable({}, {"advice": ADVICE}))
+
+    def test_degraded_or_fallback_output_is_not(self):
+        self.assertFalse(
+            checkpoint.reusable({"degraded": ["news"]}, {"advice": ADVICE})
+        )
+        self.assertFalse(checkpoint.reusable({}, {"tech": {}, "degraded": ["tech"]}))
+        fallback = {**ADVICE, "rationale": FALLBACK_RATIONALE}
+        self.assertFalse(checkpoint.reusable({}, {"advice": fallback}))
+
+
+class BatchTests(SimpleTestCase):
+    def setUp(self):
+        self.bulk_create = mock.patch.object(
+            checkpoint.GraphCheckpoint.objects, "bulk_create"
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_flush_writes_one_upsert_and_empties(self):
+        batch = checkpoint.Batch("run-1", 7)
+        batch.add("AAA", "tech", {"tech": {"rsi": 50}})
+        batch.add("AAA", "tech", {"tech": {"rsi": 51}})  # last write wins
+        batch.add("BBB", "synth", {"advice": ADVICE})
+        self.assertEqual(batch.flush(), 2)
+        self.assertEqual(batch.flush(), 0)
+
+        self.bulk_create.assert_called_once()
+        rows = {(r.ticker, r.node): r for r in self.bulk_create.call_args[0][0]}
+        self.assertEqual(rows["AAA", "tech"].output, {"tech": {"rsi": 51}})
+        self.assertEqual(rows["BBB", "synth"].portfolio_id, 7)
+        self.assertTrue(self.bulk_create.call_args[1]["update_conflicts"])
+
+    def test_failed_flush_is_logged_not_raised(self):
+        self.bulk_create.side_effect = DatabaseError("deadlock")
+        batch = checkpoint.Batch("run-1", 7)
+        batch.add("AAA", "tech", {"tech": {}})
+        with self.assertLogs(checkpoint.logger, "WARNING"):
+            self.assertEqual(batch.flush(), 0)
+
+
+class CheckpointedTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+        self.node = checkpoint.checkpointed("tech", self._tech)
+        self.load = mock.patch.object(checkpoint, "load").start()
+        self.save = mock.patch.object(checkpoint, "save").start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _tech(self, state):
+        self.calls.append(state["ticker"])
+        return {"tech": {"rsi": 50}}
+
+    def test_without_run_id_nothing_is_stored(self):
+        self.node({"ticker": "AAA"})
+        self.assertEqual(self.calls, ["AAA"])
+        self.load.assert_not_called()
+        self.save.assert_not_called()
+
+    def test_resumed_output_skips_the_node(self):
+        state = {"ticker": "AAA", "run_id": "r", "resumed": {"tech": {"tech": {}}}}
+        self.assertEqual(self.node(state), {"tech": {}})
+        self.assertEqual(self.calls, [])
+        self.load.assert_not_called()
+
+    def test_new_output_goes_to_the_batch(self):
+        batch = checkpoint.Batch("r", None)
+        state = {
+            "ticker": "AAA",
+            "run_id": "r",
+            "resumed": {},
+            "checkpoint_batch": batch,
+        }
+        with mock.patch.object(batch, "add") as add:
+            self.node(state)
+        add.assert_called_once_with("AAA", "tech", {"tech": {"rsi": 50}})
+        self.load.assert_not_called()
+        self.save.assert_not_called()
+
+
+class FakeGraph:
+    """Runs checkpointed tech and synth nodes like the compiled graph would."""
+
+    def __init__(self):
+        self.ran = []
+        self.nodes = [
+            checkpoint.checkpointed("tech", self._node("tech", {"tech": {"rsi": 50}})),
+            checkpoint.checkpointed("synth", self._node("synth", {"advice": ADVICE})),
+        ]
+
+    def _node(self, name, update):
+        def run(state):
+            self.ran.append((state["ticker"], name))
+            return update
+
+        return run
+
+    def invoke(self, state):
+        for node in self.nodes:
+            state = {**state, **node(state)}
+        return state
+
+
+class RunnerResumeTests(SimpleTestCase):
+    def setUp(self):
+        self.graph = FakeGraph()
+        self.pf = SimpleNamespace(id=7, positions=mock.Mock())
+        self.pf.positions.values_list.return_value = ["AAA", "BBB", "CCC"]
+        mock.patch.object(runner, "get_graph", return_value=self.graph).start()
+        mock.patch.object(runner, "_prior_advice", return_value={}).start()
+        mock.patch.object(runner, "_pf_metrics", return_value={}).start()
+        self.store = mock.patch.object(runner, "_store_advice", return_value=[]).start()
+        self.load_run = mock.patch.object(
+            checkpoint,
+            "load_run",
+            return_value={
+                "AAA": {"tech": {"tech": {}}, "synth": {"advice": ADVICE}},
+                "BBB": {"tech": {"tech": {"rsi": 40}}},
+            },
+        ).start()
+        self.bulk_create = mock.patch.object(
+            checkpoint.GraphCheckpoint.objects, "bulk_create"
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_resume_skips_finished_positions_and_nodes(self):
+        ok = runner.run_for_portfolio(self.pf, batch_synth=False, run_id="run-1")
+
+        self.assertTrue(ok)
+        self.load_run.assert_called_once_with("run-1", 7, ["AAA", "BBB", "CCC"])
+        self.assertCountEqual(
+            self.graph.ran, [("BBB", "synth"), ("CCC", "tech"), ("CCC", "synth")]
+        )
+        self.assertEqual(set(self.store.call_args[0][1]), {"AAA", "BBB", "CCC"})
+
+        # one upsert at the join with only the newly computed outputs
+        self.bulk_create.assert_called_once()
+        written = {(r.ticker, r.node) for r in self.bulk_create.call_args[0][0]}
+        self.assertEqual(written, {("BBB", "synth"), ("CCC", "tech"), ("CCC", "synth")})
+
+    def test_without_run_id_no_checkpoints(self):
+        runner.run_for_portfolio(self.pf, batch_synth=False)
+        self.load_run.assert_not_called()
+        self.bulk_create.assert_not_called()
+        self.assertEqual(len(self.graph.ran), 6)
@@ -0,0 +1,82 @@
+"""ETF holdings cache: negative answers vs failed lookups."""
+
+import datetime as dt
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from trade_smart.agent_service.data_providers import etf_utils
+
+HOLDINGS = [("AAPL", 0.75), ("MSFT", 0.25)]
+
+
+class EtfCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = {}
+        self.ttls = {}
+
+        def cache_set(key, value, ttl):
+            self.cache[key], self.ttls[key] = value, ttl
+
+        mock.patch.object(etf_utils, "_cache_get", self.cache.get).start()
+        mock.patch.object(etf_utils, "_cache_set", cache_set).start()
+        objects = etf_utils.EtfConstituents.objects
+        filter_ = mock.patch.object(objects, "filter").start()
+        filter_.return_value.values_list.return_value.first.return_value = None
+        self.stored = mock.patch.object(objects, "update_or_create").start()
+        self.yfinance = mock.patch.object(etf_utils, "_yfinance").start()
+        self.fmp = mock.patch.object(etf_utils, "_fmp", return_value=None).start()
+        self.refresh = mock.patch.object(etf_utils, "_schedule_refresh").start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _cached(self, sym, holdings, age):
+        fetched_at = timezone.now() - age
+        self.cache[etf_utils._key(sym)] = json.dumps(
+            {"t": fetched_at.timestamp(), "h": [list(h) for h in holdings]}
+        )
+
+    def test_etf_is_stored_and_normalised(self):
+        self.yfinance.return_value = HOLDINGS
+        holdings = etf_utils.get_etf_constituents("spy", top_n=1)
+        self.assertEqual(holdings, [("AAPL", 1.0)])
+        self.assertTrue(self.stored.call_args[1]["defaults"]["is_etf"])
+
+    def test_not_an_etf_is_stored_as_a_negative_answer(self):
+        self.yfinance.return_value = []
+        self.assertEqual(etf_utils.get_etf_constituents("AAPL"), [])
+        self.assertFalse(self.stored.call_args[1]["defaults"]["is_etf"])
+        self.assertNotIn("etf_constituents:AAPL:failed", self.cache)
+
+        etf_utils.get_etf_constituents("AAPL")  # served from the cache
+        self.yfinance.assert_called_once()
+
+    def test_failed_lookup_is_not_stored_and_backs_off(self):
+        self.yfinance.return_value = None
+        self.assertEqual(etf_utils.get_etf_constituents("XYZ"), [])
+        self.stored.assert_not_called()
+        key = "etf_constituents:XYZ:failed"
+        self.assertEqual(self.ttls[key], etf_utils.FAILURE_TTL)
+
+        etf_utils.get_etf_constituents("XYZ")
+        self.yfinance.assert_called_once()
+
+        del self.cache[key]  # FAILURE_TTL expired
+        self.yfinance.return_value = HOLDINGS
+        self.assertEqual(len(etf_utils.get_etf_constituents("XYZ")), 2)
+
+    def test_negative_answers_go_stale_later_than_holdings(self):
+        self._cached("AAPL", [], dt.timedelta(days=2))
+        self._cached("SPY", HOLDINGS, dt.timedelta(days=2))
+        etf_utils.get_etf_constituents("AAPL")
+        self.refresh.assert_not_called()
+        etf_utils.get_etf_constituents("SPY")
+        self.refresh.assert_called_once_with("SPY")
+        self.yfinance.assert_not_called()
+
+    def test_refresh_keeps_the_stored_entry_when_fetch_fails(self):
+        self.yfinance.side_effect = [None, HOLDINGS]
+        self.assertEqual(etf_utils.refresh(["xyz", "spy"]), 1)
+        self.assertEqual(self.stored.call_count, 1)
+        self.assertEqual(self.stored.call_args[1]["symbol"], "SPY")
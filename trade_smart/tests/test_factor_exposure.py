@@ -0,0 +1,107 @@
+"""Batched factor regression against a plain least-squares reference."""
+
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from trade_smart.analytics import factor_exposure
+
+
+def _frames(n=120, seed=7):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=n, freq="B", name="date")
+    factors = pd.DataFrame(
+        rng.normal(0, 0.01, (n, 2)), index=index, columns=["SPY", "DAX"]
+    )
+    noise = rng.normal(0, 0.002, (n, 2))
+    assets = pd.DataFrame(
+        {
+            "AAA": 0.001 + 1.2 * factors["SPY"] - 0.3 * factors["DAX"] + noise[:, 0],
+            "BBB": 0.8 * factors["DAX"] + noise[:, 1],
+        },
+        index=index,
+    )
+    return assets, factors
+
+
+def _single_beta(y: np.ndarray, f: np.ndarray) -> float:
+    ok = ~(np.isnan(y) | np.isnan(f))
+    X = np.column_stack([np.ones(ok.sum()), f[ok]])
+    return np.linalg.lstsq(X, y[ok], rcond=None)[0][1]
+
+
+class PairwiseBetasTests(SimpleTestCase):
+    def test_matches_lstsq_per_pair(self):
+        assets, factors = _frames()
+        Y, F = assets.to_numpy(copy=True), factors.to_numpy(copy=True)
+        betas = factor_exposure._pairwise_betas(Y, F)
+        for i in range(Y.shape[1]):
+            for k in range(F.shape[1]):
+                self.assertAlmostEqual(betas[i, k], _single_beta(Y[:, i], F[:, k]))
+
+    def test_each_pair_uses_its_own_overlap(self):
+        assets, factors = _frames()
+        Y, F = assets.to_numpy(copy=True), factors.to_numpy(copy=True)
+        Y[:40, 0] = np.nan  # late listing
+        F[::5, 1] = np.nan  # factor holidays
+        betas = factor_exposure._pairwise_betas(Y, F)
+        self.assertAlmostEqual(betas[0, 1], _single_beta(Y[:, 0], F[:, 1]))
+        self.assertAlmostEqual(betas[1, 0], _single_beta(Y[:, 1], F[:, 0]))
+
+    def test_too_few_common_rows_is_nan(self):
+        assets, factors = _frames()
+        Y, F = assets.to_numpy(copy=True), factors.to_numpy(copy=True)
+        Y[factor_exposure.MIN_OBSERVATIONS :, 0] = np.nan
+        self.assertTrue(np.isnan(factor_exposure._pairwise_betas(Y, F)[0]).all())
+
+
+class RegressTests(SimpleTestCase):
+    def test_joint_loadings_match_lstsq(self):
+        assets, factors = _frames()
+        result = factor_exposure.regress(assets, factors)
+        X = np.column_stack([np.ones(len(factors)), factors.to_numpy()])
+        coef = np.linalg.lstsq(X, assets.to_numpy(), rcond=None)[0]
+
+        self.assertEqual(result["observations"], len(assets))
+        aaa = result["assets"]["AAA"]
+        self.assertAlmostEqual(aaa["alpha"], round(coef[0, 0], 4))
+        self.assertAlmostEqual(aaa["loadings"]["SPY"], round(coef[1, 0], 4))
+        self.assertAlmostEqual(aaa["loadings"]["DAX"], round(coef[2, 0], 4))
+        self.assertGreater(aaa["r2"], 0.9)
+
+    def test_short_joint_sample_keeps_single_betas(self):
+        assets, factors = _frames()
+        factors.iloc[: -factor_exposure.MIN_OBSERVATIONS, 1] = np.nan
+        result = factor_exposure.regress(assets, factors)
+        aaa = result["assets"]["AAA"]
+        self.assertIsNone(aaa["loadings"]["SPY"])
+        self.assertIsNone(aaa["betas"]["DAX"])
+        self.assertAlmostEqual(
+            aaa["betas"]["SPY"],
+            round(_single_beta(assets["AAA"].to_numpy(), factors["SPY"].to_numpy()), 4),
+        )
+
+    def test_no_factor_data(self):
+        assets, factors = _frames()
+        result = factor_exposure.regress(assets, factors * np.nan)
+        self.assertEqual(result, {"observations": 0, "assets": {}})
+
+
+class FactorReturnsCacheTests(SimpleTestCase):
+    def test_incomplete_returns_are_not_cached(self):
+        index = pd.date_range("2024-01-01", periods=10, freq="B")
+        prices = pd.DataFrame({"SPY": np.linspace(100, 110, 10)}, index=index)
+        with mock.patch.object(
+            factor_exposure, "_cache_get", return_value=None
+        ), mock.patch.object(
+            factor_exposure, "load_price_matrix", return_value=prices
+        ), mock.patch.object(
+            factor_exposure, "_cache_set"
+        ) as cache_set:
+            returns = factor_exposure._factor_returns(
+                index[-1].date(), 30, (("SPY", "SPY"),)
+            )
+        self.assertEqual(returns["SPY"].count(), 9)
+        cache_set.assert_not_called()
@@ -0,0 +1,109 @@
+"""Advice fingerprints: stable under noise, changed by material moves."""
+
+import asyncio
+
+from django.test import SimpleTestCase
+
+from trade_smart.agent_service import fingerprint
+from trade_smart.agent_service.nodes.synth_llm import FALLBACK_RATIONALE
+
+
+def _state(**overrides):
+    state = {
+        "ticker": "AAA",
+        "tech": {"rsi": [48.0, 51.234], "macd": 0.4321, "sma_50": 101.2},
+        "news_macro": {"summary": "steady", "score": 0.21},
+        "pf_metrics": {"weights": {"AAA": 0.1234, "BBB": 0.8766}, "var_95": 0.031},
+        "last_px": 101.5,
+        "degraded": [],
+    }
+    state.update(overrides)
+    return state
+
+
+ADVICE = {"action": "BUY", "confidence": 0.7, "rationale": "trend intact"}
+
+
+class FingerprintTests(SimpleTestCase):
+    def assertSame(self, a, b):
+        self.assertEqual(fingerprint.fingerprint(a), fingerprint.fingerprint(b))
+
+    def assertDiffers(self, a, b):
+        self.assertNotEqual(fingerprint.fingerprint(a), fingerprint.fingerprint(b))
+
+    def test_stable_under_noise(self):
+        self.assertSame(
+            _state(),
+            _state(
+                tech={"macd": 0.4318, "sma_50": 101.4, "rsi": [10.0, 51.0]},
+                news_macro={"summary": "another wording", "score": 0.19},
+                last_px=101.7,
+            ),
+        )
+
+    def test_portfolio_wide_metrics_are_ignored(self):
+        self.assertSame(
+            _state(),
+            _state(pf_metrics={"weights": {"AAA": 0.1234}, "var_95": 0.09}),
+        )
+
+    def test_material_moves_change_it(self):
+        self.assertDiffers(_state(), _state(tech={"rsi": [70.0]}))
+        self.assertDiffers(_state(), _state(news_macro={"score": -0.4}))
+        self.assertDiffers(_state(), _state(last_px=104.0))
+        self.assertDiffers(_state(), _state(pf_metrics={"weights": {"AAA": 0.2}}))
+        self.assertDiffers(_state(), _state(degraded=["news"]))
+
+    def test_missing_inputs_hash(self):
+        self.assertSame({"ticker": "AAA"}, {"ticker": "AAA", "last_px": float("nan")})
+
+
+class ReuseTests(SimpleTestCase):
+    def test_unchanged_needs_same_fingerprint_and_no_refresh(self):
+        state = _state()
+        fp = fingerprint.fingerprint(state)
+        prior = {**ADVICE, "fingerprint": fp}
+        self.assertEqual(
+            fingerprint.unchanged({**state, "prior_advice": prior}, fp), prior
+        )
+        self.assertIsNone(
+            fingerprint.unchanged(
+                {**state, "prior_advice": prior, "force_refresh": True}, fp
+            )
+        )
+        self.assertIsNone(
+            fingerprint.unchanged({**state, "prior_advice": prior}, "other")
+        )
+
+    def test_parse_failures_are_not_stamped(self):
+        fallback = {**ADVICE, "rationale": FALLBACK_RATIONALE}
+        self.assertNotIn("fingerprint", fingerprint.stamp(fallback, "fp"))
+        self.assertEqual(fingerprint.stamp(ADVICE, "fp")["fingerprint"], "fp")
+
+    def test_partition(self):
+        same, moved = _state(), _state(ticker="BBB", last_px=150.0)
+        same["prior_advice"] = {**ADVICE, "fingerprint": fingerprint.fingerprint(same)}
+        moved["prior_advice"] = {**ADVICE, "fingerprint": "stale"}
+        fps, reused, todo = fingerprint.partition({"AAA": same, "BBB": moved})
+        self.assertEqual(set(fps), {"AAA", "BBB"})
+        self.assertEqual(list(reused), ["AAA"])
+        self.assertEqual(todo, [moved])
+
+    def test_skip_unchanged_wraps_sync_and_async_nodes(self):
+        calls = []
+
+        def synth(state):
+            calls.append(state["ticker"])
+            return {"advice": ADVICE}
+
+        async def asynth(state):
+            return synth(state)
+
+        state = _state()
+        fp = fingerprint.fingerprint(state)
+        wrapped = fingerprint.skip_unchanged(synth)
+        self.assertEqual(wrapped(state)["advice"]["fingerprint"], fp)
+        reused = {**state, "prior_advice": {**ADVICE, "fingerprint": fp}}
+        self.assertEqual(wrapped(reused)["advice"]["fingerprint"], fp)
+        asyncio.run(fingerprint.skip_unchanged(asynth)(reused))
+        self.assertEqual(calls, ["AAA"])
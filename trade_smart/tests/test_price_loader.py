@@ -0,0 +1,67 @@
+"""Price matrix loading: forward-fill and the unfilled (``fill=False``) view."""
+
+import datetime as dt
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from trade_smart.analytics import price_loader
+
+DAYS = [dt.date(2024, 1, d) for d in (2, 3, 4, 5)]
+ROWS = [
+    ("AAA", DAYS[0], 10.0),
+    ("AAA", DAYS[2], 12.0),
+    ("BBB", DAYS[1], 20.0),
+    ("BBB", DAYS[3], 21.0),
+]
+
+
+class FfillTests(SimpleTestCase):
+    def test_fills_down_each_column(self):
+        buf = np.array([[1.0, np.nan], [np.nan, 2.0], [np.nan, np.nan], [3.0, 4.0]])
+        price_loader._ffill(buf)
+        np.testing.assert_array_equal(
+            buf, [[1.0, np.nan], [1.0, 2.0], [1.0, 2.0], [3.0, 4.0]]
+        )
+
+    def test_leading_gaps_stay_nan(self):
+        buf = np.array([[np.nan], [np.nan], [5.0]])
+        price_loader._ffill(buf)
+        np.testing.assert_array_equal(np.isnan(buf[:, 0]), [True, True, False])
+
+    def test_empty_buffer(self):
+        buf = np.empty((0, 3))
+        price_loader._ffill(buf)
+        self.assertEqual(buf.shape, (0, 3))
+
+
+class LoadPriceMatrixTests(SimpleTestCase):
+    def setUp(self):
+        days = np.array(DAYS, dtype="datetime64[D]")
+        qs = mock.Mock()
+        qs.values_list.return_value.iterator.return_value = iter(ROWS)
+        mock.patch.object(price_loader, "_trading_days", return_value=days).start()
+        mock.patch.object(
+            price_loader.MarketData.objects, "filter", return_value=qs
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_filled_matrix(self):
+        df = price_loader.load_price_matrix(["AAA", "BBB", "CCC"])
+        self.assertEqual(list(df.columns), ["AAA", "BBB"])  # CCC has no data
+        self.assertEqual(df.index[0], pd.Timestamp(DAYS[0]))
+        np.testing.assert_array_equal(df["AAA"], [10.0, 10.0, 12.0, 12.0])
+        np.testing.assert_array_equal(df["BBB"].iloc[1:], [20.0, 20.0, 21.0])
+        self.assertTrue(np.isnan(df["BBB"].iloc[0]))
+
+    def test_unfilled_matrix_keeps_missing_days(self):
+        df = price_loader.load_price_matrix(["AAA", "BBB"], fill=False)
+        self.assertEqual(df["AAA"].count(), 2)
+        self.assertTrue(np.isnan(df.loc[pd.Timestamp(DAYS[1]), "AAA"]))
+        self.assertEqual(df.loc[pd.Timestamp(DAYS[3]), "BBB"], 21.0)
+
+    def test_duplicate_tickers_load_once(self):
+        df = price_loader.load_price_matrix(["AAA", "AAA", "BBB"])
+        self.assertEqual(list(df.columns), ["AAA", "BBB"])
@@ -0,0 +1,132 @@
+"""Batched headline sentiment: reply parsing and merging across chunks."""
+
+import json
+import re
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from trade_smart.agent_service.data_providers import news_macro
+from trade_smart.models.llm_sentiment import LLMSentiment
+
+_LINE_RE = re.compile(r"^(\d+)\. (.*)$", re.MULTILINE)
+
+
+class FakeLLM:
+    """Scores each numbered line +0.5 / -0.5; raises for prompts with FAIL."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if "FAIL" in prompt:
+            raise RuntimeError("upstream 503")
+        items = [
+            {
+                "id": int(n),
+                "summary": text,
+                "score": -0.5 if "down" in text else 0.5,
+            }
+            for n, text in _LINE_RE.findall(prompt)
+        ]
+        return SimpleNamespace(content=json.dumps({"sentiments": items}))
+
+
+class ParseSentimentsTests(SimpleTestCase):
+    def test_maps_ids_to_hashes(self):
+        content = json.dumps(
+            {
+                "sentiments": [
+                    {"id": 2, "summary": "b", "score": -0.4},
+                    {"id": 1, "summary": "a", "score": 0.3},
+                ]
+            }
+        )
+        parsed = news_macro._parse_sentiments(content, ["h1", "h2"])
+        self.assertEqual(parsed["h1"], {"summary": "a", "score": 0.3})
+        self.assertEqual(parsed["h2"], {"summary": "b", "score": -0.4})
+
+    def test_skips_out_of_range_and_missing_ids(self):
+        content = json.dumps(
+            {
+                "sentiments": [
+                    {"id": 0, "summary": "zero", "score": 0.1},
+                    {"id": 3, "summary": "past the end", "score": 0.1},
+                    {"id": -1, "summary": "negative", "score": 0.1},
+                    {"summary": "no id", "score": 0.1},
+                    {"id": "x", "summary": "not a number", "score": 0.1},
+                    {"id": 2, "summary": "ok", "score": 0.2},
+                ]
+            }
+        )
+        parsed = news_macro._parse_sentiments(content, ["h1", "h2"])
+        self.assertEqual(parsed, {"h2": {"summary": "ok", "score": 0.2}})
+
+    def test_clamps_scores_and_tolerates_bad_replies(self):
+        content = json.dumps({"sentiments": [{"id": 1, "score": 7}]})
+        parsed = news_macro._parse_sentiments(content, ["h1"])
+        self.assertEqual(parsed["h1"]["score"], 1.0)
+        self.assertEqual(news_macro._parse_sentiments("not json", ["h1"]), {})
+        self.assertEqual(news_macro._parse_sentiments('{"x": 1}', ["h1"]), {})
+
+
+class ClassifySentimentTests(SimpleTestCase):
+    def setUp(self):
+        self.llm = FakeLLM()
+        patches = [
+            mock.patch.object(news_macro, "_get_llm", return_value=self.llm),
+            mock.patch.object(news_macro, "_stored_sentiments", return_value={}),
+            mock.patch.object(news_macro.deadline, "low", return_value=False),
+            mock.patch.object(news_macro.embeddings, "encode", return_value=None),
+            mock.patch.object(news_macro.headline_cache, "lookup", return_value={}),
+            mock.patch.object(news_macro.headline_cache, "store"),
+        ]
+        for patch in patches:
+            patch.start()
+        self.bulk_create = mock.patch.object(
+            LLMSentiment.objects, "bulk_create"
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def classify(self, news_items):
+        # token_budget=0: one headline per request, so each is its own chunk
+        return news_macro.classify_sentiment(news_items, token_budget=0)
+
+    def test_results_follow_news_items_order(self):
+        news_items = [
+            ("MSFT", [{"headline": "MSFT shares up"}]),
+            ("AAPL", []),
+            ("NVDA", [{"headline": "NVDA guidance down"}]),
+        ]
+        results = self.classify(news_items)
+
+        self.assertEqual([r["ticker"] for r in results], ["MSFT", "AAPL", "NVDA"])
+        self.assertEqual(results[0]["score"], 0.5)
+        self.assertEqual(results[1]["summary"], "No fresh headlines")
+        self.assertEqual(results[2]["score"], -0.5)
+        self.assertEqual(len(self.llm.prompts), 2)
+
+    def test_partial_chunk_failure_keeps_scored_tickers(self):
+        news_items = [
+            ("MSFT", [{"headline": "MSFT shares up"}]),
+            ("NVDA", [{"headline": "NVDA FAIL headline"}]),
+        ]
+        results = self.classify(news_items)
+
+        self.assertEqual(results[0]["score"], 0.5)
+        self.assertEqual(
+            results[1], {"ticker": "NVDA", "summary": "LLM parse error", "score": 0.0}
+        )
+        (rows,), _ = self.bulk_create.call_args
+        self.assertEqual([row.ticker for row in rows], ["MSFT"])
+
+    def test_raises_when_nothing_was_scored(self):
+        news_items = [
+            ("MSFT", [{"headline": "MSFT FAIL one"}]),
+            ("NVDA", [{"headline": "NVDA FAIL two"}]),
+        ]
+        with self.assertRaises(RuntimeError):
+            self.classify(news_items)
+        self.bulk_create.assert_not_called()
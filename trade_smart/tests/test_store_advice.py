@@ -0,0 +1,76 @@
+"""Advice upsert: validation, bulk write and the row-by-row fallback."""
+
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase
+
+from trade_smart.agent_service import runner
+from trade_smart.models.advice import Advice
+from trade_smart.models.portfolio import Portfolio
+
+
+def _advice(action="BUY", confidence=0.8, fingerprint="fp-new"):
+    return {
+        "action": action,
+        "confidence": confidence,
+        "rationale": "why",
+        "fingerprint": fingerprint,
+    }
+
+
+class ValidAdviceTests(SimpleTestCase):
+    def test_coerces_action_and_clamps_confidence(self):
+        values = runner._valid_advice("AAA", _advice(action=" sell ", confidence=1.7))
+        self.assertEqual(values["action"], "SELL")
+        self.assertEqual(values["confidence"], 1.0)
+
+    def test_unknown_action_becomes_hold(self):
+        self.assertEqual(runner._valid_advice("AAA", _advice("MOON"))["action"], "HOLD")
+
+    def test_unusable_confidence_is_rejected(self):
+        self.assertIsNone(runner._valid_advice("AAA", _advice(confidence="high")))
+
+
+class StoreAdviceTests(SimpleTestCase):
+    def setUp(self):
+        self.pf = Portfolio(id=7)
+        self.existing = [
+            Advice(portfolio=self.pf, ticker="AAA", fingerprint="fp-old"),
+            Advice(portfolio=self.pf, ticker="SAME", fingerprint="fp-same"),
+        ]
+        objects = Advice.objects
+        mock.patch.object(objects, "filter", return_value=self.existing).start()
+        mock.patch.object(runner.transaction, "atomic").start()
+        self.bulk_update = mock.patch.object(objects, "bulk_update").start()
+        self.bulk_create = mock.patch.object(objects, "bulk_create").start()
+        self.addCleanup(mock.patch.stopall)
+        self.advice = {
+            "AAA": _advice(),
+            "SAME": _advice(fingerprint="fp-same"),
+            "NEW": _advice(action="SELL"),
+            "BAD": _advice(confidence=None),
+        }
+
+    def test_bulk_upsert(self):
+        failed = runner._store_advice(self.pf, self.advice)
+
+        self.assertEqual(failed, ["BAD"])
+        updated = self.bulk_update.call_args[0][0]
+        self.assertEqual([a.ticker for a in updated], ["AAA"])  # SAME untouched
+        self.assertEqual(updated[0].fingerprint, "fp-new")
+        created = self.bulk_create.call_args[0][0]
+        self.assertEqual([(a.ticker, a.action) for a in created], [("NEW", "SELL")])
+
+    def test_failed_bulk_write_falls_back_to_single_rows(self):
+        self.bulk_create.side_effect = DatabaseError("value too long")
+
+        def save(obj):
+            if obj.ticker == "NEW":
+                raise DatabaseError("value too long")
+
+        with mock.patch.object(Advice, "save", autospec=True, side_effect=save) as s:
+            failed = runner._store_advice(self.pf, self.advice)
+
+        self.assertEqual([c.args[0].ticker for c in s.call_args_list], ["AAA", "NEW"])
+        self.assertEqual(sorted(failed), ["BAD", "NEW"])
@@ -0,0 +1,130 @@
+"""Stress scenarios: factor shock expansion, window replay and missing data."""
+
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from trade_smart.analytics import stress
+from trade_smart.analytics.stress import Scenario
+
+FACTORS = ["SPY", "QQQ"]
+COV = pd.DataFrame([[4.0, 3.0], [3.0, 9.0]], index=FACTORS, columns=FACTORS)
+PROXIES = {"SPY": "SPY", "QQQ": "QQQ"}
+WINDOW = ("2020-02-19", "2020-03-23")
+
+
+class ExpandFactorShocksTests(SimpleTestCase):
+    def test_unshocked_factor_takes_conditional_expectation(self):
+        full = stress._expand_factor_shocks({"SPY": -0.10}, COV)
+        np.testing.assert_allclose(full, [-0.10, 3.0 / 4.0 * -0.10])
+
+    def test_all_factors_shocked_are_kept(self):
+        full = stress._expand_factor_shocks({"SPY": -0.1, "QQQ": 0.2}, COV)
+        np.testing.assert_allclose(full, [-0.1, 0.2])
+
+    def test_unknown_factor_is_no_move(self):
+        full = stress._expand_factor_shocks({"DAX": -0.15}, COV)
+        np.testing.assert_array_equal(full, [0.0, 0.0])
+
+
+class WindowReturnsTests(SimpleTestCase):
+    def _returns(self, prices):
+        with mock.patch.object(stress, "load_price_matrix", return_value=prices):
+            return stress._window_returns(["AAA", "BBB", "CCC"], WINDOW)
+
+    def test_return_needs_prices_at_both_ends(self):
+        index = pd.to_datetime(["2020-02-19", "2020-03-02", "2020-03-23"])
+        prices = pd.DataFrame(
+            {"AAA": [100.0, 90.0, 70.0], "BBB": [np.nan, 50.0, 40.0]}, index=index
+        )
+        ret = self._returns(prices)
+        self.assertAlmostEqual(ret["AAA"], -0.30)
+        self.assertTrue(np.isnan(ret["BBB"]))  # listed mid-window
+        self.assertTrue(np.isnan(ret["CCC"]))  # no prices at all
+
+    def test_no_history(self):
+        self.assertTrue(self._returns(pd.DataFrame()).isna().all())
+
+
+class ShockMatrixTests(SimpleTestCase):
+    def setUp(self):
+        mock.patch.object(stress, "FACTOR_PROXIES", PROXIES).start()
+        self.addCleanup(mock.patch.stopall)
+        self.loadings = pd.DataFrame(
+            [[1.0, 0.0], [0.5, 0.5]], index=["AAA", "BBB"], columns=FACTORS
+        )
+
+    def _shocks(self, scenarios, window_returns=None):
+        with mock.patch.object(stress, "_window_returns", return_value=window_returns):
+            return stress._shock_matrix(["AAA", "BBB"], scenarios, self.loadings, COV)
+
+    def test_factor_and_ticker_shocks(self):
+        shocks = self._shocks(
+            [Scenario("s", factor_shocks={"SPY": -0.1}, ticker_shocks={"BBB": -0.5})]
+        )
+        np.testing.assert_allclose(shocks[:, 0], [-0.1, -0.5])
+
+    def test_window_falls_back_to_factor_implied_move(self):
+        hist = pd.Series({"AAA": -0.2, "BBB": np.nan, "SPY": -0.3, "QQQ": -0.3})
+        shocks = self._shocks([Scenario("w", window=WINDOW)], hist)
+        np.testing.assert_allclose(shocks[:, 0], [-0.2, -0.3])
+
+    def test_window_without_any_data_is_nan_not_zero(self):
+        hist = pd.Series(np.nan, index=["AAA", "BBB", "SPY", "QQQ"])
+        shocks = self._shocks([Scenario("w", window=WINDOW)], hist)
+        self.assertTrue(np.isnan(shocks).all())
+
+
+class RunStressTestsTests(SimpleTestCase):
+    def setUp(self):
+        index = pd.date_range("2024-01-01", periods=3, freq="B")
+        for name, value in {
+            "_holdings": (
+                [1, 2],
+                ["AAA", "BBB.WA"],
+                np.array([[10.0, 0.0], [0.0, 5.0]]),
+            ),
+            "_price_matrix": pd.DataFrame(
+                {"AAA": [10.0] * 3, "BBB.WA": [4.0] * 3}, index=index
+            ),
+            "factor_returns": pd.DataFrame(
+                [[0.01, 0.02], [-0.01, 0.0], [0.0, -0.02]], index=index, columns=FACTORS
+            ),
+            "_loadings": pd.DataFrame(0.0, index=["AAA", "BBB.WA"], columns=FACTORS),
+            "_shock_matrix": np.array([[-0.1, np.nan], [-0.2, -0.2]]),
+        }.items():
+            mock.patch.object(stress, name, return_value=value).start()
+        mock.patch.object(stress.transaction, "atomic").start()
+        mock.patch.object(stress.StressResult.objects, "filter").start()
+        self.bulk_create = mock.patch.object(
+            stress.StressResult.objects, "bulk_create"
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+        self.scenarios = [Scenario("drop"), Scenario("window")]
+
+    def _rows(self, fx):
+        with mock.patch.object(stress, "_fx_to_base", return_value=np.array(fx)):
+            stress.run_stress_tests(self.scenarios)
+        return {
+            (r.portfolio_id, r.scenario): r for r in self.bulk_create.call_args[0][0]
+        }
+
+    def test_pnl_in_base_currency(self):
+        rows = self._rows([1.0, 0.25])
+        self.assertEqual(float(rows[1, "drop"].pnl_pct), -0.1)
+        self.assertEqual(float(rows[1, "drop"].pnl_value), -10.0)
+        self.assertEqual(float(rows[2, "drop"].pnl_value), -1.0)  # 5 × 4 PLN × 0.25
+
+    def test_unpriced_window_is_null_with_a_note(self):
+        rows = self._rows([1.0, 0.25])
+        self.assertIsNone(rows[1, "window"].pnl_pct)
+        self.assertEqual(rows[1, "window"].note, "no price history for 1 holdings")
+        self.assertIsNotNone(rows[2, "window"].pnl_pct)  # does not hold AAA
+
+    def test_missing_fx_rate_is_null_with_a_note(self):
+        rows = self._rows([1.0, np.nan])
+        self.assertIsNone(rows[2, "drop"].pnl_value)
+        self.assertIn("no FX rate", rows[2, "drop"].note)
+        self.assertIsNotNone(rows[1, "drop"].pnl_value)
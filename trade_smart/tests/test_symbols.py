@@ -0,0 +1,84 @@
+"""Holding name normalisation and fuzzy ticker resolution."""
+
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from trade_smart.agent_service.data_providers import symbols
+
+
+class NormalizeTests(SimpleTestCase):
+    def test_strips_corporate_suffixes(self):
+        self.assertEqual(symbols.normalize("NVIDIA Corporation"), "nvidia")
+        self.assertEqual(symbols.normalize("Nvidia Corp."), "nvidia")
+        self.assertEqual(symbols.normalize("The Coca-Cola Co"), "coca cola")
+
+    def test_keeps_share_class(self):
+        a = symbols.normalize("Alphabet Inc Class A")
+        c = symbols.normalize("Alphabet Inc. Cl. C")
+        self.assertEqual(a, "alphabet a")
+        self.assertEqual(c, "alphabet c")
+        self.assertEqual(symbols.normalize("Alphabet Inc - Class C"), c)
+
+    def test_keeps_ticker_style_share_class(self):
+        self.assertEqual(symbols.normalize("BRK.A"), "brk a")
+        self.assertEqual(symbols.normalize("BRK.B"), "brk b")
+        # a trailing "S.A." is a legal form, not a class
+        self.assertEqual(symbols.normalize("PKN Orlen S.A."), "pkn orlen")
+
+
+class FuzzyIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = symbols._FuzzyIndex()
+        self.index._loaded_at = time.monotonic()  # no table reload
+        for name, ticker in [
+            ("Alphabet Inc Class A", "GOOGL"),
+            ("Berkshire Hathaway Inc Class B", "BRK-B"),
+            ("Taiwan Semiconductor Manufacturing", "TSM"),
+        ]:
+            self.index.add(symbols.normalize(name), ticker)
+
+    def match(self, name):
+        hit = self.index.match(symbols.normalize(name))
+        return hit and hit[0]
+
+    def test_exact_and_near_miss(self):
+        self.assertEqual(self.match("Alphabet Inc. Cl A"), "GOOGL")
+        self.assertEqual(self.match("Taiwan Semiconductor Manufacturing Co"), "TSM")
+        self.assertEqual(self.match("Taiwan Semiconductor Manufactur"), "TSM")
+
+    def test_never_crosses_share_classes(self):
+        self.assertIsNone(self.match("Alphabet Inc Class C"))
+        self.assertIsNone(self.match("Berkshire Hathaway Inc Class A"))
+        self.assertIsNone(self.match("Berkshire Hathaway Inc"))
+
+    def test_unrelated_name_misses(self):
+        self.assertIsNone(self.match("Apple Inc"))
+
+
+class ResolveTests(SimpleTestCase):
+    def setUp(self):
+        index = symbols._FuzzyIndex()
+        index._loaded_at = time.monotonic()
+        patches = [
+            mock.patch.object(symbols, "_index", index),
+            mock.patch.object(symbols.SymbolResolution.objects, "update_or_create"),
+        ]
+        for patch in patches:
+            patch.start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_translates_once_then_serves_from_index(self):
+        translate = mock.Mock(return_value=" googl\n")
+        self.assertEqual(symbols.resolve("Alphabet Inc Class A", translate), "GOOGL")
+        self.assertEqual(symbols.resolve("Alphabet Inc. Cl A", translate), "GOOGL")
+        translate.assert_called_once()
+
+        translate.return_value = "GOOG"
+        self.assertEqual(symbols.resolve("Alphabet Inc Class C", translate), "GOOG")
+
+    def test_unusable_answer_returns_name(self):
+        translate = mock.Mock(return_value="I am not sure which ticker that is")
+        self.assertEqual(symbols.resolve("Obscure Fund", translate), "Obscure Fund")
+        symbols.SymbolResolution.objects.update_or_create.assert_not_called()
@@ -0,0 +1,60 @@
+"""Ticker-scoped stage cache: what is stored and when it is bypassed."""
+
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from trade_smart.agent_service import ticker_context
+
+NEWS = {
+    "news_macro": {"summary": "beats estimates", "score": 0.4},
+    "raw_headlines": [{"headline": "AAA beats estimates"}],
+}
+
+
+class CacheableTests(SimpleTestCase):
+    def test_complete_output(self):
+        self.assertTrue(ticker_context._cacheable("news_macro", NEWS))
+        self.assertTrue(ticker_context._cacheable("market", {"last_px": 0.5}))
+
+    def test_degraded_empty_or_placeholder_output(self):
+        cacheable = ticker_context._cacheable
+        self.assertFalse(cacheable("news_macro", {**NEWS, "degraded": ["news"]}))
+        self.assertFalse(cacheable("tech", {"tech": {}}))
+        self.assertFalse(cacheable("market", {"last_px": None}))
+        placeholder = {"summary": "No sentiment", "score": 0.0}
+        self.assertFalse(cacheable("news_macro", {"news_macro": placeholder}))
+
+
+class CachedStageTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = {}
+        mock.patch.object(ticker_context, "_cache_get", self.cache.get).start()
+        mock.patch.object(
+            ticker_context,
+            "_cache_set",
+            lambda key, value, ttl: self.cache.__setitem__(key, value),
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+        self.node = mock.Mock(return_value=NEWS)
+        self.stage = ticker_context.cached_stage("news_macro", self.node)
+
+    def test_stores_raw_headlines_with_the_summary(self):
+        self.stage({"ticker": "aaa"})
+        (stored,) = self.cache.values()
+        self.assertEqual(json.loads(stored), NEWS)
+        self.assertEqual(self.stage({"ticker": "AAA"}), NEWS)
+        self.node.assert_called_once()
+
+    def test_degraded_output_is_recomputed(self):
+        self.node.return_value = {**NEWS, "degraded": ["news"]}
+        self.stage({"ticker": "AAA"})
+        self.stage({"ticker": "AAA"})
+        self.assertEqual(self.cache, {})
+        self.assertEqual(self.node.call_count, 2)
+
+    def test_refresh_news_bypasses_the_cache(self):
+        self.stage({"ticker": "AAA"})
+        self.stage({"ticker": "AAA", "refresh_news": True})
+        self.assertEqual(self.node.call_count, 2)
@@ -0,0 +1,36 @@
+"""
+aio – helpers for the asyncio advice path
+
+Public functions:
+    db_thread(fn)  -> coroutine function running *fn* via ``sync_to_async``
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Any, Awaitable, Callable
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+
+def _closing(fn: Callable, *args: Any, **kwargs: Any) -> Any:
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        connections.close_all()  # executor threads are short-lived
+
+
+def db_thread(fn: Callable) -> Callable[..., Awaitable[Any]]:
+    """
+    Run blocking (ORM / HTTP library) code off the event loop on the loop's
+    default executor, so many calls can be in flight at once.  Context vars
+    (e.g. the active tracing span) are carried into the thread.
+    """
+    offloaded = sync_to_async(functools.partial(_closing, fn), thread_sensitive=False)
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await offloaded(*args, **kwargs)
+
+    return wrapper
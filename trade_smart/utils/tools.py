@@ -5,9 +5,11 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 import requests
-import yfinance as yf
 import redis
 
+from trade_smart.services import deadline
+from trade_smart.services.tracing import record_cache
+
 logger = logging.getLogger(__name__)
 
 # ---------- optional cache --------------------------------------------------
@@ -22,6 +24,7 @@ def _cache_get(key: str) -> Optional[str]:
     if rds:
         try:
             val = rds.get(key)
+            record_cache(hit=bool(val))
             return val.decode() if val else None
         except Exception:
             pass
@@ -50,7 +53,10 @@ def last_price(ticker: str) -> Optional[float]:
 
     # Fallback to yfinance live call – only happens if DB empty
     try:
-        px = yf.Ticker(ticker).history(period="1d")["Close"].iloc[-1]
+        import yfinance as yf
+
+        px = yf.Ticker(ticker).history(period="1d", timeout=deadline.timeout(10))
+        px = px["Close"].iloc[-1]
         return float(px)
     except Exception as exc:
         logger.warning("Could not fetch last price for %s: %s", ticker, exc)
@@ -0,0 +1,44 @@
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import BasePermission
+
+from trade_smart.services.tracing import cached_percentiles, prometheus_text
+
+# unauthenticated scrapes are accepted from loopback only, plus the networks
+# listed in METRICS_ALLOWED_NETS (e.g. the scraper's own address).  Private
+# ranges are not trusted by default: behind Docker every client appears to
+# come from the bridge network.
+METRICS_ALLOWED_NETS = [
+    ipaddress.ip_network(net)
+    for net in [
+        "127.0.0.0/8",
+        "::1/128",
+        *getattr(settings, "METRICS_ALLOWED_NETS", []),
+    ]
+]
+
+
+class InternalOrStaff(BasePermission):
+    """Staff users, or unauthenticated requests from loopback / allowed nets."""
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        try:
+            addr = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+        except ValueError:
+            return False
+        return any(addr in net for net in METRICS_ALLOWED_NETS)
+
+
+@api_view(["GET"])
+@permission_classes([InternalOrStaff])
+def metrics(request):
+    """Prometheus scrape target: graph-node percentiles over the last 24 h."""
+    return HttpResponse(
+        prometheus_text(cached_percentiles()),
+        content_type="text/plain; version=0.0.4",
+    )
@@ -2,10 +2,18 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view
 
 from trade_smart.analytics.portfolio_analyser import analyse
+from trade_smart.analytics.stress import current_results
 from trade_smart.models import Portfolio
+from trade_smart.serializers.stress import StressResultSerializer
 
 
 @api_view(["GET"])
 def portfolio_metrics(request, pk: int):
     portfolio = Portfolio.objects.get(pk=pk, user=request.user)
     return Response(analyse(portfolio))
+
+
+@api_view(["GET"])
+def portfolio_stress(request, pk: int):
+    portfolio = Portfolio.objects.get(pk=pk, user=request.user)
+    return Response(StressResultSerializer(current_results(portfolio), many=True).data)
@@ -3,6 +3,8 @@ from django.urls import include, path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from trade_smart.poractive_proposition.views import InvestmentGoalViewSet, propose
+from trade_smart.views.metrics import metrics
+from trade_smart.views.tech_indicators import portfolio_stress
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -10,4 +12,6 @@ urlpatterns = [
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("advice/", InvestmentGoalViewSet.as_view({"post"}), name="advice"),
     path("propose/", propose, name="propose"),
+    path("portfolios/<int:pk>/stress/", portfolio_stress, name="portfolio_stress"),
+    path("metrics/", metrics, name="metrics"),
 ]